@@ -0,0 +1,94 @@
+"""
+Per-call overhead of a fresh genai.Client per request vs one shared client.
+
+Starts a local stub of the generateContent endpoint, so no API key or network
+access is needed:
+    python bench_genai_client.py --calls 200 --concurrency 8
+"""
+
+import time
+import json
+import asyncio
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google import genai
+
+STUB_RESPONSE = json.dumps({
+    "candidates": [{
+        "content": {"role": "model", "parts": [{"text": "{\"teamSynergyScore\": 80}"}]},
+        "finishReason": "STOP"
+    }]
+}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_client(base_url):
+    return genai.Client(api_key="stub", http_options={"base_url": base_url})
+
+
+def timed_calls(label, calls, fn):
+    latencies = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    print(f"{label:<28} mean {statistics.mean(latencies) * 1000:7.2f} ms   "
+          f"p50 {statistics.median(latencies) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Gemini client reuse against a local stub")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/"
+
+    def call(client):
+        client.models.generate_content(model="gemini-2.0-flash-exp", contents="ping")
+
+    timed_calls("New client per call", args.calls, lambda: call(make_client(base_url)))
+
+    shared = make_client(base_url)
+    call(shared)  # warm the connection
+    timed_calls("Shared client", args.calls, lambda: call(shared))
+
+    async def run_concurrent():
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one():
+            async with sem:
+                await shared.aio.models.generate_content(model="gemini-2.0-flash-exp", contents="ping")
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.calls)))
+        return time.perf_counter() - t0
+
+    elapsed = asyncio.run(run_concurrent())
+    print(f"{'Shared async, concurrency ' + str(args.concurrency):<28} "
+          f"{args.calls / elapsed:7.1f} calls/s ({elapsed * 1000 / args.calls:.2f} ms/call amortized)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
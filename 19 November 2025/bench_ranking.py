@@ -0,0 +1,108 @@
+"""
+Offline benchmark for the upload -> rank -> shortlist flow.
+
+Record fixtures once (needs GOOGLE_API_KEY):
+    python bench_ranking.py --cv-dir cvs/ --jd-file jd.txt --mode record
+
+Replay them deterministically, without network access:
+    python bench_ranking.py --cv-dir cvs/ --jd-file jd.txt --concurrency 8 --latency-ms 800 --error-rate 0.02
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark RecruitIQ batch ranking")
+    parser.add_argument("--cv-dir", required=True, help="Directory of CV .txt files")
+    parser.add_argument("--jd-file", required=True, help="Job description text file")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--fixtures-dir", default="genai_fixtures")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", type=float, default=70.0, help="Shortlist minimum score")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Configure the app before it is imported (it reads these at import time)
+    os.environ["GENAI_MODE"] = args.mode
+    os.environ["GENAI_FIXTURES_DIR"] = args.fixtures_dir
+    os.environ["GENAI_REPLAY_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["GENAI_REPLAY_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["GENAI_REPLAY_ERROR_RATE"] = str(args.error_rate)
+    os.environ["GENAI_REPLAY_SEED"] = str(args.seed)
+    os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    import main2
+
+    main2.init_database()
+
+    cv_files = sorted(Path(args.cv_dir).glob("*.txt"))
+    if not cv_files:
+        print(f"No .txt CVs found in {args.cv_dir}")
+        sys.exit(1)
+    jd_text = Path(args.jd_file).read_text(encoding="utf-8")
+
+    # Upload
+    start = time.perf_counter()
+    jd_id = main2.save_job_description(Path(args.jd_file).stem, jd_text, Path(args.jd_file).name)
+    candidates = []
+    for path in cv_files:
+        cv_text = path.read_text(encoding="utf-8")
+        candidates.append((main2.save_candidate(path.name, cv_text, str(path)), cv_text))
+    upload_s = time.perf_counter() - start
+
+    # Rank
+    latencies = []
+
+    def rank(candidate):
+        candidate_id, cv_text = candidate
+        t0 = time.perf_counter()
+        analysis = main2.analyze_candidate(cv_text, jd_text)
+        latencies.append(time.perf_counter() - t0)
+        main2.save_ranking(candidate_id, jd_id, analysis)
+        return candidate_id, analysis
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(rank, candidates))
+    rank_s = time.perf_counter() - start
+
+    # Shortlist
+    start = time.perf_counter()
+    scores = {cid: a.get("matchScore", 0) for cid, a in results}
+    shortlisted = [cid for cid, score in scores.items() if score >= args.threshold]
+    main2.save_shortlist(jd_id, shortlisted, scores)
+    shortlist_s = time.perf_counter() - start
+
+    errors = sum(1 for _, a in results if "error" in a)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    print(f"Mode:            {args.mode} (concurrency={args.concurrency})")
+    print(f"Candidates:      {len(candidates)}")
+    print(f"Upload:          {upload_s:.3f}s")
+    print(f"Ranking:         {rank_s:.3f}s ({len(candidates) / rank_s:.1f} candidates/s)")
+    print(f"Per-call p50/95: {statistics.median(latencies) * 1000:.0f}ms / {p95 * 1000:.0f}ms")
+    print(f"Shortlist:       {shortlist_s:.3f}s ({len(shortlisted)} shortlisted)")
+    print(f"Errors:          {errors}")
+
+    client = main2.get_genai_client()
+    if hasattr(client, "stats"):
+        print(f"Replay stats:    {client.stats}")
+
+
+if __name__ == "__main__":
+    main()
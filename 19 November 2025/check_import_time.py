@@ -0,0 +1,101 @@
+"""
+Cold-start import budget for the RecruitIQ app.
+
+Runs the app's module-level imports in a fresh interpreter under
+`python -X importtime` and fails (exit code 1) when:
+- their cumulative import time exceeds the budget, or
+- a heavy module that must be imported lazily is imported at the top level.
+
+    python check_import_time.py                   # default 1500 ms budget
+    python check_import_time.py --budget-ms 800 --runs 5
+"""
+
+import ast
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+APP_FILE = Path(__file__).parent / "streamlit_app (1).py"
+
+# Only the pages/functions that need these may import them
+LAZY_MODULES = ("plotly", "pandas", "google.genai", "langgraph", "smtplib", "numpy", "sentence_transformers")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check RecruitIQ cold-start import time")
+    parser.add_argument("--app", default=str(APP_FILE))
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=3, help="Median of this many cold imports")
+    return parser.parse_args()
+
+
+def top_level_imports(app_path: str):
+    """Import statements executed on every script run (module level, outside any page branch)."""
+    tree = ast.parse(Path(app_path).read_text(encoding="utf-8"))
+    return [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def imported_modules(nodes):
+    modules = []
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif node.module:
+            modules.append(node.module)
+    return modules
+
+
+def measure(source: str):
+    """Cumulative import time (us) per top-level module for one cold interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", source], capture_output=True, text=True)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1]
+        print(f"ERROR: app imports failed in a clean interpreter ({error}); install requirements.txt first")
+        sys.exit(2)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        # Nesting is shown by indentation; only count top-level entries so nothing is counted twice
+        if not name.startswith("  "):
+            cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def main():
+    args = parse_args()
+    nodes = top_level_imports(args.app)
+    modules = imported_modules(nodes)
+
+    eager = [m for m in modules if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES)]
+    source = "\n".join(ast.unparse(node) for node in nodes)
+
+    totals, last = [], {}
+    for _ in range(args.runs):
+        last = measure(source)
+        totals.append(sum(last.values()) / 1000)
+    total_ms = statistics.median(totals)
+
+    print(f"Top-level imports: {', '.join(modules)}")
+    print("Slowest modules (last run):")
+    for name, us in sorted(last.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    print(f"Cold import time: {total_ms:.1f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if eager:
+        print(f"FAIL: heavy modules imported at top level: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: cold import time exceeds budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Record & replay support for Google GenAI calls.
+- RecordingClient wraps a real genai.Client and saves every response to a fixture file
+- ReplayClient serves saved fixtures back without network access or API spend
+- Replay supports configurable latency and error injection for load tests
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayMissError(RuntimeError):
+    """Raised when no fixture exists for a request in replay mode."""
+
+
+class InjectedError(RuntimeError):
+    """Raised by ReplayClient to simulate an API failure."""
+
+
+def request_hash(model: str, contents: Any, config: Optional[Dict] = None) -> str:
+    """Stable SHA-256 hash of a generate_content request."""
+    payload = json.dumps(
+        {"model": model, "contents": contents, "config": config or {}},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FixtureResponse:
+    """Minimal stand-in for a GenAI response object (only `.text` is used)."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+
+class _RecordingModels:
+    def __init__(self, models, fixtures_dir: Path):
+        self._models = models
+        self._fixtures_dir = fixtures_dir
+
+    def generate_content(self, model: str, contents: Any, config: Optional[Dict] = None, **kwargs):
+        response = self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        digest = request_hash(model, contents, config)
+        fixture = {
+            "request_hash": digest,
+            "model": model,
+            "response_text": getattr(response, "text", None) or str(response),
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        path = self._fixtures_dir / f"{digest}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=2)
+        logger.info(f"Recorded GenAI fixture: {path.name}")
+        return response
+
+
+class RecordingClient:
+    """Wraps a genai.Client and records each response as a fixture file."""
+
+    def __init__(self, client, fixtures_dir: str):
+        self._fixtures_dir = Path(fixtures_dir)
+        self._fixtures_dir.mkdir(parents=True, exist_ok=True)
+        self.models = _RecordingModels(client.models, self._fixtures_dir)
+
+
+class _ReplayModels:
+    def __init__(self, client: "ReplayClient"):
+        self._client = client
+
+    def generate_content(self, model: str, contents: Any, config: Optional[Dict] = None, **kwargs):
+        return self._client.serve(model, contents, config)
+
+
+class ReplayClient:
+    """Serves recorded fixtures back with simulated latency and failures."""
+
+    def __init__(self, fixtures_dir: str, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fixtures: Dict[str, str] = {}
+        self.stats = {"calls": 0, "hits": 0, "misses": 0, "injected_errors": 0}
+        self.models = _ReplayModels(self)
+        self._load_fixtures()
+
+    @classmethod
+    def from_env(cls) -> "ReplayClient":
+        """Build a replay client from GENAI_REPLAY_* environment variables."""
+        seed = os.getenv("GENAI_REPLAY_SEED")
+        return cls(
+            fixtures_dir=os.getenv("GENAI_FIXTURES_DIR", "genai_fixtures"),
+            latency_ms=float(os.getenv("GENAI_REPLAY_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("GENAI_REPLAY_JITTER_MS", "0")),
+            error_rate=float(os.getenv("GENAI_REPLAY_ERROR_RATE", "0")),
+            seed=int(seed) if seed else None
+        )
+
+    def _load_fixtures(self):
+        if not self.fixtures_dir.exists():
+            logger.warning(f"Fixtures directory not found: {self.fixtures_dir}")
+            return
+        for path in self.fixtures_dir.glob("*.json"):
+            with open(path, "r", encoding="utf-8") as f:
+                fixture = json.load(f)
+            self._fixtures[fixture["request_hash"]] = fixture["response_text"]
+        logger.info(f"Loaded {len(self._fixtures)} GenAI fixtures from {self.fixtures_dir}")
+
+    def serve(self, model: str, contents: Any, config: Optional[Dict] = None) -> FixtureResponse:
+        """Return the recorded response for a request, after latency/error injection."""
+        digest = request_hash(model, contents, config)
+
+        with self._lock:
+            self.stats["calls"] += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            fail = self._rng.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay / 1000)
+
+        if fail:
+            with self._lock:
+                self.stats["injected_errors"] += 1
+            raise InjectedError("Injected GenAI failure (replay mode)")
+
+        text = self._fixtures.get(digest)
+        with self._lock:
+            self.stats["hits" if text is not None else "misses"] += 1
+        if text is None:
+            raise ReplayMissError(f"No fixture recorded for request {digest[:12]}")
+        return FixtureResponse(text)
@@ -20,6 +20,8 @@ from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
 import pandas as pd
 import re
+import time
+import zlib
 from pathlib import Path
 
 # Google GenAI SDK
@@ -32,6 +34,10 @@ load_dotenv()
 
 DATABASE_PATH = os.getenv("DATABASE_PATH", "hr_recruitment.db")
 LOG_FILE = os.getenv("LOG_FILE", "recruitment_system.log")
+GENAI_MODE = os.getenv("GENAI_MODE", "live")  # live | record | replay
+GENAI_FIXTURES_DIR = os.getenv("GENAI_FIXTURES_DIR", "genai_fixtures")
+CASCADE_MODEL = os.getenv("CASCADE_MODEL", "gemini-2.0-flash-lite")
+CASCADE_BAND = (40, 70)  # first-pass scores that still get a full analysis
 UPLOAD_FOLDER = "uploaded_files"
 Path(UPLOAD_FOLDER).mkdir(exist_ok=True)
 
@@ -46,6 +52,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ==================== TEXT COMPRESSION ====================
+
+# Stored text format: one version byte followed by the compressed payload.
+# Rows written before compression was introduced are plain TEXT and read as-is.
+TEXT_FORMAT_ZLIB = 1
+TEXT_FORMAT_ZSTD = 2
+
+# zstandard (de)compressor objects are not thread-safe and Streamlit runs each
+# session in its own thread, so they are created per call (which is cheap)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    """Compress text for storage, prefixed with its format-version byte."""
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return bytes([TEXT_FORMAT_ZSTD]) + zstandard.ZstdCompressor(level=10).compress(data)
+    return bytes([TEXT_FORMAT_ZLIB]) + zlib.compress(data, 6)
+
+
+def decompress_text(value) -> str:
+    """Decode a stored text column (compressed BLOB or legacy plain TEXT)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    version, payload = value[0], value[1:]
+    if version == TEXT_FORMAT_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if version == TEXT_FORMAT_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this row (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown text format version: {version}")
+
+
 # ==================== DATABASE SETUP ====================
 
 @contextmanager
@@ -205,7 +252,7 @@ def save_candidate(filename: str, cv_text: str, file_path: str) -> str:
             cursor.execute("""
                 INSERT INTO candidates (candidate_id, filename, cv_text, file_path)
                 VALUES (?, ?, ?, ?)
-            """, (candidate_id, filename, cv_text, file_path))
+            """, (candidate_id, filename, compress_text(cv_text), file_path))
             conn.commit()
             logger.info(f"Candidate saved: {candidate_id}")
             return candidate_id
@@ -224,7 +271,7 @@ def save_job_description(title: str, description: str, filename: str = None) ->
             cursor.execute("""
                 INSERT INTO job_descriptions (jd_id, title, description, filename)
                 VALUES (?, ?, ?, ?)
-            """, (jd_id, title, description, filename))
+            """, (jd_id, title, compress_text(description), filename))
             conn.commit()
             logger.info(f"Job description saved: {jd_id}")
             return jd_id
@@ -285,36 +332,68 @@ def save_shortlist(jd_id: str, candidate_ids: List[str], scores: Dict[str, float
 
 
 def get_all_candidates() -> List[Dict]:
-    """Retrieve all candidates."""
+    """Retrieve all candidates (without CV text; see get_candidate_cv_text)."""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM candidates ORDER BY upload_date DESC")
+            cursor.execute("""
+                SELECT id, candidate_id, filename, file_path, upload_date, status
+                FROM candidates ORDER BY upload_date DESC
+            """)
             return [dict(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.error(f"Error retrieving candidates: {e}")
         return []
 
 
+def get_candidate_cv_text(candidate_id: str) -> str:
+    """Load and decompress the CV text of a single candidate."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT cv_text FROM candidates WHERE candidate_id = ?", (candidate_id,))
+            row = cursor.fetchone()
+            return decompress_text(row[0]) if row else ""
+    except Exception as e:
+        logger.error(f"Error retrieving CV text for {candidate_id}: {e}")
+        return ""
+
+
 def get_all_job_descriptions() -> List[Dict]:
-    """Retrieve all job descriptions."""
+    """Retrieve all job descriptions (without description text; see get_job_description_text)."""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM job_descriptions ORDER BY upload_date DESC")
+            cursor.execute("""
+                SELECT id, jd_id, title, filename, upload_date, status
+                FROM job_descriptions ORDER BY upload_date DESC
+            """)
             return [dict(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.error(f"Error retrieving JDs: {e}")
         return []
 
 
+def get_job_description_text(jd_id: str) -> str:
+    """Load and decompress the description of a single job description."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT description FROM job_descriptions WHERE jd_id = ?", (jd_id,))
+            row = cursor.fetchone()
+            return decompress_text(row[0]) if row else ""
+    except Exception as e:
+        logger.error(f"Error retrieving JD text for {jd_id}: {e}")
+        return ""
+
+
 def get_rankings_by_jd(jd_id: str) -> List[Dict]:
     """Get all rankings for a specific job description."""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT r.*, c.filename, c.cv_text
+                SELECT r.*, c.filename
                 FROM rankings r
                 JOIN candidates c ON r.candidate_id = c.candidate_id
                 WHERE r.jd_id = ?
@@ -326,18 +405,207 @@ def get_rankings_by_jd(jd_id: str) -> List[Dict]:
         return []
 
 
+def get_score_matrix(jd_ids: List[str]):
+    """Build the candidate x JD match-score matrix from stored rankings.
+
+    Returns (candidate_ids, jd_ids, scores, ranked) where `ranked` marks the
+    pairs that actually have a ranking. Re-ranked pairs keep their best score.
+    """
+    import numpy as np
+
+    if not jd_ids:
+        return [], [], np.zeros((0, 0)), np.zeros((0, 0), dtype=bool)
+
+    placeholders = ",".join("?" for _ in jd_ids)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT candidate_id, jd_id, MAX(match_score)
+            FROM rankings
+            WHERE jd_id IN ({placeholders})
+            GROUP BY candidate_id, jd_id
+        """, jd_ids)
+        rows = cursor.fetchall()
+
+    candidate_ids = sorted({row[0] for row in rows})
+    candidate_index = {cid: i for i, cid in enumerate(candidate_ids)}
+    jd_index = {jid: j for j, jid in enumerate(jd_ids)}
+
+    rows_idx = np.fromiter((candidate_index[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+    cols_idx = np.fromiter((jd_index[row[1]] for row in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((row[2] or 0 for row in rows), dtype=np.float64, count=len(rows))
+
+    scores = np.zeros((len(candidate_ids), len(jd_ids)))
+    ranked = np.zeros((len(candidate_ids), len(jd_ids)), dtype=bool)
+    scores[rows_idx, cols_idx] = values
+    ranked[rows_idx, cols_idx] = True
+    return candidate_ids, list(jd_ids), scores, ranked
+
+
+def assign_candidates_to_roles(jd_ids: List[str], headcounts: Dict[str, int],
+                               min_score: float = 0) -> List[Dict]:
+    """Assign each candidate to at most one role, maximizing total match score.
+
+    Each JD column is repeated `headcount` times so the Hungarian algorithm
+    (scipy's linear_sum_assignment) fills every opening with a distinct candidate.
+    Pairs without a ranking or below `min_score` are never assigned.
+    """
+    import numpy as np
+    from scipy.optimize import linear_sum_assignment
+
+    candidate_ids, jd_ids, scores, ranked = get_score_matrix(jd_ids)
+    if not candidate_ids:
+        return []
+
+    slots = [min(len(candidate_ids), max(0, int(headcounts.get(j, 1)))) for j in jd_ids]
+    slot_jds = np.repeat(np.arange(len(jd_ids)), slots)
+    if slot_jds.size == 0:
+        return []
+
+    eligible = ranked & (scores >= min_score)
+    slot_scores = np.where(eligible, scores, 0.0)[:, slot_jds]
+
+    rows, cols = linear_sum_assignment(slot_scores, maximize=True)
+
+    assignments = []
+    for row, col in zip(rows, cols):
+        jd_col = slot_jds[col]
+        if not eligible[row, jd_col]:
+            continue
+        assignments.append({
+            'candidate_id': candidate_ids[row],
+            'jd_id': jd_ids[jd_col],
+            'match_score': float(scores[row, jd_col])
+        })
+
+    assignments.sort(key=lambda a: (a['jd_id'], -a['match_score']))
+    logger.info(f"Assigned {len(assignments)} candidates across {len(jd_ids)} roles")
+    return assignments
+
+
 # ==================== AI PROCESSING ====================
 
+_replay_client = None
+
+
 def get_genai_client():
-    """Initialize Google GenAI client."""
+    """Initialize Google GenAI client (live, recording or replay depending on GENAI_MODE)."""
+    global _replay_client
+    if GENAI_MODE == "replay":
+        from genai_replay import ReplayClient
+        if _replay_client is None:
+            _replay_client = ReplayClient.from_env()
+        return _replay_client
+
     api_key = os.environ.get("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError("GOOGLE_API_KEY not found in environment variables")
-    return genai.Client(api_key=api_key)
+    client = genai.Client(api_key=api_key)
+
+    if GENAI_MODE == "record":
+        from genai_replay import RecordingClient
+        return RecordingClient(client, GENAI_FIXTURES_DIR)
+    return client
 
 
-def analyze_candidate(cv_text: str, job_description: str) -> Dict:
-    """Analyze candidate CV against job description using AI."""
+def quick_score_candidate(cv_text: str, job_description: str) -> Optional[float]:
+    """Cheap first-pass score (0-100) using the lightweight cascade model."""
+    try:
+        client = get_genai_client()
+
+        prompt = f"""Rate how well this CV matches the job description on a scale of 0-100.
+
+CV:
+{cv_text}
+
+Job Description:
+{job_description}
+
+Respond with only the number."""
+
+        response = client.models.generate_content(
+            model=CASCADE_MODEL,
+            contents=prompt,
+            config={
+                "temperature": 0.0,
+                "max_output_tokens": 10
+            }
+        )
+
+        response_text = getattr(response, "text", str(response))
+        match = re.search(r"\d+(\.\d+)?", response_text)
+        if match:
+            return max(0.0, min(100.0, float(match.group())))
+        logger.warning("Failed to parse first-pass score")
+        return None
+
+    except Exception as e:
+        logger.error(f"First-pass scoring error: {e}")
+        return None
+
+
+def new_cascade_stats() -> Dict[str, Any]:
+    """Empty per-stage counters for a cascade ranking run."""
+    return {
+        "first_pass": 0,
+        "full_analysis": 0,
+        "screened_out": 0,
+        "first_pass_seconds": 0.0,
+        "full_analysis_seconds": 0.0
+    }
+
+
+def estimate_latency_saved(stats: Dict[str, Any]) -> float:
+    """Net seconds saved by the cascade: the full analyses skipped for screened-out
+    candidates minus the first pass run on every candidate (negative if it cost time)."""
+    if not stats["full_analysis"]:
+        return 0.0
+    avg_full = stats["full_analysis_seconds"] / stats["full_analysis"]
+    return stats["screened_out"] * avg_full - stats["first_pass_seconds"]
+
+
+def analyze_candidate(cv_text: str, job_description: str, cascade: Optional[Dict] = None,
+                      stats: Optional[Dict] = None) -> Dict:
+    """Analyze candidate CV against job description using AI.
+
+    With `cascade` set ({"band": (low, high), "threshold": score}), a cheap
+    first-pass score runs first and the full analysis only runs for candidates
+    whose score falls in the band or reaches the shortlist threshold.
+    """
+    if cascade:
+        started = time.perf_counter()
+        quick_score = quick_score_candidate(cv_text, job_description)
+        if stats is not None:
+            stats["first_pass"] += 1
+            stats["first_pass_seconds"] += time.perf_counter() - started
+
+        low, high = cascade.get("band", CASCADE_BAND)
+        threshold = cascade.get("threshold", 70)
+        if quick_score is not None and not (low <= quick_score <= high or quick_score >= threshold):
+            if stats is not None:
+                stats["screened_out"] += 1
+            logger.info(f"Candidate screened out by first pass with score: {quick_score}")
+            return {
+                "matchScore": quick_score,
+                "skillsMatched": [],
+                "skillsGap": [],
+                "recommendation": "Not Recommended",
+                "summary": "Screened out by first-pass scoring.",
+                "cascadeStage": "first_pass"
+            }
+
+    started = time.perf_counter()
+    result = _run_full_analysis(cv_text, job_description)
+    if stats is not None:
+        stats["full_analysis"] += 1
+        stats["full_analysis_seconds"] += time.perf_counter() - started
+    if cascade:
+        result["cascadeStage"] = "full_analysis"
+    return result
+
+
+def _run_full_analysis(cv_text: str, job_description: str) -> Dict:
+    """Full CV analysis with the main model."""
     try:
         client = get_genai_client()
         
@@ -494,7 +762,7 @@ def main():
         page = st.radio(
             "",
             ["📊 Dashboard", "📤 Upload CVs", "💼 Upload Job Descriptions", 
-             "🔍 Batch Ranking", "✅ Shortlisting", "⚙️ Settings"],
+             "🔍 Batch Ranking", "✅ Shortlisting", "🧩 Multi-Role Assignment", "⚙️ Settings"],
             label_visibility="collapsed"
         )
         
@@ -513,6 +781,8 @@ def main():
         render_batch_ranking_page()
     elif page == "✅ Shortlisting":
         render_shortlisting_page()
+    elif page == "🧩 Multi-Role Assignment":
+        render_assignment_page()
     elif page == "⚙️ Settings":
         render_settings_page()
 
@@ -735,9 +1005,10 @@ def render_batch_ranking_page():
     
     if selected_jd_key:
         selected_jd = jd_options[selected_jd_key]
+        jd_text = get_job_description_text(selected_jd['jd_id'])
         
         with st.expander("📄 View Job Description"):
-            st.text_area("", value=selected_jd['description'], height=200, disabled=True)
+            st.text_area("", value=jd_text, height=200, disabled=True)
         
         st.markdown("---")
         st.subheader("2️⃣ Select Candidates to Rank")
@@ -760,19 +1031,36 @@ def render_batch_ranking_page():
         st.markdown("---")
         st.subheader("3️⃣ Run Ranking")
         
+        use_cascade = st.checkbox(
+            "⚡ Cascade mode",
+            value=False,
+            help="Score every candidate with a lightweight model first; run the full analysis only for borderline and likely-shortlisted candidates"
+        )
+        cascade = None
+        if use_cascade:
+            col1, col2 = st.columns(2)
+            with col1:
+                band = st.slider("Borderline band (first-pass score)", 0, 100, CASCADE_BAND, 5)
+            with col2:
+                threshold = st.slider("Shortlist threshold", 0, 100, 70, 5)
+            cascade = {"band": band, "threshold": threshold}
+        
         if st.button("🚀 Start Batch Ranking", type="primary", disabled=len(selected_candidates) == 0):
             progress_bar = st.progress(0)
             status_text = st.empty()
             
             ranking_results = []
+            cascade_stats = new_cascade_stats()
             
             for idx, candidate in enumerate(selected_candidates):
                 status_text.text(f"Analyzing {candidate['filename']}...")
                 
                 # Analyze candidate
                 analysis = analyze_candidate(
-                    candidate['cv_text'],
-                    selected_jd['description']
+                    get_candidate_cv_text(candidate['candidate_id']),
+                    jd_text,
+                    cascade=cascade,
+                    stats=cascade_stats
                 )
                 
                 # Save ranking
@@ -794,6 +1082,24 @@ def render_batch_ranking_page():
             
             status_text.text("✅ Ranking complete!")
             
+            if cascade:
+                saved = estimate_latency_saved(cascade_stats)
+                logger.info(
+                    f"Cascade ranking: {cascade_stats['first_pass']} first-pass, "
+                    f"{cascade_stats['full_analysis']} full analyses, "
+                    f"{cascade_stats['screened_out']} screened out, ~{saved:.1f}s saved (net of first pass)"
+                )
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("First-pass Scored", cascade_stats['first_pass'])
+                with col2:
+                    st.metric("Full Analyses", cascade_stats['full_analysis'])
+                with col3:
+                    st.metric("Screened Out", cascade_stats['screened_out'])
+                with col4:
+                    st.metric("Net Latency Saved", f"~{saved:.1f}s",
+                              help="Skipped full analyses minus the time spent on first-pass scoring")
+            
             # Sort by score
             ranking_results.sort(key=lambda x: x['match_score'], reverse=True)
             
@@ -949,6 +1255,67 @@ def render_shortlisting_page():
 
 
 
+def render_assignment_page():
+    """Render multi-role assignment page."""
+    st.header("🧩 Multi-Role Assignment")
+    
+    st.markdown("""
+        <div class="info-box">
+            📋 <strong>How it works:</strong> Candidates ranked against several job descriptions are
+            assigned to at most one role each, maximizing the total match score across all openings.
+        </div>
+    """, unsafe_allow_html=True)
+    
+    jds = get_all_job_descriptions()
+    if not jds:
+        st.warning("⚠️ No job descriptions available. Please create a JD first.")
+        return
+    
+    jd_options = {f"{jd['jd_id']} - {jd['title']}": jd['jd_id'] for jd in jds}
+    selected_keys = st.multiselect("Select Job Descriptions", options=list(jd_options.keys()))
+    
+    if not selected_keys:
+        st.info("ℹ️ Select the roles you are hiring for.")
+        return
+    
+    st.subheader("👥 Headcount per Role")
+    headcounts = {}
+    cols = st.columns(min(4, len(selected_keys)))
+    for idx, key in enumerate(selected_keys):
+        with cols[idx % len(cols)]:
+            headcounts[jd_options[key]] = st.number_input(key, min_value=0, value=1, step=1, key=f"hc_{jd_options[key]}")
+    
+    min_score = st.slider("Minimum Match Score (%)", 0, 100, 50, 5)
+    
+    if st.button("🚀 Compute Optimal Assignment", type="primary"):
+        with st.spinner("Solving assignment..."):
+            start = time.perf_counter()
+            assignments = assign_candidates_to_roles([jd_options[k] for k in selected_keys], headcounts, min_score)
+            elapsed = time.perf_counter() - start
+        
+        if not assignments:
+            st.warning("No candidates could be assigned. Run batch ranking for these roles first.")
+            return
+        
+        titles = {jd['jd_id']: jd['title'] for jd in jds}
+        df = pd.DataFrame([{**a, 'title': titles.get(a['jd_id'], '')} for a in assignments])
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Candidates Assigned", len(assignments))
+        with col2:
+            st.metric("Openings", sum(headcounts.values()))
+        with col3:
+            st.metric("Total Match", f"{df['match_score'].sum():.0f}")
+        
+        st.dataframe(
+            df[['jd_id', 'title', 'candidate_id', 'match_score']].style.background_gradient(
+                subset=['match_score'], cmap='RdYlGn', vmin=0, vmax=100),
+            use_container_width=True
+        )
+        st.caption(f"Solved in {elapsed:.2f}s")
+
+
 # ==================== UI COMPONENTS ====================
 
 def render_settings_page():
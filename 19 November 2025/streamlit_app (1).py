@@ -11,31 +11,30 @@ RecruitIQ - AI Talent Intelligence Platform
 
 import streamlit as st
 import json
+import re
+import asyncio
+import threading
+import time
+import hashlib
 from datetime import datetime
 from dotenv import load_dotenv
 import os
 import sqlite3
 from contextlib import contextmanager
-import plotly.graph_objects as go
-import plotly.express as px
-from typing import Dict, List, Any, TypedDict
-import pandas as pd
+from typing import Dict, List, Any, Optional, TypedDict, Annotated
 import logging
 from logging.handlers import RotatingFileHandler
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 load_dotenv()
 
-# Import Google GenAI SDK
-from google import genai
-
-# LangGraph imports
-from langgraph.graph import StateGraph, END
+# Heavy modules (plotly, pandas, google.genai, langgraph, smtplib) are imported
+# lazily by the functions and pages that use them, to keep cold start fast.
 
 # ==================== LOGGING SETUP ====================
 
+LOG_FILE = 'app.log'
+LOG_BACKUP_COUNT = 3
+
 # Create logger
 logger = logging.getLogger('RecruitIQ')
 logger.setLevel(logging.INFO)
@@ -48,7 +47,7 @@ if not logger.hasHandlers():
     )
 
     # File handler (rotating, max 5MB, 3 backups)
-    file_handler = RotatingFileHandler('app.log', maxBytes=5 * 1024 * 1024, backupCount=3)
+    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=LOG_BACKUP_COUNT)
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
 
@@ -66,46 +65,88 @@ logger.info("🔄 RecruitIQ Application initialized")
 DATABASE_PATH = os.getenv("DATABASE_PATH", "applications.db")
 logger.info(f"Database path: {DATABASE_PATH}")
 
+# LangGraph checkpoint configuration
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "recruitment_checkpoints.db")
+NODE_MAX_RETRIES = int(os.getenv("NODE_MAX_RETRIES", "2"))
+
+# Gemini configuration
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")  # e.g. a local stub endpoint for benchmarks
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "2"))
+
 # Email configuration
 SENDER_EMAIL = os.getenv("SENDER_EMAIL", "")
 SENDER_PASSWORD = os.getenv("SENDER_PASSWORD", "")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_ALLOW_ANONYMOUS = os.getenv("SMTP_ALLOW_ANONYMOUS", "false").lower() == "true"  # local test servers
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "3"))
+OUTBOX_CLAIM_TIMEOUT_MINUTES = int(os.getenv("OUTBOX_CLAIM_TIMEOUT_MINUTES", "10"))
+
+# Candidate picker page size
+APPLICATION_PAGE_SIZE = int(os.getenv("APPLICATION_PAGE_SIZE", "25"))
+
+# Interview question bank configuration
+QUESTION_EMBEDDING_MODEL = os.getenv("QUESTION_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+QUESTION_DEDUPE_THRESHOLD = float(os.getenv("QUESTION_DEDUPE_THRESHOLD", "0.9"))
 
 
 # ==================== EMAIL FUNCTIONS ====================
 
-def send_email(recipient_email: str, subject: str, body: str, is_html: bool = True) -> bool:
-    """Send email using SMTP with masked sender name."""
-    logger.info(f"Attempting to send email to: {recipient_email}")
+def email_configured() -> bool:
+    return bool(SENDER_EMAIL and SENDER_PASSWORD) or SMTP_ALLOW_ANONYMOUS
 
-    if not SENDER_EMAIL or not SENDER_PASSWORD:
-        logger.error("Email credentials not configured")
-        st.error("⚠️ Email credentials not configured in .env file")
-        return False
 
-    try:
-        # Create email message
-        msg = MIMEMultipart('alternative')
+def build_email_message(recipient_email: str, subject: str, body: str, is_html: bool = True):
+    """Build an email message with masked sender name."""
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
 
-        # 🔥 MASKED SENDER (This is what the candidate will see)
-        msg['From'] = "RecruitIQ <RecruitIQ@hr.com>"
+    msg = MIMEMultipart('alternative')
 
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
+    # 🔥 MASKED SENDER (This is what the candidate will see)
+    msg['From'] = "RecruitIQ <RecruitIQ@hr.com>"
+
+    msg['To'] = recipient_email
+    msg['Subject'] = subject
+
+    # Attach body
+    if is_html:
+        msg.attach(MIMEText(body, 'html'))
+    else:
+        msg.attach(MIMEText(body, 'plain'))
+    return msg
 
-        # Attach body
-        if is_html:
-            msg.attach(MIMEText(body, 'html'))
-        else:
-            msg.attach(MIMEText(body, 'plain'))
 
-        # Gmail SMTP server connection
-        server = smtplib.SMTP('smtp.gmail.com', 587)
+def open_smtp_connection():
+    """Connect (and authenticate) to the SMTP server; reuse the connection for a whole batch."""
+    import smtplib
+
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+    if SMTP_USE_TLS:
         server.starttls()
 
-        # 🔐 Login with REAL credentials (from .env)
+    # 🔐 Login with REAL credentials (from .env)
+    if SENDER_EMAIL and SENDER_PASSWORD:
         server.login(SENDER_EMAIL, SENDER_PASSWORD)
+    return server
+
+
+def send_email(recipient_email: str, subject: str, body: str, is_html: bool = True) -> bool:
+    """Send a single email using SMTP with masked sender name."""
+    logger.info(f"Attempting to send email to: {recipient_email}")
+
+    if not email_configured():
+        logger.error("Email credentials not configured")
+        st.error("⚠️ Email credentials not configured in .env file")
+        return False
+
+    try:
+        msg = build_email_message(recipient_email, subject, body, is_html)
 
-        # Send the message
+        server = open_smtp_connection()
         server.send_message(msg)
         server.quit()
 
@@ -118,8 +159,8 @@ def send_email(recipient_email: str, subject: str, body: str, is_html: bool = Tr
         return False
 
 
-def send_shortlist_email(candidate_name: str, candidate_email: str, position: str, interview_date: str = None):
-    """Send shortlist notification email"""
+def build_shortlist_email(position: str, interview_date: str = None):
+    """Subject and HTML body of the shortlist notification email"""
     subject = "Congratulations"
 
     body = f"""
@@ -168,10 +209,17 @@ def send_shortlist_email(candidate_name: str, candidate_email: str, position: st
     </html>
     """
 
+    return subject, body
+
+
+def send_shortlist_email(candidate_name: str, candidate_email: str, position: str, interview_date: str = None):
+    """Send shortlist notification email"""
+    subject, body = build_shortlist_email(position, interview_date)
     return send_email(candidate_email, subject, body)
 
-def send_rejection_email(candidate_name: str, candidate_email: str, position: str):
-    """Send rejection notification email"""
+
+def build_rejection_email(position: str):
+    """Subject and HTML body of the rejection notification email"""
     subject = "Regretted"
 
     body = f"""
@@ -213,8 +261,332 @@ def send_rejection_email(candidate_name: str, candidate_email: str, position: st
     </html>
     """
 
+    return subject, body
+
+
+def send_rejection_email(candidate_name: str, candidate_email: str, position: str):
+    """Send rejection notification email"""
+    subject, body = build_rejection_email(position)
     return send_email(candidate_email, subject, body)
 
+
+# ==================== EMAIL OUTBOX ====================
+
+@st.cache_resource
+def init_email_outbox():
+    """Create the persistent email outbox table once per process."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                application_id TEXT,
+                recipient TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                kind TEXT,
+                status TEXT DEFAULT 'queued',
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                claimed_at TIMESTAMP,
+                sent_at TIMESTAMP
+            )
+        """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(email_outbox)").fetchall()}
+        if 'claimed_at' not in columns:
+            conn.execute("ALTER TABLE email_outbox ADD COLUMN claimed_at TIMESTAMP")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_status ON email_outbox (status, id)")
+        conn.commit()
+    logger.info("Email outbox table ready")
+    return True
+
+
+def enqueue_email(recipient_email: str, subject: str, body: str, kind: str, application_id: str = None) -> int:
+    """Add a message to the outbox; it is delivered by drain_outbox()."""
+    init_email_outbox()
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            INSERT INTO email_outbox (application_id, recipient, subject, body, kind)
+            VALUES (?, ?, ?, ?, ?)
+        """, (application_id, recipient_email, subject, body, kind))
+        conn.commit()
+        logger.info(f"Queued {kind} email to: {recipient_email}")
+        return cursor.lastrowid
+
+
+def get_outbox_counts() -> Dict[str, int]:
+    init_email_outbox()
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status").fetchall()
+    counts = {'queued': 0, 'sending': 0, 'sent': 0, 'failed': 0}
+    counts.update({row[0]: row[1] for row in rows})
+    return counts
+
+
+def retry_failed_emails() -> int:
+    """Put failed messages back in the queue with a fresh attempt budget."""
+    init_email_outbox()
+    with get_db_connection() as conn:
+        cursor = conn.execute("UPDATE email_outbox SET status = 'queued', attempts = 0 WHERE status = 'failed'")
+        conn.commit()
+        return cursor.rowcount
+
+
+def _claim_outbox_message(message_id: int) -> bool:
+    """Atomically move a queued message to 'sending'; False if another drain already took it."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            UPDATE email_outbox SET status = 'sending', claimed_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'queued'
+        """, (message_id,))
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def _record_outbox_result(message_id: int, error: Optional[str]):
+    with get_db_connection() as conn:
+        if error is None:
+            conn.execute("""
+                UPDATE email_outbox SET status = 'sent', attempts = attempts + 1,
+                       last_error = NULL, sent_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'sending'
+            """, (message_id,))
+        else:
+            conn.execute("""
+                UPDATE email_outbox SET attempts = attempts + 1, last_error = ?,
+                       status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END
+                WHERE id = ? AND status = 'sending'
+            """, (error, OUTBOX_MAX_ATTEMPTS, message_id))
+        conn.commit()
+
+
+def drain_outbox(batch_size: int = OUTBOX_BATCH_SIZE, progress=None) -> Dict[str, int]:
+    """Deliver queued messages, reusing one authenticated SMTP connection per batch.
+
+    Each message is claimed ('sending') with a conditional UPDATE before it is
+    sent and its outcome is written right after, so concurrent drains never send
+    the same message and a crash can repeat at most the message in flight.
+    Claims older than OUTBOX_CLAIM_TIMEOUT_MINUTES (a drain that died) are
+    re-queued. `progress(done, total)` is called after every message. A message
+    that keeps failing is marked 'failed' after OUTBOX_MAX_ATTEMPTS attempts.
+    """
+    init_email_outbox()
+    with get_db_connection() as conn:
+        stale = conn.execute("""
+            UPDATE email_outbox SET status = 'queued'
+            WHERE status = 'sending' AND claimed_at < datetime('now', ?)
+        """, (f"-{OUTBOX_CLAIM_TIMEOUT_MINUTES} minutes",)).rowcount
+        conn.commit()
+    if stale:
+        logger.warning(f"Re-queued {stale} outbox message(s) left in 'sending' by an interrupted drain")
+
+    total = get_outbox_counts()['queued']
+    result = {'sent': 0, 'failed': 0, 'retrying': 0}
+    if not total:
+        return result
+
+    import smtplib
+
+    logger.info(f"Draining email outbox: {total} queued message(s)")
+    done = 0
+    last_id = 0
+    while True:
+        with get_db_connection() as conn:
+            batch = [dict(row) for row in conn.execute("""
+                SELECT id, recipient, subject, body FROM email_outbox
+                WHERE status = 'queued' AND id > ? ORDER BY id LIMIT ?
+            """, (last_id, batch_size)).fetchall()]
+        if not batch:
+            break
+        last_id = batch[-1]['id']
+
+        server = None
+        try:
+            server = open_smtp_connection()
+        except Exception as e:
+            logger.error(f"SMTP connection failed: {str(e)}", exc_info=True)
+
+        for message in batch:
+            done += 1
+            if not _claim_outbox_message(message['id']):
+                logger.info(f"Outbox email {message['id']} already claimed by another drain")
+                continue
+            try:
+                if server is None:
+                    raise smtplib.SMTPServerDisconnected("No SMTP connection")
+                try:
+                    server.send_message(build_email_message(message['recipient'], message['subject'], message['body']))
+                except smtplib.SMTPServerDisconnected:
+                    # Server dropped the connection mid-batch: reconnect once and retry this message
+                    server = open_smtp_connection()
+                    server.send_message(build_email_message(message['recipient'], message['subject'], message['body']))
+                _record_outbox_result(message['id'], None)
+                result['sent'] += 1
+            except Exception as e:
+                logger.error(f"Error sending outbox email {message['id']} to {message['recipient']}: {str(e)}")
+                _record_outbox_result(message['id'], str(e))
+            if progress:
+                progress(min(done, total), total)
+
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+    with get_db_connection() as conn:
+        result['failed'] = conn.execute("SELECT COUNT(*) FROM email_outbox WHERE status = 'failed'").fetchone()[0]
+        result['retrying'] = conn.execute("SELECT COUNT(*) FROM email_outbox WHERE status = 'queued'").fetchone()[0]
+    logger.info(f"Email outbox drained: {result['sent']} sent, {result['retrying']} to retry, {result['failed']} failed")
+    return result
+
+# ==================== LOG READER ====================
+
+LOG_LINE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (\w+) - ")
+LOG_INDEX_STRIDE = 64 * 1024  # bytes between index checkpoints
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+
+def tail_log(path: str = LOG_FILE, n: int = 200, block_size: int = 64 * 1024) -> List[str]:
+    """Return the last `n` lines of a log file, reading backwards from the end."""
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= n:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-n:]
+
+
+def _rotated_log_files(path: str = LOG_FILE) -> List[str]:
+    """Existing log files, oldest first (app.log.3 ... app.log.1, app.log)."""
+    files = [f"{path}.{i}" for i in range(LOG_BACKUP_COUNT, 0, -1)] + [path]
+    return [f for f in files if os.path.exists(f)]
+
+
+def _log_fingerprint(path: str) -> str:
+    """Identify a log file by its first bytes, so the index survives rotation renames."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(256)).hexdigest()
+
+
+def _iter_log_records(f, end_offset: Optional[int] = None):
+    """Yield (offset, timestamp, level, text) per record; traceback lines stay with their record."""
+    record_offset, timestamp, level, lines = None, None, None, []
+    while end_offset is None or f.tell() < end_offset:
+        offset = f.tell()
+        raw = f.readline()
+        if not raw or not raw.endswith(b"\n"):
+            break
+        line = raw.decode('utf-8', errors='replace').rstrip("\n")
+        match = LOG_LINE_PATTERN.match(line)
+        if match:
+            if lines:
+                yield record_offset, timestamp, level, "\n".join(lines)
+            record_offset, timestamp, level, lines = offset, match.group(1), match.group(2), [line]
+        elif lines:
+            lines.append(line)
+    if lines:
+        yield record_offset, timestamp, level, "\n".join(lines)
+
+
+def update_log_index(path: str = LOG_FILE) -> Dict[str, Any]:
+    """Incrementally extend the sidecar offset index for the current and rotated logs.
+
+    Each file entry keeps the byte offset indexed so far plus (timestamp, offset)
+    checkpoints every LOG_INDEX_STRIDE bytes, so only newly appended bytes are scanned.
+    """
+    index_path = f"{path}.idx"
+    try:
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        index = {}
+
+    files = {}
+    for log_path in _rotated_log_files(path):
+        fingerprint = _log_fingerprint(log_path)
+        entry = index.get(fingerprint, {"indexed_to": 0, "first_ts": None, "last_ts": None, "checkpoints": []})
+        size = os.path.getsize(log_path)
+        if size < entry["indexed_to"]:
+            entry = {"indexed_to": 0, "first_ts": None, "last_ts": None, "checkpoints": []}
+
+        if size > entry["indexed_to"]:
+            with open(log_path, 'rb') as f:
+                f.seek(entry["indexed_to"])
+                next_checkpoint = entry["checkpoints"][-1][1] + LOG_INDEX_STRIDE if entry["checkpoints"] else 0
+                for offset, timestamp, _, _ in _iter_log_records(f):
+                    entry["first_ts"] = entry["first_ts"] or timestamp
+                    entry["last_ts"] = timestamp
+                    if offset >= next_checkpoint:
+                        entry["checkpoints"].append([timestamp, offset])
+                        next_checkpoint = offset + LOG_INDEX_STRIDE
+            # Only complete lines are indexed; a partial last line is picked up next time
+            entry["indexed_to"] = _last_newline_offset(log_path, size)
+        files[fingerprint] = {**entry, "path": log_path}
+
+    with open(index_path, 'w') as f:
+        json.dump(files, f)
+    return files
+
+
+def _last_newline_offset(path: str, size: int) -> int:
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - LOG_INDEX_STRIDE))
+        chunk = f.read()
+    return size - len(chunk) + chunk.rfind(b"\n") + 1
+
+
+def search_logs(levels: Optional[List[str]] = None, start: Optional[str] = None, end: Optional[str] = None,
+                text: str = "", limit: int = 500, path: str = LOG_FILE) -> List[Dict[str, str]]:
+    """Search the current and rotated logs by level, time range ("YYYY-MM-DD HH:MM:SS") and substring.
+
+    Files outside the time range are skipped using the index, and within a file
+    the scan starts at the last checkpoint before `start`. Newest records first.
+    """
+    import bisect
+
+    index = update_log_index(path)
+    needle = text.lower()
+    results = []
+
+    for entry in sorted(index.values(), key=lambda e: e["first_ts"] or "", reverse=True):
+        if not entry["first_ts"]:
+            continue
+        if (start and entry["last_ts"] < start) or (end and entry["first_ts"] > end):
+            continue
+
+        timestamps = [cp[0] for cp in entry["checkpoints"]]
+        position = bisect.bisect_left(timestamps, start) - 1 if start else 0
+        offset = entry["checkpoints"][max(0, position)][1] if entry["checkpoints"] else 0
+
+        matches = []
+        with open(entry["path"], 'rb') as f:
+            f.seek(offset)
+            for _, timestamp, level, record in _iter_log_records(f, end_offset=entry["indexed_to"]):
+                if start and timestamp < start:
+                    continue
+                if end and timestamp > end:
+                    break
+                if levels and level not in levels:
+                    continue
+                if needle and needle not in record.lower():
+                    continue
+                matches.append({"timestamp": timestamp, "level": level, "record": record, "file": entry["path"]})
+
+        results.extend(reversed(matches))
+        if len(results) >= limit:
+            break
+
+    return results[:limit]
+
+
 # ==================== DATABASE FUNCTIONS ====================
 
 @contextmanager
@@ -234,23 +606,59 @@ def get_db_connection():
         logger.debug("Database connection closed")
 
 
-def get_all_applications():
-    """Retrieve all applications from database."""
-    logger.info("Fetching all applications from database")
+@st.cache_resource
+def init_application_indexes():
+    """Index used by the paginated candidate picker (newest first).
+
+    Raises while the applications table does not exist yet, so nothing is cached
+    until the index has actually been created.
+    """
+    with get_db_connection() as conn:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_submitted_at ON applications (submitted_at DESC)")
+        conn.commit()
+    logger.info("Application indexes ready")
+    return True
+
+
+def _application_filter(query: str):
+    """WHERE clause for a substring search on application ID or CV file name."""
+    if not query:
+        return "", ()
+    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return "WHERE application_id LIKE ? ESCAPE '\\' OR cv_filename LIKE ? ESCAPE '\\'", (pattern, pattern)
+
+
+def search_applications(query: str = "", limit: Optional[int] = APPLICATION_PAGE_SIZE, offset: int = 0):
+    """One page of applications (id, file name, submission time only), newest first."""
+    try:
+        init_application_indexes()
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not create application indexes yet: {e}")
+    where, params = _application_filter(query.strip())
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM applications ORDER BY submitted_at DESC")
-            rows = cursor.fetchall()
-            applications = [dict(row) for row in rows]
-            logger.info(f"Retrieved {len(applications)} applications")
-            return applications
+            rows = conn.execute(f"""
+                SELECT application_id, cv_filename, submitted_at FROM applications {where}
+                ORDER BY submitted_at DESC LIMIT ? OFFSET ?
+            """, params + (limit if limit is not None else -1, offset)).fetchall()
+        return [dict(row) for row in rows]
     except Exception as e:
-        logger.error(f"Error retrieving applications: {e}", exc_info=True)
+        logger.error(f"Error searching applications: {e}", exc_info=True)
         st.error(f"Error retrieving applications: {e}")
         return []
 
 
+def count_applications(query: str = "") -> int:
+    """Number of applications matching a search (all applications by default)."""
+    where, params = _application_filter(query.strip())
+    try:
+        with get_db_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM applications {where}", params).fetchone()[0]
+    except Exception as e:
+        logger.error(f"Error counting applications: {e}", exc_info=True)
+        return 0
+
+
 def get_application(application_id: str):
     """Retrieve an application by ID."""
     logger.info(f"Fetching application with ID: {application_id}")
@@ -270,8 +678,98 @@ def get_application(application_id: str):
         return None
 
 
+# ==================== STORED ANALYSES ====================
+
+@st.cache_resource
+def init_analyses_table():
+    """Create the CV analyses table once per process."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                application_id TEXT NOT NULL,
+                jd_hash TEXT NOT NULL,
+                job_description TEXT NOT NULL,
+                match_score REAL,
+                recommendation TEXT,
+                result TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (application_id, jd_hash)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_updated_at ON analyses (updated_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_jd_score ON analyses (jd_hash, match_score)")
+        conn.commit()
+    logger.info("Analyses table ready")
+    return True
+
+
+def save_analysis(application_id: str, job_description: str, result: Dict[str, Any]):
+    """Store (or replace) the CV analysis of an application against a job description."""
+    init_analyses_table()
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO analyses (application_id, jd_hash, job_description, match_score, recommendation, result)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (application_id, jd_hash) DO UPDATE SET
+                match_score = excluded.match_score,
+                recommendation = excluded.recommendation,
+                result = excluded.result,
+                updated_at = CURRENT_TIMESTAMP
+        """, (application_id, jd_hash(job_description), job_description, result.get('matchScore'),
+              result.get('recommendation'), json.dumps(result)))
+        conn.commit()
+    logger.info(f"Stored analysis for {application_id} (score {result.get('matchScore')})")
+
+
+def get_analysis(application_id: str, job_description: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Stored analysis for an application and JD, or its most recent one when no JD is given.
+
+    Returns {'result': ..., 'job_description': ...} or None.
+    """
+    init_analyses_table()
+    with get_db_connection() as conn:
+        if job_description:
+            row = conn.execute("SELECT result, job_description FROM analyses WHERE application_id = ? AND jd_hash = ?",
+                               (application_id, jd_hash(job_description))).fetchone()
+        else:
+            row = conn.execute("""
+                SELECT result, job_description FROM analyses WHERE application_id = ?
+                ORDER BY updated_at DESC LIMIT 1
+            """, (application_id,)).fetchone()
+    if not row:
+        return None
+    return {'result': json.loads(row['result']), 'job_description': row['job_description']}
+
+
+def get_analysis_stats() -> Dict[str, Any]:
+    """Dashboard metrics across every stored analysis."""
+    init_analyses_table()
+    with get_db_connection() as conn:
+        row = conn.execute("""
+            SELECT COUNT(*) AS total,
+                   COUNT(DISTINCT application_id) AS candidates,
+                   AVG(match_score) AS avg_score,
+                   SUM(CASE WHEN updated_at >= date('now') THEN 1 ELSE 0 END) AS today
+            FROM analyses
+        """).fetchone()
+    return {'total': row['total'], 'candidates': row['candidates'],
+            'avg_score': row['avg_score'] or 0, 'today': row['today'] or 0}
+
+
 # ==================== LANGGRAPH STATE ====================
 
+class ErrorReset(list):
+    """Error list that replaces the accumulated errors instead of appending to them."""
+
+
+def merge_errors(left: List[str], right: List[str]) -> List[str]:
+    """Reducer for `errors`: parallel branches append, an ErrorReset replaces."""
+    if isinstance(right, ErrorReset):
+        return list(right)
+    return (left or []) + (right or [])
+
+
 class RecruitmentState(TypedDict):
     """State for the unified recruitment workflow"""
     cv_text: str
@@ -295,19 +793,41 @@ class RecruitmentState(TypedDict):
     recommendation: str
     hiring_brief: Dict[str, Any]
     stage: str
-    errors: List[str]
+    errors: Annotated[List[str], merge_errors]  # "<node>: <message>", appended to by parallel branches
 
 
 # ==================== AI CLIENT ====================
 
+@st.cache_resource
 def get_genai_client():
+    """One Gemini client per process, so its HTTP connections are reused across calls and reruns."""
     logger.debug("Initializing Gemini API client")
     api_key = os.environ.get("GOOGLE_API_KEY")
     if not api_key:
         logger.error("GOOGLE_API_KEY not found in environment variables")
         raise RuntimeError("❌ GOOGLE_API_KEY not found! Set it in your .env file.")
+
+    http_options = {"timeout": int(GEMINI_TIMEOUT_SECONDS * 1000)}
+    if GEMINI_BASE_URL:
+        http_options["base_url"] = GEMINI_BASE_URL
+
+    from google import genai
+
     logger.info("Gemini API client initialized successfully")
-    return genai.Client(api_key=api_key)
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+@st.cache_resource
+def get_async_loop() -> asyncio.AbstractEventLoop:
+    """Long-lived event loop in a background thread for async Gemini calls.
+
+    The async HTTP pool of the shared client is bound to the loop it was first
+    used on, so all async calls go through this one loop instead of asyncio.run().
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="gemini-async-loop", daemon=True).start()
+    logger.info("Async Gemini event loop started")
+    return loop
 
 
 def call_gemini(prompt: str, model: str = "gemini-2.0-flash-exp",
@@ -337,9 +857,479 @@ def call_gemini(prompt: str, model: str = "gemini-2.0-flash-exp",
         return "{}"
 
 
+async def acall_gemini(prompt: str, model: str = "gemini-2.0-flash-exp",
+                       max_output_tokens: int = 2000, temperature: float = 0.7,
+                       timeout: float = GEMINI_TIMEOUT_SECONDS,
+                       retries: int = GEMINI_MAX_RETRIES) -> str:
+    """Async Gemini call with a per-attempt timeout and exponential-backoff retries.
+
+    Raises the last error once retries are exhausted.
+    """
+    client = get_genai_client()
+    for attempt in range(retries + 1):
+        try:
+            resp = await asyncio.wait_for(
+                client.aio.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config={
+                        "max_output_tokens": max_output_tokens,
+                        "temperature": temperature
+                    }
+                ),
+                timeout=timeout
+            )
+            text = getattr(resp, "text", None) or str(resp)
+            logger.info(f"Async Gemini response received - Length: {len(text)} characters")
+            return text
+        except Exception as e:
+            if attempt == retries:
+                logger.error(f"Async Gemini API error after {attempt + 1} attempts: {str(e)}", exc_info=True)
+                raise
+            delay = 2 ** attempt
+            logger.warning(f"Async Gemini attempt {attempt + 1} failed ({str(e)}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+
+def call_gemini_many(prompts: List[str], **kwargs) -> List[str]:
+    """Run several prompts concurrently; failed prompts come back as "{}"."""
+    async def gather():
+        return await asyncio.gather(*(acall_gemini(p, **kwargs) for p in prompts), return_exceptions=True)
+
+    future = asyncio.run_coroutine_threadsafe(gather(), get_async_loop())
+    results = future.result()
+    texts = []
+    for result in results:
+        if isinstance(result, Exception):
+            st.error(f"Gemini API error: {str(result)}")
+            texts.append("{}")
+        else:
+            texts.append(result)
+    return texts
+
+
+def parse_json_response(response_text: str) -> Dict[str, Any]:
+    """Extract the JSON object from a model response; {} if there is none."""
+    start_idx = response_text.find('{')
+    end_idx = response_text.rfind('}') + 1
+    if start_idx != -1 and end_idx > start_idx:
+        return json.loads(response_text[start_idx:end_idx])
+    return {}
+
+
+# (candidate field, team field, subscore name, weight)
+WORK_STYLE_DIMENSIONS = [
+    ('communication_style', 'team_communication', 'async', 0.25),
+    ('work_process', 'team_work_process', 'structure', 0.25),
+    ('checkin_frequency', 'team_checkin_frequency', 'checkin', 0.20),
+    ('work_environment', 'team_work_environment', 'environment', 0.20),
+    ('schedule_structure', 'team_schedule_structure', 'schedule', 0.10),
+]
+
+
+def compute_culture_fit(candidate_profile: Dict[str, int], team_profile: Dict[str, int]):
+    """Deterministic culture fit: 100 minus 20 points per step of difference, weighted."""
+    subscores = {}
+    culture_fit_score = 0.0
+    for candidate_field, team_field, name, weight in WORK_STYLE_DIMENSIONS:
+        diff = abs(candidate_profile.get(candidate_field, 3) - team_profile.get(team_field, 3))
+        subscore = max(0, min(100, 100 - diff * 20))
+        subscores[name] = round(subscore, 1)
+        culture_fit_score += weight * subscore
+    return round(culture_fit_score, 1), subscores
+
+
+def build_team_dynamics_result(candidate_profile: Dict[str, int], team_profile: Dict[str, int],
+                               prediction: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine an LLM team dynamics prediction with the culture fit scores for display."""
+    culture_fit_score, subscores = compute_culture_fit(candidate_profile, team_profile)
+    return {
+        'personality_profile': prediction.get('personality_profile', {}),
+        'team_synergy_score': prediction.get('team_synergy_score', 0),
+        'conflict_risk_areas': prediction.get('conflict_risk_areas', []),
+        'collaboration_strengths': prediction.get('collaboration_strengths', []),
+        'culture_fit_score': culture_fit_score,
+        'subscores': subscores,
+        'candidate_values': [candidate_profile.get(c, 3) for c, _, _, _ in WORK_STYLE_DIMENSIONS],
+        'team_values': [team_profile.get(t, 3) for _, t, _, _ in WORK_STYLE_DIMENSIONS]
+    }
+
+
+def build_cv_analysis_prompt(cv_text: str, job_description: str) -> str:
+    return f"""Analyze this CV against the job description:
+
+CV:
+{cv_text}
+
+Job Description:
+{job_description}
+
+Respond in JSON:
+{{
+  "matchScore": <0-100>,
+  "skillsMatched": [list],
+  "skillsGap": [list],
+  "experienceRelevance": "<text>",
+  "recommendation": "<Strong Fit/Good Fit/Potential Fit/Not a Fit>",
+  "summary": "<2-3 sentences>",
+  "strengths": [list],
+  "concerns": [list]
+}}"""
+
+
+# ==================== CV PARSING NODE ====================
+
+def cv_parsing_node(state: RecruitmentState) -> Dict[str, Any]:
+    """Parse the raw CV into a structured profile used by every downstream node"""
+    logger.info("Starting CV parsing node")
+
+    prompt = f"""Extract a structured profile from this CV:
+
+{state.get('cv_text', '')}
+
+Respond in JSON:
+{{
+  "name": "<candidate name or Unknown>",
+  "currentRole": "<text>",
+  "yearsExperience": <number>,
+  "skills": [list],
+  "education": [list],
+  "experience": [{{"role": "<text>", "company": "<text>", "highlights": [list]}}]
+}}
+
+Valid JSON only."""
+
+    try:
+        result = parse_json_response(call_gemini(prompt, max_output_tokens=2000, temperature=0.2))
+        if result:
+            logger.info(f"CV parsed - {len(result.get('skills', []))} skills found")
+            return {'parsed_cv': result, 'stage': 'cv_parsed'}
+        logger.warning("Failed to parse CV parsing JSON response")
+        return {'parsed_cv': {}, 'stage': 'cv_parsed', 'errors': ["cv_parsing: Failed to parse CV JSON"]}
+    except Exception as e:
+        logger.error(f"CV parsing error: {str(e)}", exc_info=True)
+        return {'parsed_cv': {}, 'stage': 'cv_parsed', 'errors': [f"cv_parsing: {str(e)}"]}
+
+
+# ==================== SKILL MATCHING NODE ====================
+
+def skill_matching_node(state: RecruitmentState) -> Dict[str, Any]:
+    """Match the CV against the job description"""
+    logger.info("Starting skill matching node")
+
+    prompt = build_cv_analysis_prompt(state.get('cv_text', ''), state.get('job_description', ''))
+
+    try:
+        result = parse_json_response(call_gemini(prompt, max_output_tokens=2000, temperature=0.3))
+        if result:
+            logger.info(f"Skill matching successful - Match score: {result.get('matchScore', 0)}")
+            return {
+                'skill_match_score': float(result.get('matchScore', 0)),
+                'skills_matched': result.get('skillsMatched', []),
+                'skills_gap': result.get('skillsGap', []),
+                'strengths': result.get('strengths', []),
+                'concerns': result.get('concerns', []),
+                'recommendation': result.get('recommendation', 'N/A'),
+                'hiring_brief': {'summary': result.get('summary', ''),
+                                 'experienceRelevance': result.get('experienceRelevance', '')}
+            }
+        logger.warning("Failed to parse skill matching JSON response")
+        return {'errors': ["skill_matching: Failed to parse skill matching JSON"]}
+    except Exception as e:
+        logger.error(f"Skill matching error: {str(e)}", exc_info=True)
+        return {'errors': [f"skill_matching: {str(e)}"]}
+
+
+# ==================== INTERVIEW QUESTIONS NODE ====================
+
+def interview_questions_node(state: RecruitmentState) -> Dict[str, Any]:
+    """Generate interview questions from the parsed CV and job description"""
+    logger.info("Starting interview questions node")
+
+    candidate = state.get('candidate_profile', {})
+    prompt = f"""Generate 10 personalized interview questions:
+
+Candidate Profile:
+{json.dumps(state.get('parsed_cv', {}), indent=2)}
+
+Job Description:
+{state.get('job_description', '')}
+
+Candidate Culture Profile:
+- Communication Style: {candidate.get('communication_style', 3)}/5
+- Work Process: {candidate.get('work_process', 3)}/5
+- Check-in Frequency: {candidate.get('checkin_frequency', 3)}/5
+- Work Environment: {candidate.get('work_environment', 3)}/5
+- Schedule Structure: {candidate.get('schedule_structure', 3)}/5
+
+Create:
+- Technical (3-4 questions)
+- Behavioral (2-3 questions)
+- Situational (2-3 questions)
+- Team dynamics (1-2 questions)
+
+JSON format:
+{{
+  "questions": [
+    {{
+      "question": "<text>",
+      "category": "<Technical/Behavioral/Situational/Team Dynamics>",
+      "purpose": "<why>",
+      "follow_up": "<optional>"
+    }}
+  ]
+}}"""
+
+    try:
+        result = parse_json_response(call_gemini(prompt, max_output_tokens=4000, temperature=0.7))
+        if result.get('questions'):
+            logger.info(f"Generated {len(result['questions'])} interview questions")
+            return {'interview_questions': result['questions']}
+        logger.warning("Failed to parse interview questions JSON response")
+        return {'errors': ["interview_questions: Failed to parse interview questions JSON"]}
+    except Exception as e:
+        logger.error(f"Interview questions error: {str(e)}", exc_info=True)
+        return {'errors': [f"interview_questions: {str(e)}"]}
+
+
+# ==================== INTERVIEW QUESTION BANK ====================
+
+# Technical questions are banked per skill; the other categories per JD (skill '')
+QUESTION_SET_LAYOUT = {"Technical": 4, "Behavioral": 2, "Situational": 2, "Team Dynamics": 2}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace (dedupe key without embeddings)."""
+    return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+
+def jd_hash(job_description: str) -> str:
+    return hashlib.sha256(normalize_text(job_description).encode("utf-8")).hexdigest()
+
+
+@st.cache_resource
+def get_embedding_model():
+    """Sentence embedding model for question dedupe, or None when sentence-transformers is not installed."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.info("sentence-transformers not installed; question dedupe falls back to normalized text")
+        return None
+    logger.info(f"Loading question embedding model: {QUESTION_EMBEDDING_MODEL}")
+    return SentenceTransformer(QUESTION_EMBEDDING_MODEL)
+
+
+@st.cache_resource
+def init_question_bank():
+    """Create the question bank table once per process."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS question_bank (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                jd_hash TEXT NOT NULL,
+                skill TEXT NOT NULL,
+                category TEXT NOT NULL,
+                question TEXT NOT NULL,
+                purpose TEXT,
+                follow_up TEXT,
+                normalized TEXT NOT NULL,
+                embedding BLOB,
+                times_used INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_question_bank_key ON question_bank (jd_hash, skill, category)")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_question_bank_normalized ON question_bank (jd_hash, normalized)")
+        # A requested skill whose generated question was a duplicate is covered by the banked original
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS question_bank_coverage (
+                jd_hash TEXT NOT NULL,
+                skill TEXT NOT NULL,
+                question_id INTEGER NOT NULL,
+                PRIMARY KEY (jd_hash, skill, question_id)
+            )
+        """)
+        conn.commit()
+    logger.info("Question bank table ready")
+    return True
+
+
+def _assign_requested_skills(questions: List[Dict[str, str]], skills: List[str]) -> List[str]:
+    """Bank key per question: the requested skill it answers (the model's tag may be worded
+    differently, so untagged or unknown ones take the remaining skills in request order)."""
+    remaining = [normalize_text(skill) for skill in skills]
+    keys = [None] * len(questions)
+    for i, q in enumerate(questions):
+        tag = normalize_text(q.get('skill', ''))
+        if q.get('category', 'Technical') == 'Technical' and tag in remaining:
+            keys[i] = tag
+            remaining.remove(tag)
+    for i, q in enumerate(questions):
+        if keys[i] is None:
+            if q.get('category', 'Technical') != 'Technical':
+                keys[i] = ''
+            else:
+                keys[i] = remaining.pop(0) if remaining else normalize_text(q.get('skill', ''))
+    return keys
+
+
+def add_to_question_bank(job_hash: str, questions: List[Dict[str, str]], skills: List[str] = ()) -> int:
+    """Store generated questions, skipping near-duplicates of questions already banked for the JD.
+
+    Technical questions are banked under the requested `skills`; a requested skill whose
+    question is dropped as a duplicate is recorded as covered by the banked original.
+    """
+    init_question_bank()
+    model = get_embedding_model()
+
+    with get_db_connection() as conn:
+        existing = conn.execute("SELECT normalized, embedding FROM question_bank WHERE jd_hash = ?",
+                                (job_hash,)).fetchall()
+    seen = {row['normalized'] for row in existing}
+
+    candidates = [q for q in questions if q.get('question')]
+    skill_keys = _assign_requested_skills(candidates, skills)
+    embeddings = [None] * len(candidates)
+    if model is not None and candidates:
+        import numpy as np
+        embeddings = model.encode([q['question'] for q in candidates], normalize_embeddings=True)
+        kept_rows = [row for row in existing if row['embedding']]
+        kept = [np.frombuffer(row['embedding'], dtype=np.float32) for row in kept_rows]
+        kept_keys = [row['normalized'] for row in kept_rows]
+
+    rows, covered = [], []
+    for q, skill, embedding in zip(candidates, skill_keys, embeddings):
+        normalized = normalize_text(q['question'])
+        category = q.get('category', 'Technical')
+        if normalized in seen:
+            if skill:
+                covered.append((skill, normalized))
+            continue
+        if embedding is not None:
+            if kept:
+                similarities = [float(embedding @ other) for other in kept]
+                best = max(range(len(kept)), key=similarities.__getitem__)
+                if similarities[best] >= QUESTION_DEDUPE_THRESHOLD:
+                    if skill:
+                        covered.append((skill, kept_keys[best]))
+                    continue
+            kept.append(embedding)
+            kept_keys.append(normalized)
+            embedding = embedding.astype(np.float32).tobytes()
+        seen.add(normalized)
+        rows.append((job_hash, skill, category, q['question'], q.get('purpose', ''), q.get('follow_up', ''),
+                     normalized, embedding))
+
+    with get_db_connection() as conn:
+        conn.executemany("""
+            INSERT OR IGNORE INTO question_bank
+            (jd_hash, skill, category, question, purpose, follow_up, normalized, embedding)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.executemany("""
+            INSERT OR IGNORE INTO question_bank_coverage (jd_hash, skill, question_id)
+            SELECT ?, ?, id FROM question_bank WHERE jd_hash = ? AND normalized = ?
+        """, [(job_hash, skill, job_hash, normalized) for skill, normalized in covered])
+        conn.commit()
+    logger.info(f"Question bank: stored {len(rows)} of {len(candidates)} generated questions "
+                f"({len(candidates) - len(rows)} duplicates skipped, {len(covered)} skills covered by existing)")
+    return len(rows)
+
+
+def _bank_questions(job_hash: str, skill: str, category: str, limit: int) -> List[Dict[str, Any]]:
+    with get_db_connection() as conn:
+        rows = conn.execute("""
+            SELECT id, question, category, purpose, follow_up FROM question_bank
+            WHERE jd_hash = ? AND category = ? AND (skill = ? OR id IN (
+                SELECT question_id FROM question_bank_coverage WHERE jd_hash = ? AND skill = ?
+            ))
+            ORDER BY times_used, id LIMIT ?
+        """, (job_hash, category, skill, job_hash, skill, limit)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _plan_question_set(job_hash: str, skills: List[str]):
+    """Pick banked questions for a set; return (picked, uncovered skills, missing count per category)."""
+    picked, uncovered, missing = [], [], {}
+    for skill in skills[:QUESTION_SET_LAYOUT["Technical"]]:
+        found = _bank_questions(job_hash, normalize_text(skill), "Technical", 1)
+        if found:
+            # A duplicate can cover two skills; list it once
+            picked.extend(q for q in found if q['id'] not in {p['id'] for p in picked})
+        else:
+            uncovered.append(skill)
+    for category, count in QUESTION_SET_LAYOUT.items():
+        if category == "Technical":
+            continue
+        found = _bank_questions(job_hash, '', category, count)
+        picked.extend(found)
+        if len(found) < count:
+            missing[category] = count - len(found)
+    return picked, uncovered, missing
+
+
+def build_question_bank_prompt(job_description: str, skills: List[str], categories: Dict[str, int]) -> str:
+    requests = [f"- Technical: 1 question for each of these skills: {', '.join(skills)}"] if skills else []
+    requests += [f"- {category}: {count} questions" for category, count in categories.items()]
+    return f"""Generate reusable interview questions for this role:
+
+Job Description:
+{job_description}
+
+Create:
+{chr(10).join(requests)}
+
+Questions must be about the role and skill, not a specific candidate.
+
+JSON format:
+{{
+  "questions": [
+    {{
+      "question": "<text>",
+      "category": "<Technical/Behavioral/Situational/Team Dynamics>",
+      "skill": "<skill for Technical questions, empty otherwise>",
+      "purpose": "<why>",
+      "follow_up": "<optional>"
+    }}
+  ]
+}}"""
+
+
+def assemble_question_set(job_description: str, skills: List[str]):
+    """Build a question set from the bank, calling the LLM only for uncovered skills/categories.
+
+    Returns (questions, llm_calls).
+    """
+    init_question_bank()
+    job_hash = jd_hash(job_description)
+    skills = list(dict.fromkeys(s for s in skills if s))
+
+    picked, uncovered, missing = _plan_question_set(job_hash, skills)
+    llm_calls = 0
+    if uncovered or missing:
+        logger.info(f"Question bank miss: {len(uncovered)} skills, {sum(missing.values())} general questions")
+        prompt = build_question_bank_prompt(job_description, uncovered, missing)
+        result = parse_json_response(call_gemini(prompt, max_output_tokens=4000, temperature=0.7))
+        llm_calls = 1
+        if not result.get('questions'):
+            raise ValueError("Failed to parse interview questions JSON")
+        add_to_question_bank(job_hash, result['questions'], uncovered)
+        picked, uncovered, missing = _plan_question_set(job_hash, skills)
+    else:
+        logger.info(f"Question set served entirely from bank ({len(picked)} questions)")
+
+    if picked:
+        with get_db_connection() as conn:
+            conn.executemany("UPDATE question_bank SET times_used = times_used + 1 WHERE id = ?",
+                             [(q['id'],) for q in picked])
+            conn.commit()
+    questions = [{k: q[k] for k in ('question', 'category', 'purpose', 'follow_up')} for q in picked]
+    return questions, llm_calls
+
+
 # ==================== TEAM DYNAMICS NODE ====================
 
-def team_dynamics_prediction_node(state: RecruitmentState) -> RecruitmentState:
+def team_dynamics_prediction_node(state: RecruitmentState) -> Dict[str, Any]:
     """Predict team dynamics and personality fit"""
     logger.info("Starting team dynamics prediction node")
 
@@ -383,27 +1373,771 @@ Provide detailed JSON analysis:
 Be specific. Valid JSON only."""
 
     try:
-        response_text = call_gemini(prompt, max_output_tokens=2000, temperature=0.7)
-
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}') + 1
-        if start_idx != -1 and end_idx > start_idx:
-            result = json.loads(response_text[start_idx:end_idx])
-            state['personality_profile'] = result.get('personalityProfile', {})
-            state['team_synergy_score'] = float(result.get('teamSynergyScore', 0))
-            state['conflict_risk_areas'] = result.get('conflictRiskAreas', [])
-            state['collaboration_strengths'] = result.get('collaborationStrengths', [])
-            state['stage'] = 'team_dynamics_predicted'
-
-            logger.info(f"Team dynamics prediction successful - Synergy score: {state['team_synergy_score']}")
-        else:
-            logger.warning("Failed to parse team dynamics JSON response")
-            state['errors'].append("Failed to parse team dynamics JSON")
+        result = parse_json_response(call_gemini(prompt, max_output_tokens=2000, temperature=0.7))
+        if result:
+            update = {
+                'personality_profile': result.get('personalityProfile', {}),
+                'team_synergy_score': float(result.get('teamSynergyScore', 0)),
+                'conflict_risk_areas': result.get('conflictRiskAreas', []),
+                'collaboration_strengths': result.get('collaborationStrengths', [])
+            }
+            logger.info(f"Team dynamics prediction successful - Synergy score: {update['team_synergy_score']}")
+            return update
+        logger.warning("Failed to parse team dynamics JSON response")
+        return {'errors': ["team_dynamics: Failed to parse team dynamics JSON"]}
     except Exception as e:
         logger.error(f"Team dynamics prediction error: {str(e)}", exc_info=True)
-        state['errors'].append(f"Team dynamics error: {str(e)}")
+        return {'errors': [f"team_dynamics: {str(e)}"]}
+
+
+# ==================== HIRING BRIEF NODE ====================
+
+def hiring_brief_node(state: RecruitmentState) -> Dict[str, Any]:
+    """Join the parallel branches into a single hiring brief"""
+    logger.info("Starting hiring brief node")
+
+    culture_fit_score, _ = compute_culture_fit(state.get('candidate_profile', {}), state.get('team_profile', {}))
+    skill_score = state.get('skill_match_score', 0)
+    synergy_score = state.get('team_synergy_score', 0)
+    overall_score = round(0.5 * skill_score + 0.25 * synergy_score + 0.25 * culture_fit_score, 1)
+
+    prompt = f"""Write a concise hiring brief for this candidate.
+
+Candidate: {json.dumps(state.get('parsed_cv', {}).get('name', 'Unknown'))}
+Skill Match Score: {skill_score:.0f}/100
+Team Synergy Score: {synergy_score:.0f}/100
+Culture Fit Score: {culture_fit_score:.0f}/100
+Overall Score: {overall_score:.0f}/100
+Skills Matched: {', '.join(state.get('skills_matched', []))}
+Skills Gap: {', '.join(state.get('skills_gap', []))}
+Strengths: {', '.join(state.get('strengths', []))}
+Concerns: {', '.join(state.get('concerns', []))}
+Conflict Risks: {', '.join(state.get('conflict_risk_areas', []))}
+Collaboration Strengths: {', '.join(state.get('collaboration_strengths', []))}
+
+Respond in JSON:
+{{
+  "headline": "<one sentence>",
+  "decision": "<Hire/Interview/Hold/Reject>",
+  "keyReasons": [list],
+  "risks": [list],
+  "nextSteps": [list]
+}}"""
+
+    brief = dict(state.get('hiring_brief') or {})
+    errors = []
+    try:
+        result = parse_json_response(call_gemini(prompt, max_output_tokens=1000, temperature=0.4))
+        if result:
+            brief.update(result)
+        else:
+            errors.append("hiring_brief: Failed to parse hiring brief JSON")
+    except Exception as e:
+        logger.error(f"Hiring brief error: {str(e)}", exc_info=True)
+        errors.append(f"hiring_brief: {str(e)}")
+
+    logger.info(f"Hiring brief complete - Overall score: {overall_score}")
+    return {
+        'culture_fit_score': culture_fit_score,
+        'overall_score': overall_score,
+        'hiring_brief': brief,
+        'stage': 'completed',
+        'errors': errors
+    }
+
+
+# ==================== NODE MEMOIZATION ====================
+
+# The slice of RecruitmentState each node reads; a node is re-run only when its slice changes
+NODE_INPUTS = {
+    "cv_parsing": ['cv_text'],
+    "skill_matching": ['cv_text', 'job_description'],
+    "team_dynamics": ['parsed_cv', 'candidate_profile', 'team_profile'],
+    "interview_questions": ['parsed_cv', 'job_description', 'candidate_profile'],
+    "hiring_brief": ['parsed_cv', 'candidate_profile', 'team_profile', 'skill_match_score',
+                     'team_synergy_score', 'skills_matched', 'skills_gap', 'strengths', 'concerns',
+                     'conflict_risk_areas', 'collaboration_strengths', 'hiring_brief'],
+}
+
+
+def _hash_payload(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@st.cache_resource
+def init_node_cache():
+    """Create the node memoization table once per process."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS node_cache (
+                node TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                output TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (node, input_hash)
+            )
+        """)
+        conn.commit()
+    logger.info("Node cache table ready")
+    return True
+
+
+def _memoized_node(name: str, fn):
+    """Serve a node's output from node_cache when its input slice is unchanged.
+
+    Outputs that carry errors are never cached, so failed nodes always re-run.
+    """
+    def wrapper(state):
+        init_node_cache()
+        input_hash = _hash_payload({key: state.get(key) for key in NODE_INPUTS[name]})
+
+        with get_db_connection() as conn:
+            row = conn.execute("SELECT output FROM node_cache WHERE node = ? AND input_hash = ?",
+                               (name, input_hash)).fetchone()
+        if row:
+            logger.info(f"Node '{name}' served from cache")
+            return json.loads(row['output'])
+
+        update = fn(state)
+        if not update.get('errors'):
+            with get_db_connection() as conn:
+                conn.execute("INSERT OR REPLACE INTO node_cache (node, input_hash, output) VALUES (?, ?, ?)",
+                             (name, input_hash, json.dumps(update, default=str)))
+                conn.commit()
+        return update
+    return wrapper
+
+
+# ==================== RECRUITMENT GRAPH ====================
+
+PARALLEL_BRANCHES = ["skill_matching", "team_dynamics", "interview_questions"]
+NODE_ORDER = ["cv_parsing"] + PARALLEL_BRANCHES + ["hiring_brief"]
+
+
+def _timed_node(name: str, fn):
+    """Wrap a node so its wall-clock time shows up in the logs."""
+    def wrapper(state):
+        started = time.perf_counter()
+        update = fn(state)
+        logger.info(f"Node '{name}' finished in {time.perf_counter() - started:.2f}s")
+        return update
+    return wrapper
+
+
+NODE_FUNCTIONS = {
+    name: _timed_node(name, _memoized_node(name, fn))
+    for name, fn in [
+        ("cv_parsing", cv_parsing_node),
+        ("skill_matching", skill_matching_node),
+        ("team_dynamics", team_dynamics_prediction_node),
+        ("interview_questions", interview_questions_node),
+        ("hiring_brief", hiring_brief_node),
+    ]
+}
+
+
+@st.cache_resource
+def get_recruitment_graph():
+    """Compiled workflow: CV parsing -> (skill matching | team dynamics | interview questions) -> hiring brief.
+
+    The three middle branches run in the same LangGraph superstep, so they
+    execute concurrently and the brief waits for all of them. Progress is
+    checkpointed to SQLite so an interrupted run resumes where it stopped.
+    """
+    from langgraph.graph import StateGraph, END
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    builder = StateGraph(RecruitmentState)
+    for name in NODE_ORDER:
+        builder.add_node(name, NODE_FUNCTIONS[name])
 
-    return state
+    builder.set_entry_point("cv_parsing")
+    for branch in PARALLEL_BRANCHES:
+        builder.add_edge("cv_parsing", branch)
+    builder.add_edge(PARALLEL_BRANCHES, "hiring_brief")
+    builder.add_edge("hiring_brief", END)
+
+    checkpointer = SqliteSaver(sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False))
+    logger.info(f"Recruitment graph compiled with checkpoints at {CHECKPOINT_DB_PATH}")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _failed_nodes(errors: List[str]) -> List[str]:
+    return [name for name in NODE_ORDER if any(e.startswith(f"{name}:") for e in errors)]
+
+
+def retry_failed_nodes(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-run only the nodes named in `errors`, then rebuild the hiring brief.
+
+    A failed cv_parsing invalidates every branch's input; the memoized
+    branches whose inputs did not change still come back from cache.
+    """
+    values = dict(values)
+    for attempt in range(NODE_MAX_RETRIES):
+        failed = _failed_nodes(values.get('errors', []))
+        if not failed:
+            break
+        logger.info(f"Retry {attempt + 1}/{NODE_MAX_RETRIES} for failed nodes: {', '.join(failed)}")
+
+        to_run = PARALLEL_BRANCHES if 'cv_parsing' in failed else [n for n in failed if n in PARALLEL_BRANCHES]
+        if 'cv_parsing' in failed:
+            to_run = ['cv_parsing'] + to_run
+
+        errors = []
+        for name in to_run:
+            update = NODE_FUNCTIONS[name](values)
+            errors.extend(update.pop('errors', []))
+            values.update(update)
+
+        update = NODE_FUNCTIONS['hiring_brief'](values)
+        errors.extend(update.pop('errors', []))
+        values.update(update)
+        values['errors'] = errors
+    return values
+
+
+def run_recruitment_analysis(cv_text: str, job_description: str, candidate_profile: Dict[str, int],
+                             team_profile: Dict[str, int]) -> Dict[str, Any]:
+    """Run the full recruitment workflow and return the final state.
+
+    Each distinct input gets its own checkpoint thread: a finished run is
+    returned as-is, an interrupted run resumes from its last checkpoint, and
+    nodes that reported errors are retried individually.
+    """
+    graph = get_recruitment_graph()
+    thread_id = _hash_payload([cv_text, job_description, candidate_profile, team_profile])
+    config = {"configurable": {"thread_id": thread_id}}
+
+    started = time.perf_counter()
+    snapshot = graph.get_state(config)
+
+    if snapshot.next:
+        logger.info(f"Resuming recruitment workflow {thread_id[:12]} at: {', '.join(snapshot.next)}")
+        final_state = graph.invoke(None, config)
+    elif snapshot.values.get('stage') == 'completed':
+        logger.info(f"Recruitment workflow {thread_id[:12]} already completed, reusing checkpoint")
+        final_state = snapshot.values
+    else:
+        initial_state = {
+            'cv_text': cv_text,
+            'job_description': job_description,
+            'candidate_profile': candidate_profile,
+            'team_profile': team_profile,
+            'parsed_cv': {},
+            'skill_match_score': 0.0,
+            'experience_score': 0.0,
+            'culture_fit_score': 0.0,
+            'overall_score': 0.0,
+            'skills_matched': [],
+            'skills_gap': [],
+            'strengths': [],
+            'concerns': [],
+            'personality_profile': {},
+            'team_synergy_score': 0.0,
+            'conflict_risk_areas': [],
+            'collaboration_strengths': [],
+            'interview_questions': [],
+            'recommendation': 'N/A',
+            'hiring_brief': {},
+            'stage': 'started',
+            'errors': []
+        }
+        final_state = graph.invoke(initial_state, config)
+
+    if final_state.get('errors'):
+        final_state = retry_failed_nodes(final_state)
+        update = {k: v for k, v in final_state.items() if k != 'errors'}
+        update['errors'] = ErrorReset(final_state['errors'])
+        graph.update_state(config, update, as_node="hiring_brief")
+
+    logger.info(f"Recruitment workflow finished in {time.perf_counter() - started:.2f}s "
+                f"with {len(final_state.get('errors', []))} error(s)")
+    return final_state
+
+
+def candidate_work_style(candidate: Dict[str, Any]) -> Dict[str, int]:
+    """Work-style profile of an application row."""
+    return {field: candidate[field] for field, _, _, _ in WORK_STYLE_DIMENSIONS}
+
+
+# ==================== WORK-STYLE PRE-SCORE ====================
+
+def load_work_style_matrix():
+    """All applications' 1-5 work-style answers as an (n x 5) matrix, in WORK_STYLE_DIMENSIONS order."""
+    import numpy as np
+
+    fields = [field for field, _, _, _ in WORK_STYLE_DIMENSIONS]
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"SELECT application_id, cv_filename, {', '.join(fields)} FROM applications ORDER BY submitted_at DESC"
+        ).fetchall()
+
+    application_ids = [row['application_id'] for row in rows]
+    filenames = [row['cv_filename'] for row in rows]
+    matrix = np.array([[row[field] or 3 for field in fields] for row in rows], dtype=np.float64).reshape(-1, len(fields))
+    logger.info(f"Loaded work-style matrix for {len(application_ids)} applications")
+    return application_ids, filenames, matrix
+
+
+def score_work_style(candidates, teams, weights=None):
+    """Culture fit of every candidate against every team, same formula as compute_culture_fit.
+
+    candidates: (n x 5), teams: (t x 5), weights: (5,) -> (n x t) scores in 0-100.
+    """
+    import numpy as np
+
+    if weights is None:
+        weights = [weight for _, _, _, weight in WORK_STYLE_DIMENSIONS]
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+
+    candidates = np.asarray(candidates, dtype=np.float64)
+    teams = np.asarray(teams, dtype=np.float64)
+    subscores = np.clip(100 - 20 * np.abs(candidates[:, None, :] - teams[None, :, :]), 0, 100)
+    return subscores @ weights
+
+
+# ==================== TEAM DYNAMICS CHARTS ====================
+# Figure specs are plain dicts cached by their inputs, so a rerun with an
+# unchanged result re-sends the cached spec instead of rebuilding the figure.
+
+def figure_spec(fig) -> Dict[str, Any]:
+    """Cacheable figure dict plus the size of the JSON that st.plotly_chart sends for it."""
+    return {'figure': fig.to_dict(), 'json_bytes': len(fig.to_json().encode('utf-8'))}
+
+
+@st.cache_data(max_entries=256)
+def gauge_figure_spec(synergy_score: float) -> Dict[str, Any]:
+    import plotly.graph_objects as go
+
+    fig_gauge = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=synergy_score,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Team Synergy Score"},
+        delta={'reference': 75},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 50], 'color': "lightgray"},
+                {'range': [50, 75], 'color': "lightyellow"},
+                {'range': [75, 100], 'color': "lightgreen"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 85
+            }
+        }
+    ))
+    fig_gauge.update_layout(height=300)
+    return figure_spec(fig_gauge)
+
+
+@st.cache_data(max_entries=256)
+def radar_figure_spec(candidate_values: List[float], team_values: List[float]) -> Dict[str, Any]:
+    import plotly.graph_objects as go
+
+    categories = ['Communication', 'Work Process', 'Check-ins', 'Environment', 'Schedule']
+
+    fig_radar = go.Figure()
+
+    fig_radar.add_trace(go.Scatterpolar(
+        r=candidate_values,
+        theta=categories,
+        fill='toself',
+        name='Candidate',
+        line_color='#667eea',
+        fillcolor='rgba(102, 126, 234, 0.3)'
+    ))
+
+    fig_radar.add_trace(go.Scatterpolar(
+        r=team_values,
+        theta=categories,
+        fill='toself',
+        name='Team',
+        line_color='#f59e0b',
+        fillcolor='rgba(245, 158, 11, 0.3)'
+    ))
+
+    fig_radar.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+        showlegend=True,
+        height=500
+    )
+    return figure_spec(fig_radar)
+
+
+@st.cache_data(max_entries=256)
+def subscores_figure_spec(subscores: Dict[str, float]) -> Dict[str, Any]:
+    import plotly.graph_objects as go
+
+    fig_subscores = go.Figure(data=[
+        go.Bar(
+            x=list(subscores.values()),
+            y=list(subscores.keys()),
+            orientation='h',
+            marker=dict(
+                color=list(subscores.values()),
+                colorscale='RdYlGn',
+                cmin=0,
+                cmax=100,
+                showscale=True,
+                colorbar=dict(title="Score")
+            ),
+            text=[f"{v:.0f}%" for v in subscores.values()],
+            textposition='outside'
+        )
+    ])
+
+    fig_subscores.update_layout(
+        xaxis_title="Score",
+        yaxis_title="",
+        xaxis_range=[0, 110],
+        height=350,
+        showlegend=False
+    )
+    return figure_spec(fig_subscores)
+
+
+@st.cache_data(max_entries=256)
+def decision_matrix_figure_spec(skill_score: float, team_synergy: float) -> Dict[str, Any]:
+    import plotly.graph_objects as go
+
+    fig_matrix = go.Figure()
+
+    fig_matrix.add_shape(type="rect", x0=0, y0=0, x1=50, y1=50, fillcolor="rgba(239, 68, 68, 0.2)",
+                         line_width=0)
+    fig_matrix.add_shape(type="rect", x0=50, y0=0, x1=100, y1=50, fillcolor="rgba(245, 158, 11, 0.2)",
+                         line_width=0)
+    fig_matrix.add_shape(type="rect", x0=0, y0=50, x1=50, y1=100, fillcolor="rgba(245, 158, 11, 0.2)",
+                         line_width=0)
+    fig_matrix.add_shape(type="rect", x0=50, y0=50, x1=100, y1=100, fillcolor="rgba(16, 185, 129, 0.2)",
+                         line_width=0)
+
+    fig_matrix.add_trace(go.Scatter(
+        x=[skill_score],
+        y=[team_synergy],
+        mode='markers+text',
+        marker=dict(size=20, color='#667eea'),
+        text=['Candidate'],
+        textposition='top center',
+        name='Candidate Position'
+    ))
+
+    fig_matrix.add_annotation(x=25, y=25, text="Skill & Culture Gap<br>❌ No Hire", showarrow=False,
+                              font=dict(size=10))
+    fig_matrix.add_annotation(x=75, y=25, text="Skills Strong<br>Culture Risk<br>⚠️ Maybe", showarrow=False,
+                              font=dict(size=10))
+    fig_matrix.add_annotation(x=25, y=75, text="Culture Fit<br>Skills Gap<br>⚠️ Train", showarrow=False,
+                              font=dict(size=10))
+    fig_matrix.add_annotation(x=75, y=75, text="Strong Match<br>✅ Hire", showarrow=False,
+                              font=dict(size=10))
+
+    fig_matrix.update_layout(
+        xaxis_title="Skill Match Score",
+        yaxis_title="Team Synergy Score",
+        xaxis_range=[0, 100],
+        yaxis_range=[0, 100],
+        height=500,
+        showlegend=False
+    )
+    return figure_spec(fig_matrix)
+
+
+@st.cache_data(max_entries=64)
+def team_fit_heatmap_spec(fit_rows: List[List[float]], team_names: List[str], labels: List[str]) -> Dict[str, Any]:
+    import plotly.express as px
+
+    fig_heatmap = px.imshow(
+        fit_rows,
+        x=team_names,
+        y=labels,
+        color_continuous_scale='RdYlGn',
+        zmin=0,
+        zmax=100,
+        aspect='auto',
+        labels=dict(color="Culture Fit")
+    )
+    fig_heatmap.update_layout(height=max(300, 22 * len(labels)))
+    return figure_spec(fig_heatmap)
+
+
+def plot_spec(spec: Dict[str, Any]) -> int:
+    """Render a cached figure spec; returns its serialized size in bytes."""
+    st.plotly_chart(spec['figure'], use_container_width=True)
+    return spec['json_bytes']
+
+
+def log_panel_render(panel: str, started: float, payload_bytes: int):
+    logger.info(f"Rendered {panel} in {(time.perf_counter() - started) * 1000:.1f}ms "
+                f"(chart payload {payload_bytes / 1024:.1f} KB)")
+
+
+def select_candidate(candidate: Dict[str, Any]):
+    """Make candidate the selected one: clear the previous candidate's results and load
+    its stored analysis (for the current job description if there is one)."""
+    app_id = candidate['application_id']
+    logger.info(f"User selected candidate: {app_id}")
+    st.session_state.hiring_brief = None
+    st.session_state.team_dynamics_result = None
+    st.session_state.interview_questions = None
+    stored = get_analysis(app_id, st.session_state.job_description) or get_analysis(app_id)
+    st.session_state.analysis_result = stored['result'] if stored else None
+    if stored:
+        st.session_state.job_description = stored['job_description']
+        logger.info(f"Loaded stored analysis for {app_id}")
+    st.session_state.selected_candidate = candidate
+
+
+# ==================== TEAM DYNAMICS PANELS ====================
+# Each interactive panel is a fragment: its widgets rerun only that panel.
+
+@st.fragment
+def team_fit_ranking_panel():
+    import pandas as pd
+
+    started = time.perf_counter()
+    payload = 0
+
+    st.caption("Instant, deterministic culture-fit pre-score from the 1–5 work-style answers. "
+               "Run the AI team dynamics analysis only for the top matches.")
+
+    team_fields = [team_field for _, team_field, _, _ in WORK_STYLE_DIMENSIONS]
+    # With num_rows="dynamic" the editor's identity depends on its input data, so the
+    # seed is built once and never replaced; the current rows are the editor's return value
+    if 'team_profiles_seed' not in st.session_state:
+        st.session_state.team_profiles_seed = pd.DataFrame(
+            [{'team': 'Current Team', **st.session_state.team_profile}], columns=['team'] + team_fields
+        )
+    teams_df = st.data_editor(
+        st.session_state.team_profiles_seed,
+        column_config={field: st.column_config.NumberColumn(field, min_value=1, max_value=5, step=1, default=3)
+                       for field in team_fields},
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        key="team_profiles_editor"
+    ).dropna()
+
+    top_k = st.slider("Top matches to offer for AI analysis", 1, 20, 5)
+
+    if not teams_df.empty:
+        application_ids, filenames, work_styles = load_work_style_matrix()
+        if application_ids:
+            scoring_started = time.perf_counter()
+            fit = score_work_style(work_styles, teams_df[team_fields].to_numpy(),
+                                   st.session_state.culture_fit_weights)
+            logger.info(f"Scored {len(application_ids)} candidates x {len(teams_df)} teams "
+                        f"in {(time.perf_counter() - scoring_started) * 1000:.1f}ms")
+
+            team_names = teams_df['team'].astype(str).tolist()
+            fit_df = pd.DataFrame(fit, columns=team_names)
+            fit_df.insert(0, 'candidate', [f"{a} - {f}" for a, f in zip(application_ids, filenames)])
+            fit_df['best_team'] = fit_df[team_names].idxmax(axis=1)
+            fit_df['best_fit'] = fit_df[team_names].max(axis=1)
+            fit_df['application_id'] = application_ids
+            fit_df = fit_df.sort_values('best_fit', ascending=False)
+
+            heatmap_rows = fit_df.head(50)
+            payload += plot_spec(team_fit_heatmap_spec(
+                heatmap_rows[team_names].round(1).values.tolist(), team_names, heatmap_rows['candidate'].tolist()
+            ))
+            if len(fit_df) > len(heatmap_rows):
+                st.caption(f"Heatmap shows the top {len(heatmap_rows)} of {len(fit_df)} candidates")
+
+            st.markdown("**🏆 Top Matches**")
+            for _, row in fit_df.head(top_k).iterrows():
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.write(f"{row['candidate']} — **{row['best_fit']:.0f}%** with {row['best_team']}")
+                with col2:
+                    if st.button("🔬 AI Analysis", key=f"td_top_{row['application_id']}", use_container_width=True):
+                        top_candidate = get_application(row['application_id'])
+                        team_row = teams_df[teams_df['team'].astype(str) == row['best_team']].iloc[0]
+                        top_team_profile = {field: int(team_row[field]) for field in team_fields}
+                        with st.spinner("🔄 Running team dynamics analysis..."):
+                            prediction = NODE_FUNCTIONS['team_dynamics']({
+                                'candidate_profile': candidate_work_style(top_candidate),
+                                'team_profile': top_team_profile,
+                                'parsed_cv': {'name': top_candidate.get('cv_filename', 'Unknown')}
+                            })
+                        select_candidate(top_candidate)
+                        st.session_state.team_profile = top_team_profile
+                        st.session_state.team_dynamics_result = build_team_dynamics_result(
+                            candidate_work_style(top_candidate), top_team_profile, prediction
+                        )
+                        st.rerun()
+        else:
+            st.info("📭 No candidates in database.")
+
+    log_panel_render("team fit ranking", started, payload)
+
+
+@st.fragment
+def team_profile_panel(candidate: Dict[str, Any]):
+    started = time.perf_counter()
+
+    st.subheader("🏢 Configure Team Profile")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        team_communication = st.slider("Team Communication Style", 1, 5, 3, help="1=Real-time, 5=Async",
+                                       key="td_comm")
+        team_work_process = st.slider("Team Work Process", 1, 5, 3, help="1=Collaborative, 5=Independent",
+                                      key="td_work")
+
+    with col2:
+        team_checkin_frequency = st.slider("Team Check-in Frequency", 1, 5, 3, help="1=Daily, 5=Monthly+",
+                                           key="td_checkin")
+        team_work_environment = st.slider("Team Work Environment", 1, 5, 3, help="1=Office, 5=Remote", key="td_env")
+
+    with col3:
+        team_schedule_structure = st.slider("Team Schedule Structure", 1, 5, 3, help="1=Structured, 5=Flexible",
+                                            key="td_schedule")
+
+    team_profile = {
+        'team_communication': team_communication,
+        'team_work_process': team_work_process,
+        'team_checkin_frequency': team_checkin_frequency,
+        'team_work_environment': team_work_environment,
+        'team_schedule_structure': team_schedule_structure
+    }
+
+    if st.button("🔬 Analyze Team Dynamics", type="primary", use_container_width=True):
+        with st.spinner("🔄 Running team dynamics analysis..."):
+            try:
+                state = {
+                    'cv_text': candidate['cv_text'],
+                    'candidate_profile': candidate_work_style(candidate),
+                    'team_profile': team_profile,
+                    'parsed_cv': {'name': candidate.get('cv_filename', 'Unknown')},
+                    'errors': []
+                }
+
+                result_state = NODE_FUNCTIONS['team_dynamics'](state)
+                st.session_state.team_profile = team_profile
+
+                st.session_state.team_dynamics_result = build_team_dynamics_result(
+                    state['candidate_profile'], team_profile, result_state
+                )
+
+                logger.info("Team dynamics analysis completed successfully")
+                st.session_state.team_dynamics_notice = True
+
+            except Exception as e:
+                logger.error(f"Team dynamics analysis error: {str(e)}", exc_info=True)
+                st.error(f"Error: {str(e)}")
+
+        if st.session_state.get('team_dynamics_notice'):
+            # New result: rerun the whole page so the results panel picks it up
+            st.rerun()
+
+    log_panel_render("team profile", started, 0)
+
+
+def team_dynamics_results_panel(result: Dict[str, Any], skill_score: Optional[float]):
+    started = time.perf_counter()
+    payload = 0
+
+    st.subheader("📊 Key Metrics")
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        culture_score = result['culture_fit_score']
+        st.metric("Culture Fit Score", f"{culture_score:.0f}%",
+                  delta="Excellent" if culture_score >= 80 else "Good" if culture_score >= 60 else "Fair")
+
+    with col2:
+        synergy_score = result['team_synergy_score']
+        st.metric("Team Synergy Score", f"{synergy_score:.0f}%",
+                  delta="Strong" if synergy_score >= 80 else "Moderate" if synergy_score >= 60 else "Weak")
+
+    with col3:
+        risk_count = len(result['conflict_risk_areas'])
+        st.metric("Conflict Risk Areas", risk_count,
+                  delta="Low" if risk_count <= 1 else "Medium" if risk_count <= 3 else "High",
+                  delta_color="inverse")
+
+    st.markdown("---")
+
+    # Personality Profile
+    st.subheader("👤 Personality Profile")
+    personality = result.get('personality_profile', {})
+
+    if personality:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("**Work Characteristics**")
+            st.info(f"🎯 **Work Style:** {personality.get('workStyle', 'N/A').title()}")
+            st.info(f"💬 **Communication:** {personality.get('communicationStyle', 'N/A').title()}")
+            st.info(f"⚡ **Decision Making:** {personality.get('decisionMaking', 'N/A').title()}")
+
+        with col2:
+            st.markdown("**Performance Indicators**")
+            st.info(f"💪 **Stress Response:** {personality.get('stressResponse', 'N/A').title()}")
+            st.info(f"👑 **Leadership Potential:** {personality.get('leadershipPotential', 'N/A').title()}")
+
+    st.markdown("---")
+
+    # Team Synergy Gauge
+    st.subheader("🤝 Team Synergy Analysis")
+
+    payload += plot_spec(gauge_figure_spec(result['team_synergy_score']))
+
+    st.markdown("---")
+
+    # Strengths and Risks
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("✅ Collaboration Strengths")
+        strengths = result.get('collaboration_strengths', [])
+        if strengths:
+            for strength in strengths:
+                st.markdown(f'<div class="insight-positive">• {strength}</div>', unsafe_allow_html=True)
+        else:
+            st.info("No specific strengths identified")
+
+    with col2:
+        st.subheader("⚠️ Conflict Risk Areas")
+        risks = result.get('conflict_risk_areas', [])
+        if risks:
+            for risk in risks:
+                st.markdown(f'<div class="insight-risk">• {risk}</div>', unsafe_allow_html=True)
+        else:
+            st.success("No significant conflict risks identified")
+
+    st.markdown("---")
+
+    # Visualizations
+    st.subheader("📈 Visual Analytics")
+
+    st.markdown("#### 🕸️ Candidate vs Team Profile Match")
+
+    payload += plot_spec(radar_figure_spec(result['candidate_values'], result['team_values']))
+
+    st.markdown("---")
+
+    # Culture Fit Subscores
+    st.markdown("#### 📊 Culture Fit Breakdown")
+
+    payload += plot_spec(subscores_figure_spec(result['subscores']))
+
+    st.markdown("---")
+
+    # Hiring Decision Matrix
+    st.markdown("#### 🎯 Hiring Decision Matrix")
+
+    if skill_score is not None:
+        payload += plot_spec(decision_matrix_figure_spec(skill_score, result['team_synergy_score']))
+    else:
+        st.info("Complete CV analysis to see the hiring decision matrix")
+
+    log_panel_render("team dynamics results", started, payload)
 
 
 # ==================== STREAMLIT UI ====================
@@ -560,6 +2294,16 @@ if 'selected_candidate' not in st.session_state:
     st.session_state.selected_candidate = None
 if 'team_dynamics_result' not in st.session_state:
     st.session_state.team_dynamics_result = None
+if 'team_profile' not in st.session_state:
+    st.session_state.team_profile = {team_field: 3 for _, team_field, _, _ in WORK_STYLE_DIMENSIONS}
+if 'hiring_brief' not in st.session_state:
+    st.session_state.hiring_brief = None
+if 'culture_fit_weights' not in st.session_state:
+    st.session_state.culture_fit_weights = [weight for _, _, _, weight in WORK_STYLE_DIMENSIONS]
+if 'job_description' not in st.session_state:
+    st.session_state.job_description = ""
+if 'question_bank_stats' not in st.session_state:
+    st.session_state.question_bank_stats = {'sets': 0, 'llm_calls': 0}
 
 # ==================== SIDEBAR NAVIGATION ====================
 with st.sidebar:
@@ -604,8 +2348,7 @@ with st.sidebar:
 
     # Quick stats in sidebar
     st.markdown("### Quick Stats")
-    apps = get_all_applications()
-    st.metric("Candidates", len(apps), delta=None)
+    st.metric("Candidates", count_applications(), delta=None)
     if st.session_state.analysis_result:
         score = st.session_state.analysis_result.get('matchScore', 0)
         st.metric("Last Score", f"{score}%")
@@ -705,17 +2448,16 @@ if st.session_state.current_page == 'home':
     st.markdown("---")
     st.markdown("### 📊 Quick Stats")
 
-    apps = get_all_applications()
+    analysis_stats = get_analysis_stats()
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Total Candidates", len(apps))
+        st.metric("Total Candidates", count_applications())
     with col2:
-        analyzed = 1 if st.session_state.analysis_result else 0
-        st.metric("Analyzed Today", analyzed)
+        st.metric("Analyzed Today", analysis_stats['today'])
     with col3:
-        avg_score = st.session_state.analysis_result.get('matchScore', 0) if st.session_state.analysis_result else 0
-        st.metric("Avg Match Score", f"{avg_score:.0f}%")
+        st.metric("Avg Match Score", f"{analysis_stats['avg_score']:.0f}%",
+                  help=f"Across {analysis_stats['total']} stored analyses")
     with col4:
         interviewed = len(st.session_state.interview_questions) if st.session_state.interview_questions else 0
         st.metric("Interview Questions", interviewed)
@@ -735,7 +2477,15 @@ elif st.session_state.current_page == 'cv_screening':
     # Candidate Selection
     st.subheader("🔍 Select Candidate from Database")
 
-    applications = get_all_applications()
+    col_search, col_page = st.columns([3, 1])
+    with col_search:
+        search_query = st.text_input("Search candidates", placeholder="Application ID or CV file name...")
+    matching = count_applications(search_query)
+    page_count = max(1, -(-matching // APPLICATION_PAGE_SIZE))
+    with col_page:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+
+    applications = search_applications(search_query, APPLICATION_PAGE_SIZE, (page - 1) * APPLICATION_PAGE_SIZE)
 
     if applications:
         candidate_options = {
@@ -744,7 +2494,7 @@ elif st.session_state.current_page == 'cv_screening':
         }
 
         selected_option = st.selectbox(
-            "Choose a candidate:",
+            f"Choose a candidate ({matching} matching):",
             options=list(candidate_options.keys()),
             index=None,
             placeholder="Select a candidate to analyze..."
@@ -752,11 +2502,15 @@ elif st.session_state.current_page == 'cv_screening':
 
         if selected_option:
             app_id = candidate_options[selected_option]
-            logger.info(f"User selected candidate: {app_id}")
-            candidate = get_application(app_id)
+            previous = st.session_state.selected_candidate
+            if previous and previous['application_id'] == app_id:
+                candidate = previous
+            else:
+                candidate = get_application(app_id)
+                if candidate:
+                    select_candidate(candidate)
 
             if candidate:
-                st.session_state.selected_candidate = candidate
 
                 with st.expander("📋 Candidate Preview", expanded=True):
                     col1, col2 = st.columns([2, 1])
@@ -769,6 +2523,8 @@ elif st.session_state.current_page == 'cv_screening':
                         st.metric("Work Process", candidate['work_process'])
 
                 st.markdown("---")
+    elif search_query:
+        st.info(f"🔍 No candidates match '{search_query}'.")
     else:
         st.info("📭 No candidates in database. Please submit applications first.")
 
@@ -783,36 +2539,26 @@ elif st.session_state.current_page == 'cv_screening':
         else:
             cv_text = st.text_area("Candidate CV", height=200, placeholder="Select a candidate from database above...")
 
-        job_description = st.text_area("Job Description", height=300, placeholder="Paste job description here...")
+        job_description = st.text_area("Job Description", value=st.session_state.job_description,
+                                       height=300, placeholder="Paste job description here...")
+        st.session_state.job_description = job_description
+
+        force_reanalysis = st.checkbox("Re-analyze even if a stored analysis exists", value=False)
 
         if st.button("🔍 Analyze CV", type="primary", use_container_width=True):
-            if cv_text and job_description:
+            stored = None
+            if st.session_state.selected_candidate and job_description and not force_reanalysis:
+                stored = get_analysis(st.session_state.selected_candidate['application_id'], job_description)
+            if stored:
+                st.session_state.analysis_result = stored['result']
+                logger.info("CV analysis served from stored analyses")
+                st.success("✅ Loaded stored analysis for this candidate and job description")
+            elif cv_text and job_description:
                 with st.spinner("Analyzing CV with AI..."):
                     try:
-                        client = get_genai_client()
-
-                        prompt = f"""Analyze this CV against the job description:
-
-CV:
-{cv_text}
-
-Job Description:
-{job_description}
-
-Respond in JSON:
-{{
-  "matchScore": <0-100>,
-  "skillsMatched": [list],
-  "skillsGap": [list],
-  "experienceRelevance": "<text>",
-  "recommendation": "<Strong Fit/Good Fit/Potential Fit/Not a Fit>",
-  "summary": "<2-3 sentences>",
-  "strengths": [list],
-  "concerns": [list]
-}}"""
+                        prompt = build_cv_analysis_prompt(cv_text, job_description)
 
-                        resp = client.models.generate_content(model="gemini-2.0-flash-exp", contents=prompt)
-                        response_text = getattr(resp, "text", None) or str(resp)
+                        response_text = call_gemini(prompt)
 
                         json_start = response_text.find('{')
                         json_end = response_text.rfind('}') + 1
@@ -820,6 +2566,9 @@ Respond in JSON:
                             result = json.loads(response_text[json_start:json_end])
                             st.session_state.analysis_result = result
                             logger.info(f"CV analysis successful - Match score: {result.get('matchScore', 0)}")
+                            if st.session_state.selected_candidate:
+                                save_analysis(st.session_state.selected_candidate['application_id'],
+                                              job_description, result)
                             st.success("✅ Analysis complete!")
                         else:
                             st.error("Failed to parse AI response")
@@ -829,6 +2578,46 @@ Respond in JSON:
             else:
                 st.warning("Please select a candidate and provide job description")
 
+        if st.button("🚀 Run Full Analysis", use_container_width=True,
+                     help="CV parsing, then skill matching, team dynamics and interview questions in parallel, joined into a hiring brief"):
+            if st.session_state.selected_candidate and job_description:
+                with st.spinner("Running full recruitment workflow..."):
+                    try:
+                        candidate = st.session_state.selected_candidate
+                        candidate_profile = candidate_work_style(candidate)
+                        team_profile = st.session_state.team_profile
+
+                        final_state = run_recruitment_analysis(cv_text, job_description, candidate_profile, team_profile)
+
+                        st.session_state.analysis_result = {
+                            'matchScore': final_state['skill_match_score'],
+                            'skillsMatched': final_state['skills_matched'],
+                            'skillsGap': final_state['skills_gap'],
+                            'experienceRelevance': final_state['hiring_brief'].get('experienceRelevance', ''),
+                            'recommendation': final_state['recommendation'],
+                            'summary': final_state['hiring_brief'].get('summary', ''),
+                            'strengths': final_state['strengths'],
+                            'concerns': final_state['concerns']
+                        }
+                        if not final_state['errors']:
+                            save_analysis(candidate['application_id'], job_description,
+                                          st.session_state.analysis_result)
+                        st.session_state.team_dynamics_result = build_team_dynamics_result(
+                            candidate_profile, team_profile, final_state
+                        )
+                        st.session_state.interview_questions = final_state['interview_questions'] or None
+                        st.session_state.hiring_brief = final_state['hiring_brief']
+
+                        if final_state['errors']:
+                            st.warning("⚠️ Completed with errors: " + "; ".join(final_state['errors']))
+                        else:
+                            st.success("✅ Full analysis complete!")
+                    except Exception as e:
+                        logger.error(f"Full analysis error: {str(e)}", exc_info=True)
+                        st.error(f"Error: {str(e)}")
+            else:
+                st.warning("Please select a candidate and provide job description")
+
     with col2:
         st.subheader("📊 Analysis Results")
 
@@ -879,6 +2668,19 @@ Respond in JSON:
                     for concern in result['concerns']:
                         st.write(f"• {concern}")
 
+            if st.session_state.hiring_brief:
+                brief = st.session_state.hiring_brief
+                with st.expander("📝 Hiring Brief", expanded=True):
+                    if brief.get('headline'):
+                        st.markdown(f"**{brief['headline']}**")
+                    if brief.get('decision'):
+                        st.write(f"**Decision:** {brief['decision']}")
+                    for label, key in [("Key Reasons", 'keyReasons'), ("Risks", 'risks'), ("Next Steps", 'nextSteps')]:
+                        if brief.get(key):
+                            st.write(f"**{label}:**")
+                            for item in brief[key]:
+                                st.write(f"• {item}")
+
             # Email Actions
             st.markdown("---")
             st.subheader("📧 Send Decision Email")
@@ -934,6 +2736,11 @@ elif st.session_state.current_page == 'team_dynamics':
     """, unsafe_allow_html=True)
 
     logger.info("User on Team Dynamics page")
+    page_started = time.perf_counter()
+
+    with st.expander("📊 Team Fit Ranking — score every candidate against your teams",
+                     expanded=not st.session_state.selected_candidate):
+        team_fit_ranking_panel()
 
     if not st.session_state.selected_candidate:
         st.warning("⚠️ Please select a candidate from CV Screening first")
@@ -941,329 +2748,23 @@ elif st.session_state.current_page == 'team_dynamics':
             st.session_state.current_page = 'cv_screening'
             st.rerun()
     else:
-        candidate = st.session_state.selected_candidate
-
-        st.subheader("🏢 Configure Team Profile")
-
-        col1, col2, col3 = st.columns(3)
+        team_profile_panel(st.session_state.selected_candidate)
 
-        with col1:
-            team_communication = st.slider("Team Communication Style", 1, 5, 3, help="1=Real-time, 5=Async",
-                                           key="td_comm")
-            team_work_process = st.slider("Team Work Process", 1, 5, 3, help="1=Collaborative, 5=Independent",
-                                          key="td_work")
-
-        with col2:
-            team_checkin_frequency = st.slider("Team Check-in Frequency", 1, 5, 3, help="1=Daily, 5=Monthly+",
-                                               key="td_checkin")
-            team_work_environment = st.slider("Team Work Environment", 1, 5, 3, help="1=Office, 5=Remote", key="td_env")
-
-        with col3:
-            team_schedule_structure = st.slider("Team Schedule Structure", 1, 5, 3, help="1=Structured, 5=Flexible",
-                                                key="td_schedule")
-
-        team_profile = {
-            'team_communication': team_communication,
-            'team_work_process': team_work_process,
-            'team_checkin_frequency': team_checkin_frequency,
-            'team_work_environment': team_work_environment,
-            'team_schedule_structure': team_schedule_structure
-        }
-
-        if st.button("🔬 Analyze Team Dynamics", type="primary", use_container_width=True):
-            with st.spinner("🔄 Running team dynamics analysis..."):
-                try:
-                    state = {
-                        'cv_text': candidate['cv_text'],
-                        'candidate_profile': {
-                            'communication_style': candidate['communication_style'],
-                            'work_process': candidate['work_process'],
-                            'checkin_frequency': candidate['checkin_frequency'],
-                            'work_environment': candidate['work_environment'],
-                            'schedule_structure': candidate['schedule_structure']
-                        },
-                        'team_profile': team_profile,
-                        'parsed_cv': {'name': candidate.get('cv_filename', 'Unknown')},
-                        'errors': []
-                    }
-
-                    result_state = team_dynamics_prediction_node(state)
-
-                    # Calculate culture fit
-                    async_score = 100 - abs(candidate['communication_style'] - team_communication) * 20
-                    structure_score = 100 - abs(candidate['work_process'] - team_work_process) * 20
-                    checkin_score = 100 - abs(candidate['checkin_frequency'] - team_checkin_frequency) * 20
-                    environment_score = 100 - abs(candidate['work_environment'] - team_work_environment) * 20
-                    schedule_score = 100 - abs(candidate['schedule_structure'] - team_schedule_structure) * 20
-
-                    culture_fit_score = (
-                            0.25 * max(0, min(100, async_score)) +
-                            0.25 * max(0, min(100, structure_score)) +
-                            0.20 * max(0, min(100, checkin_score)) +
-                            0.20 * max(0, min(100, environment_score)) +
-                            0.10 * max(0, min(100, schedule_score))
-                    )
-
-                    st.session_state.team_dynamics_result = {
-                        'personality_profile': result_state.get('personality_profile', {}),
-                        'team_synergy_score': result_state.get('team_synergy_score', 0),
-                        'conflict_risk_areas': result_state.get('conflict_risk_areas', []),
-                        'collaboration_strengths': result_state.get('collaboration_strengths', []),
-                        'culture_fit_score': round(culture_fit_score, 1),
-                        'subscores': {
-                            'async': round(max(0, min(100, async_score)), 1),
-                            'structure': round(max(0, min(100, structure_score)), 1),
-                            'checkin': round(max(0, min(100, checkin_score)), 1),
-                            'environment': round(max(0, min(100, environment_score)), 1),
-                            'schedule': round(max(0, min(100, schedule_score)), 1)
-                        },
-                        'candidate_values': [
-                            candidate['communication_style'],
-                            candidate['work_process'],
-                            candidate['checkin_frequency'],
-                            candidate['work_environment'],
-                            candidate['schedule_structure']
-                        ],
-                        'team_values': [
-                            team_communication,
-                            team_work_process,
-                            team_checkin_frequency,
-                            team_work_environment,
-                            team_schedule_structure
-                        ]
-                    }
-
-                    logger.info("Team dynamics analysis completed successfully")
-                    st.success("✅ Team dynamics analysis complete!")
-                    st.balloons()
-
-                except Exception as e:
-                    logger.error(f"Team dynamics analysis error: {str(e)}", exc_info=True)
-                    st.error(f"Error: {str(e)}")
+        if st.session_state.pop('team_dynamics_notice', False):
+            st.success("✅ Team dynamics analysis complete!")
+            st.balloons()
 
         st.markdown("---")
 
         # Display Results
         if st.session_state.team_dynamics_result:
-            result = st.session_state.team_dynamics_result
-
-            st.subheader("📊 Key Metrics")
-            col1, col2, col3 = st.columns(3)
-
-            with col1:
-                culture_score = result['culture_fit_score']
-                st.metric("Culture Fit Score", f"{culture_score:.0f}%",
-                          delta="Excellent" if culture_score >= 80 else "Good" if culture_score >= 60 else "Fair")
-
-            with col2:
-                synergy_score = result['team_synergy_score']
-                st.metric("Team Synergy Score", f"{synergy_score:.0f}%",
-                          delta="Strong" if synergy_score >= 80 else "Moderate" if synergy_score >= 60 else "Weak")
-
-            with col3:
-                risk_count = len(result['conflict_risk_areas'])
-                st.metric("Conflict Risk Areas", risk_count,
-                          delta="Low" if risk_count <= 1 else "Medium" if risk_count <= 3 else "High",
-                          delta_color="inverse")
-
-            st.markdown("---")
-
-            # Personality Profile
-            st.subheader("👤 Personality Profile")
-            personality = result.get('personality_profile', {})
-
-            if personality:
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.markdown("**Work Characteristics**")
-                    st.info(f"🎯 **Work Style:** {personality.get('workStyle', 'N/A').title()}")
-                    st.info(f"💬 **Communication:** {personality.get('communicationStyle', 'N/A').title()}")
-                    st.info(f"⚡ **Decision Making:** {personality.get('decisionMaking', 'N/A').title()}")
-
-                with col2:
-                    st.markdown("**Performance Indicators**")
-                    st.info(f"💪 **Stress Response:** {personality.get('stressResponse', 'N/A').title()}")
-                    st.info(f"👑 **Leadership Potential:** {personality.get('leadershipPotential', 'N/A').title()}")
-
-            st.markdown("---")
-
-            # Team Synergy Gauge
-            st.subheader("🤝 Team Synergy Analysis")
-
-            fig_gauge = go.Figure(go.Indicator(
-                mode="gauge+number+delta",
-                value=result['team_synergy_score'],
-                domain={'x': [0, 1], 'y': [0, 1]},
-                title={'text': "Team Synergy Score"},
-                delta={'reference': 75},
-                gauge={
-                    'axis': {'range': [None, 100]},
-                    'bar': {'color': "darkblue"},
-                    'steps': [
-                        {'range': [0, 50], 'color': "lightgray"},
-                        {'range': [50, 75], 'color': "lightyellow"},
-                        {'range': [75, 100], 'color': "lightgreen"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.75,
-                        'value': 85
-                    }
-                }
-            ))
-            fig_gauge.update_layout(height=300)
-            st.plotly_chart(fig_gauge, use_container_width=True)
-
-            st.markdown("---")
-
-            # Strengths and Risks
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("✅ Collaboration Strengths")
-                strengths = result.get('collaboration_strengths', [])
-                if strengths:
-                    for strength in strengths:
-                        st.markdown(f'<div class="insight-positive">• {strength}</div>', unsafe_allow_html=True)
-                else:
-                    st.info("No specific strengths identified")
-
-            with col2:
-                st.subheader("⚠️ Conflict Risk Areas")
-                risks = result.get('conflict_risk_areas', [])
-                if risks:
-                    for risk in risks:
-                        st.markdown(f'<div class="insight-risk">• {risk}</div>', unsafe_allow_html=True)
-                else:
-                    st.success("No significant conflict risks identified")
-
-            st.markdown("---")
-
-            # Visualizations
-            st.subheader("📈 Visual Analytics")
-
-            st.markdown("#### 🕸️ Candidate vs Team Profile Match")
-
-            categories = ['Communication', 'Work Process', 'Check-ins', 'Environment', 'Schedule']
-
-            fig_radar = go.Figure()
-
-            fig_radar.add_trace(go.Scatterpolar(
-                r=result['candidate_values'],
-                theta=categories,
-                fill='toself',
-                name='Candidate',
-                line_color='#667eea',
-                fillcolor='rgba(102, 126, 234, 0.3)'
-            ))
-
-            fig_radar.add_trace(go.Scatterpolar(
-                r=result['team_values'],
-                theta=categories,
-                fill='toself',
-                name='Team',
-                line_color='#f59e0b',
-                fillcolor='rgba(245, 158, 11, 0.3)'
-            ))
-
-            fig_radar.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
-                showlegend=True,
-                height=500
-            )
-
-            st.plotly_chart(fig_radar, use_container_width=True)
-
-            st.markdown("---")
-
-            # Culture Fit Subscores
-            st.markdown("#### 📊 Culture Fit Breakdown")
-
-            subscores = result['subscores']
-
-            fig_subscores = go.Figure(data=[
-                go.Bar(
-                    x=list(subscores.values()),
-                    y=list(subscores.keys()),
-                    orientation='h',
-                    marker=dict(
-                        color=list(subscores.values()),
-                        colorscale='RdYlGn',
-                        cmin=0,
-                        cmax=100,
-                        showscale=True,
-                        colorbar=dict(title="Score")
-                    ),
-                    text=[f"{v:.0f}%" for v in subscores.values()],
-                    textposition='outside'
-                )
-            ])
-
-            fig_subscores.update_layout(
-                xaxis_title="Score",
-                yaxis_title="",
-                xaxis_range=[0, 110],
-                height=350,
-                showlegend=False
-            )
-
-            st.plotly_chart(fig_subscores, use_container_width=True)
-
-            st.markdown("---")
-
-            # Hiring Decision Matrix
-            st.markdown("#### 🎯 Hiring Decision Matrix")
-
-            if st.session_state.analysis_result:
-                skill_score = st.session_state.analysis_result.get('matchScore', 0)
-                team_synergy = result['team_synergy_score']
-
-                fig_matrix = go.Figure()
-
-                fig_matrix.add_shape(type="rect", x0=0, y0=0, x1=50, y1=50, fillcolor="rgba(239, 68, 68, 0.2)",
-                                     line_width=0)
-                fig_matrix.add_shape(type="rect", x0=50, y0=0, x1=100, y1=50, fillcolor="rgba(245, 158, 11, 0.2)",
-                                     line_width=0)
-                fig_matrix.add_shape(type="rect", x0=0, y0=50, x1=50, y1=100, fillcolor="rgba(245, 158, 11, 0.2)",
-                                     line_width=0)
-                fig_matrix.add_shape(type="rect", x0=50, y0=50, x1=100, y1=100, fillcolor="rgba(16, 185, 129, 0.2)",
-                                     line_width=0)
-
-                fig_matrix.add_trace(go.Scatter(
-                    x=[skill_score],
-                    y=[team_synergy],
-                    mode='markers+text',
-                    marker=dict(size=20, color='#667eea'),
-                    text=['Candidate'],
-                    textposition='top center',
-                    name='Candidate Position'
-                ))
-
-                fig_matrix.add_annotation(x=25, y=25, text="Skill & Culture Gap<br>❌ No Hire", showarrow=False,
-                                          font=dict(size=10))
-                fig_matrix.add_annotation(x=75, y=25, text="Skills Strong<br>Culture Risk<br>⚠️ Maybe", showarrow=False,
-                                          font=dict(size=10))
-                fig_matrix.add_annotation(x=25, y=75, text="Culture Fit<br>Skills Gap<br>⚠️ Train", showarrow=False,
-                                          font=dict(size=10))
-                fig_matrix.add_annotation(x=75, y=75, text="Strong Match<br>✅ Hire", showarrow=False,
-                                          font=dict(size=10))
-
-                fig_matrix.update_layout(
-                    xaxis_title="Skill Match Score",
-                    yaxis_title="Team Synergy Score",
-                    xaxis_range=[0, 100],
-                    yaxis_range=[0, 100],
-                    height=500,
-                    showlegend=False
-                )
-
-                st.plotly_chart(fig_matrix, use_container_width=True)
-            else:
-                st.info("Complete CV analysis to see the hiring decision matrix")
+            skill_score = st.session_state.analysis_result.get('matchScore', 0) if st.session_state.analysis_result else None
+            team_dynamics_results_panel(st.session_state.team_dynamics_result, skill_score)
         else:
             st.info("👆 Configure team profile and click 'Analyze Team Dynamics' to see results")
 
+    log_panel_render("team dynamics page", page_started, 0)
+
 
 # ==================== INTERVIEW PAGE ====================
 elif st.session_state.current_page == 'interview':
@@ -1276,16 +2777,40 @@ elif st.session_state.current_page == 'interview':
 
     logger.info("User on Interview Generator page")
 
+    use_bank = st.toggle("📚 Use question bank", value=True,
+                         help="Reuse questions already generated for this job description; "
+                              "only skills not yet covered are sent to the AI")
+
     if st.button("🎯 Generate Personalized Interview Questions", type="primary"):
         if not st.session_state.selected_candidate:
             st.warning("⚠️ Please select a candidate from CV Screening first")
             if st.button("Go to CV Screening"):
                 st.session_state.current_page = 'cv_screening'
                 st.rerun()
+        elif st.session_state.analysis_result and use_bank and not st.session_state.job_description:
+            st.warning("⚠️ Enter the job description on the CV Screening page to use the question bank")
+        elif st.session_state.analysis_result and use_bank:
+            with st.spinner("Assembling interview questions..."):
+                try:
+                    analysis = st.session_state.analysis_result
+                    skills = analysis.get('skillsGap', []) + analysis.get('skillsMatched', [])
+                    questions, llm_calls = assemble_question_set(st.session_state.job_description, skills)
+
+                    stats = st.session_state.question_bank_stats
+                    stats['sets'] += 1
+                    stats['llm_calls'] += llm_calls
+                    logger.info(f"Question bank: {stats['llm_calls']} LLM calls for {stats['sets']} question sets "
+                                f"({stats['sets'] - stats['llm_calls']} saved)")
+
+                    st.session_state.interview_questions = questions
+                    st.success(f"✅ {len(questions)} interview questions ready"
+                               f"{'' if llm_calls else ' (all from question bank)'}!")
+                except Exception as e:
+                    logger.error(f"Interview generation error: {str(e)}", exc_info=True)
+                    st.error(f"Error: {str(e)}")
         elif st.session_state.analysis_result:
             with st.spinner("Generating interview questions..."):
                 try:
-                    client = get_genai_client()
                     candidate = st.session_state.selected_candidate
                     cv_text = candidate['cv_text']
 
@@ -1334,14 +2859,15 @@ JSON format:
   ]
 }}"""
 
-                    resp = client.models.generate_content(model="gemini-2.0-flash-exp", contents=prompt)
-                    response_text = getattr(resp, "text", None) or str(resp)
+                    response_text = call_gemini(prompt, max_output_tokens=4000)
 
                     json_start = response_text.find('{')
                     json_end = response_text.rfind('}') + 1
                     if json_start != -1 and json_end > json_start:
                         result = json.loads(response_text[json_start:json_end])
                         st.session_state.interview_questions = result['questions']
+                        st.session_state.question_bank_stats['sets'] += 1
+                        st.session_state.question_bank_stats['llm_calls'] += 1
                         logger.info(f"Generated {len(result['questions'])} interview questions")
                         st.success("✅ Interview questions generated!")
                     else:
@@ -1352,6 +2878,16 @@ JSON format:
         else:
             st.warning("⚠️ Please complete CV analysis first")
 
+    stats = st.session_state.question_bank_stats
+    if stats['sets']:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Question Sets", stats['sets'])
+        with col2:
+            st.metric("AI Calls", stats['llm_calls'])
+        with col3:
+            st.metric("AI Calls Saved", f"{(stats['sets'] - stats['llm_calls']) / stats['sets'] * 100:.0f}%")
+
     if st.session_state.interview_questions:
         st.markdown("---")
 
@@ -1435,39 +2971,114 @@ elif st.session_state.current_page == 'settings':
 
     logger.info("User on Settings page")
 
+    import pandas as pd
+
     st.subheader("💾 Database Configuration")
     st.info(f"**Current Database:** {DATABASE_PATH}")
 
-    apps = get_all_applications()
+    total_applications = count_applications()
+    analysis_stats = get_analysis_stats()
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Candidates", len(apps))
+        st.metric("Total Candidates", total_applications)
     with col2:
-        analyzed = 1 if st.session_state.analysis_result else 0
-        st.metric("Analyzed Today", analyzed)
+        st.metric("Analyzed Today", analysis_stats['today'])
     with col3:
-        avg_score = st.session_state.analysis_result.get('matchScore', 0) if st.session_state.analysis_result else 0
-        st.metric("Avg Score", f"{avg_score:.0f}")
+        st.metric("Avg Score", f"{analysis_stats['avg_score']:.0f}")
 
     st.markdown("---")
 
     st.subheader("📊 Culture Fit Weights")
     st.info("Default weights for culture fit calculation")
 
+    current_weights = [int(round(w * 100)) for w in st.session_state.culture_fit_weights]
     col1, col2 = st.columns(2)
     with col1:
-        communication_weight = st.slider("Communication Weight", 0, 100, 25)
-        work_process_weight = st.slider("Work Process Weight", 0, 100, 25)
-        checkin_weight = st.slider("Check-in Frequency Weight", 0, 100, 20)
+        communication_weight = st.slider("Communication Weight", 0, 100, current_weights[0])
+        work_process_weight = st.slider("Work Process Weight", 0, 100, current_weights[1])
+        checkin_weight = st.slider("Check-in Frequency Weight", 0, 100, current_weights[2])
     with col2:
-        environment_weight = st.slider("Work Environment Weight", 0, 100, 20)
-        schedule_weight = st.slider("Schedule Structure Weight", 0, 100, 10)
+        environment_weight = st.slider("Work Environment Weight", 0, 100, current_weights[3])
+        schedule_weight = st.slider("Schedule Structure Weight", 0, 100, current_weights[4])
 
     total_weight = communication_weight + work_process_weight + checkin_weight + environment_weight + schedule_weight
     if total_weight != 100:
         st.warning(f"⚠️ Total weight is {total_weight}%. Should be 100%")
     else:
-        st.success("✅ Weights are balanced")
+        st.session_state.culture_fit_weights = [w / 100 for w in [
+            communication_weight, work_process_weight, checkin_weight, environment_weight, schedule_weight
+        ]]
+        st.success("✅ Weights are balanced (used by Team Fit Ranking)")
+
+    st.markdown("---")
+
+    st.subheader("📬 Bulk Notifications")
+    st.caption("Queue shortlist/rejection emails for many candidates, then send them in batches over one SMTP connection")
+
+    if total_applications:
+        apps = search_applications(limit=None)
+        position_bulk = st.text_input("Position Title", placeholder="Software Engineer", key="position_bulk")
+        interview_date_bulk = st.text_input("Interview Date for shortlisted (Optional)",
+                                            placeholder="e.g., Next Monday, 10 AM", key="interview_date_bulk")
+        decisions_df = st.data_editor(
+            pd.DataFrame([{
+                'application_id': app['application_id'],
+                'cv_filename': app['cv_filename'],
+                'email': '',
+                'decision': 'None'
+            } for app in apps]),
+            column_config={
+                'decision': st.column_config.SelectboxColumn("decision", options=['None', 'Shortlist', 'Reject']),
+                'email': st.column_config.TextColumn("email")
+            },
+            disabled=['application_id', 'cv_filename'],
+            hide_index=True,
+            use_container_width=True,
+            key="bulk_decisions"
+        )
+
+        if st.button("📥 Queue Emails", use_container_width=True):
+            # A cleared cell comes back from the editor as None
+            decisions_df['email'] = decisions_df['email'].fillna('').str.strip()
+            selected = decisions_df[decisions_df['decision'].isin(['Shortlist', 'Reject']) & (decisions_df['email'] != '')]
+            if not position_bulk:
+                st.warning("Please enter the position title")
+            elif selected.empty:
+                st.warning("Set an email and a decision for at least one candidate")
+            else:
+                for _, row in selected.iterrows():
+                    if row['decision'] == 'Shortlist':
+                        subject, body = build_shortlist_email(position_bulk, interview_date_bulk or None)
+                        kind = 'shortlist'
+                    else:
+                        subject, body = build_rejection_email(position_bulk)
+                        kind = 'rejection'
+                    enqueue_email(row['email'], subject, body, kind, row['application_id'])
+                st.success(f"✅ Queued {len(selected)} email(s)")
+
+    counts = get_outbox_counts()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Queued", counts['queued'] + counts['sending'])
+    with col2:
+        st.metric("Sent", counts['sent'])
+    with col3:
+        st.metric("Failed", counts['failed'])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("📤 Send Queued Emails", type="primary", use_container_width=True, disabled=counts['queued'] == 0):
+            if not email_configured():
+                st.error("⚠️ Email credentials not configured in .env file")
+            else:
+                progress_bar = st.progress(0.0, text="Sending...")
+                outcome = drain_outbox(
+                    progress=lambda done, total: progress_bar.progress(done / total, text=f"Sent {done}/{total}")
+                )
+                st.success(f"✅ {outcome['sent']} sent, {outcome['retrying']} to retry, {outcome['failed']} failed")
+    with col2:
+        if st.button("🔁 Retry Failed", use_container_width=True, disabled=counts['failed'] == 0):
+            st.info(f"Re-queued {retry_failed_emails()} email(s)")
 
     st.markdown("---")
 
@@ -1477,6 +3088,7 @@ elif st.session_state.current_page == 'settings':
     with col1:
         if st.button("Clear CV Analysis", use_container_width=True):
             st.session_state.analysis_result = None
+            st.session_state.hiring_brief = None
             logger.info("CV analysis cleared")
             st.success("Cleared!")
 
@@ -1499,19 +3111,39 @@ elif st.session_state.current_page == 'settings':
     col1, col2 = st.columns([3, 1])
 
     with col1:
-        st.info(f"**Log File Location:** app.log")
+        st.info(f"**Log File Location:** {LOG_FILE} (+ {LOG_BACKUP_COUNT} rotated backups)")
         st.caption("All system activities are logged with timestamps and detailed information")
 
     with col2:
+        tail_lines = st.number_input("Lines", min_value=10, max_value=5000, value=200, step=50)
         if st.button("View Logs", use_container_width=True):
-            try:
-                with open('app.log', 'r') as f:
-                    log_content = f.read()
-                st.text_area("Recent Logs (Last 5000 chars)", log_content[-5000:], height=400)
+            lines = tail_log(LOG_FILE, int(tail_lines))
+            if lines:
+                st.text_area(f"Recent Logs (Last {len(lines)} lines)", "\n".join(lines), height=400)
                 logger.info("User viewed system logs")
-            except FileNotFoundError:
+            else:
                 st.warning("Log file not found yet")
 
+    with st.expander("🔎 Search Logs"):
+        col1, col2 = st.columns(2)
+        with col1:
+            search_levels = st.multiselect("Levels", LOG_LEVELS, default=["WARNING", "ERROR", "CRITICAL"])
+            search_text = st.text_input("Contains", placeholder="e.g. Gemini API error")
+        with col2:
+            search_dates = st.date_input("Date range", value=())
+            search_limit = st.number_input("Max results", min_value=10, max_value=5000, value=200, step=50)
+
+        if st.button("Search", use_container_width=True):
+            start = f"{search_dates[0]} 00:00:00" if len(search_dates) >= 1 else None
+            end = f"{search_dates[-1]} 23:59:59" if len(search_dates) >= 1 else None
+            records = search_logs(search_levels, start, end, search_text, int(search_limit))
+            logger.info(f"Log search returned {len(records)} records")
+            if records:
+                st.text_area(f"{len(records)} matching records (newest first)",
+                             "\n".join(r['record'] for r in records), height=400)
+            else:
+                st.info("No matching log records")
+
     st.markdown("---")
 
     st.subheader("📊 System Information")
@@ -1555,8 +3187,8 @@ applications table:
 
         Current Status:
         """)
-        if SENDER_EMAIL and SENDER_PASSWORD:
-            st.success(f"✅ Email configured: {SENDER_EMAIL}")
+        if email_configured():
+            st.success(f"✅ Email configured: {SENDER_EMAIL or SMTP_HOST}")
         else:
             st.error("❌ Email credentials not configured")
             st.info("Add SENDER_EMAIL and SENDER_PASSWORD to your .env file")
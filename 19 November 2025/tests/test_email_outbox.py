@@ -0,0 +1,153 @@
+"""
+Email outbox delivery against a local aiosmtpd stand-in SMTP server.
+
+    pip install pytest aiosmtpd
+    python -m pytest "19 November 2025/tests"
+"""
+
+import importlib.util
+import os
+import socket
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+APP_PATH = Path(__file__).resolve().parent.parent / "streamlit_app (1).py"
+REJECTED_RECIPIENT = "bounce@example.com"
+MAX_ATTEMPTS = 2
+
+
+class RecordingHandler:
+    """Accepts every message except those for REJECTED_RECIPIENT and keeps what it received."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REJECTED_RECIPIENT:
+            return "550 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((list(envelope.rcpt_tos), envelope.content.decode("utf-8", errors="replace")))
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def smtp_server():
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture(scope="module")
+def app(smtp_server, tmp_path_factory):
+    """The RecruitIQ module, pointed at a scratch database and the stand-in server."""
+    controller, _ = smtp_server
+    workdir = tmp_path_factory.mktemp("recruitiq")
+    env = {
+        "DATABASE_PATH": str(workdir / "applications.db"),
+        "SMTP_HOST": controller.hostname,
+        "SMTP_PORT": str(controller.port),
+        "SMTP_USE_TLS": "false",
+        "SMTP_ALLOW_ANONYMOUS": "true",
+        "SENDER_EMAIL": "",
+        "SENDER_PASSWORD": "",
+        "OUTBOX_MAX_ATTEMPTS": str(MAX_ATTEMPTS),
+    }
+    previous_env = {key: os.environ.get(key) for key in env}
+    previous_cwd = os.getcwd()
+    os.environ.update(env)
+    os.chdir(workdir)  # app.log is written to the working directory
+    try:
+        spec = importlib.util.spec_from_file_location("recruitiq_app", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        os.chdir(previous_cwd)
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@pytest.fixture
+def outbox(app, smtp_server):
+    """Empty outbox and inbox before every test; returns a function listing outbox rows."""
+    app.init_email_outbox()
+    with sqlite3.connect(app.DATABASE_PATH) as conn:
+        conn.execute("DELETE FROM email_outbox")
+    smtp_server[1].messages.clear()
+
+    def rows():
+        with sqlite3.connect(app.DATABASE_PATH) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute("SELECT * FROM email_outbox ORDER BY id")]
+    return rows
+
+
+def test_drain_outbox_delivers_every_message(app, smtp_server, outbox):
+    recipients = [f"candidate{i}@example.com" for i in range(5)]
+    for i, recipient in enumerate(recipients):
+        app.enqueue_email(recipient, f"Subject {i}", f"<p>Body {i}</p>", "shortlist", f"APP-{i}")
+
+    progress = []
+    result = app.drain_outbox(batch_size=2, progress=lambda done, total: progress.append((done, total)))
+
+    assert result == {'sent': 5, 'failed': 0, 'retrying': 0}
+    assert progress[-1] == (5, 5)
+    received = smtp_server[1].messages
+    assert [rcpt for rcpt, _ in received] == [[recipient] for recipient in recipients]
+    assert all(f"Subject: Subject {i}" in content for i, (_, content) in enumerate(received))
+    for row in outbox():
+        assert row['status'] == 'sent'
+        assert row['attempts'] == 1
+        assert row['last_error'] is None
+        assert row['sent_at'] is not None
+    assert app.get_outbox_counts() == {'queued': 0, 'sending': 0, 'sent': 5, 'failed': 0}
+
+
+def test_drain_outbox_retries_then_fails_rejected_recipient(app, smtp_server, outbox):
+    app.enqueue_email("ok@example.com", "Hello", "<p>Hi</p>", "rejection", "APP-OK")
+    app.enqueue_email(REJECTED_RECIPIENT, "Hello", "<p>Hi</p>", "rejection", "APP-BOUNCE")
+
+    first = app.drain_outbox()
+    assert first == {'sent': 1, 'failed': 0, 'retrying': 1}
+    sent, bounced = outbox()
+    assert (sent['status'], sent['attempts']) == ('sent', 1)
+    assert (bounced['status'], bounced['attempts']) == ('queued', 1)
+    assert "550" in bounced['last_error']
+
+    for _ in range(MAX_ATTEMPTS - 1):
+        app.drain_outbox()
+    assert outbox()[1]['status'] == 'failed'
+    assert outbox()[1]['attempts'] == MAX_ATTEMPTS
+    assert [rcpt for rcpt, _ in smtp_server[1].messages] == [["ok@example.com"]]
+
+    assert app.retry_failed_emails() == 1
+    assert outbox()[1]['status'] == 'queued'
+
+
+def test_drain_outbox_leaves_messages_queued_when_server_is_down(app, outbox, monkeypatch):
+    app.enqueue_email("later@example.com", "Hello", "<p>Hi</p>", "shortlist", "APP-LATER")
+    monkeypatch.setattr(app, "SMTP_PORT", free_port())
+
+    result = app.drain_outbox()
+
+    assert result == {'sent': 0, 'failed': 0, 'retrying': 1}
+    (row,) = outbox()
+    assert (row['status'], row['attempts']) == ('queued', 1)
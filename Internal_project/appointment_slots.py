@@ -0,0 +1,72 @@
+"""
+Slot conflict checks for ClinIQ appointments.
+
+Bookings are [start, end) intervals in minutes since midnight. One
+department's bookings on one day never overlap, since every booking is
+checked first, so a request only has to be compared with its two
+neighbours: the booking starting latest before it and the one starting
+earliest at or after it. The caller reads those from an index in
+O(log n); nothing here needs the whole day.
+"""
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class SlotConflict(Exception):
+    """Requested slot overlaps an existing booking (or does not fit in the day)."""
+
+    def __init__(self, message, next_free=None):
+        super().__init__(message)
+        self.next_free = next_free
+
+
+def to_minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def from_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def overlap(start: int, end: int, before=None, after=None):
+    """The neighbouring booking overlapping [start, end) as (start, end), or None.
+
+    before starts before `start`, after starts at or after it; either may be None.
+    """
+    if before and before[1] > start:
+        return before
+    if after and after[0] < end:
+        return after
+    return None
+
+
+def next_free(start: int, duration: int, bookings, day_end: int = MINUTES_PER_DAY):
+    """Earliest start >= start where a booking of this duration fits, or None.
+
+    bookings yields (start, end) in start order, from the booking before `start`
+    onwards; it is only read up to the first gap that fits.
+    """
+    for booking_start, booking_end in bookings:
+        if start + duration > day_end or booking_start >= start + duration:
+            break
+        start = max(start, booking_end)
+    return start if start + duration <= day_end else None
+
+
+def check(start: int, duration: int, before, after, bookings_from):
+    """Raise SlotConflict (with the next free start) unless [start, start + duration) is free.
+
+    before/after are the neighbouring bookings; bookings_from() yields the day's
+    bookings for next_free() and is only called when there is a conflict.
+    """
+    end = start + duration
+    if end > MINUTES_PER_DAY:
+        raise SlotConflict("Appointments must end by midnight")
+    clash = overlap(start, end, before, after)
+    if clash:
+        raise SlotConflict(
+            f"{from_minutes(start)}-{from_minutes(end)} overlaps the booking at "
+            f"{from_minutes(clash[0])}-{from_minutes(clash[1])}",
+            next_free(start, duration, bookings_from())
+        )
@@ -0,0 +1,106 @@
+"""
+Startup and rerun latency benchmark for ClinIQ.
+
+Drives main.py headlessly with Streamlit's AppTest and reports:
+- cold start (first script run in a fresh process)
+- warm rerun latency per page
+- how many MongoClient / Gemini model objects were constructed
+
+Runs against mongomock by default (pip install mongomock), or a real server:
+    python bench_startup.py
+    python bench_startup.py --mongo-uri mongodb://localhost:27017 --reruns 50
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from unittest import mock
+
+APP_FILE = Path(__file__).parent / "main.py"
+PAGES = ["🏠 Home", "📄 Report Analyzer", "💬 Report Chatbot", "📚 Knowledge Base", "🤖 Hospital Assistant"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ClinIQ startup and rerun latency")
+    parser.add_argument("--mongo-uri", default="", help="Real MongoDB URI; mongomock is used when omitted")
+    parser.add_argument("--reruns", type=int, default=20, help="Warm reruns per page")
+    parser.add_argument("--health-checks", type=int, default=5, help="Database pings to time")
+    return parser.parse_args()
+
+
+def counting(factory, counter, key):
+    def build(*args, **kwargs):
+        counter[key] += 1
+        return factory(*args, **kwargs)
+    return build
+
+
+def main():
+    args = parse_args()
+    from streamlit.testing.v1 import AppTest
+    import pymongo
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+    counts = {"mongo_clients": 0, "gemini_models": 0}
+    patches = []
+
+    if args.mongo_uri:
+        os.environ["MONGODB_URI"] = args.mongo_uri
+        client_factory = pymongo.MongoClient
+    else:
+        import mongomock
+        import mongomock.gridfs
+        mongomock.gridfs.enable_gridfs_integration()
+        os.environ["MONGODB_URI"] = "mongodb://mongomock"
+        client_factory = mongomock.MongoClient
+    patches.append(mock.patch("pymongo.MongoClient", counting(client_factory, counts, "mongo_clients")))
+
+    try:
+        import google.generativeai as genai
+        patches.append(mock.patch.object(genai, "GenerativeModel",
+                                         counting(mock.MagicMock, counts, "gemini_models")))
+    except ImportError:
+        pass
+
+    for patch in patches:
+        patch.start()
+
+    app = AppTest.from_file(str(APP_FILE), default_timeout=60)
+
+    start = time.perf_counter()
+    app.run()
+    cold_ms = (time.perf_counter() - start) * 1000
+    if app.exception:
+        print(f"App raised: {app.exception}")
+        sys.exit(1)
+    print(f"Cold start (Home):          {cold_ms:8.1f} ms")
+    print(f"Mongo clients after Home:   {counts['mongo_clients']}")
+
+    for page in PAGES:
+        app.sidebar.radio(key="nav_radio").set_value(page).run()
+        timings = []
+        for _ in range(args.reruns):
+            start = time.perf_counter()
+            app.run()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"Rerun {page:<24} p50 {statistics.median(timings):7.1f} ms   max {max(timings):7.1f} ms")
+
+    timings = []
+    for _ in range(args.health_checks):
+        start = time.perf_counter()
+        app.sidebar.button(key="mongo_health").click().run()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"Health check rerun          p50 {statistics.median(timings):7.1f} ms")
+
+    print(f"MongoClient constructions:  {counts['mongo_clients']}")
+    print(f"Gemini model constructions: {counts['gemini_models']}")
+
+    for patch in patches:
+        patch.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Throughput benchmark for the triage red-flag screen (triage_rules.py).
+
+Checks a fixed set of regression sentences, then generates a large
+synthetic set of symptom descriptions: benign ones, ones with a red flag,
+ones with a negated red flag or a negated list of them, past-history
+mentions ("history of seizures"), and red flags following an unrelated
+negation ("no relief at all, crushing chest pain"). It then reports:
+- descriptions/second and per-description latency for the combined regex
+- the same for a naive baseline that tries each lexicon pattern separately
+- precision/recall against the synthetic labels
+
+    python bench_triage_rules.py
+    python bench_triage_rules.py --count 500000 --seed 1
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+import statistics
+
+import triage_rules
+
+BENIGN = [
+    "mild headache since yesterday", "runny nose and sneezing", "sore throat for two days",
+    "low grade fever", "dry cough at night", "lower back ache after lifting boxes", "itchy rash on my forearm",
+    "feeling tired all week", "upset stomach after dinner", "twisted my ankle playing football",
+    "ear pain on the left side", "occasional dizziness when standing up", "heartburn after spicy food",
+    "joint stiffness in the morning", "trouble sleeping", "blocked sinuses", "watery eyes",
+    "pain when urinating", "nausea in the mornings", "muscle cramps in my calves",
+]
+RED_FLAGS = [
+    "crushing chest pain", "chest tightness", "I can't breathe", "shortness of breath", "difficulty breathing",
+    "my face is drooping", "slurred speech", "worst headache of my life", "she passed out", "he is unresponsive",
+    "had a seizure", "vomiting blood", "bleeding that won't stop", "my throat is swelling", "anaphylactic reaction",
+    "I feel suicidal", "stiff neck with a high fever", "hit by a car", "severe burns on both arms",
+    "pain radiating to my left arm",
+]
+NEGATIONS = ["no", "denies", "without", "never had", "negative for", "doesn't have", "not having"]
+# Red flags as they appear in a negated list ("denies chest pain or shortness of breath")
+LIST_FLAGS = ["chest pain", "chest tightness", "shortness of breath", "difficulty breathing", "slurred speech",
+              "facial droop", "seizures", "convulsions", "vomiting blood", "unconscious", "anaphylaxis", "head injury"]
+LIST_JOINERS = [" or ", ", ", ", or ", " nor "]
+# Past episodes that are history, not a current red flag
+HISTORY = ["history of seizures", "family history of heart attack", "father had a heart attack last year",
+           "had a seizure as a child", "past history of head injury", "mother died of a heart attack",
+           "had convulsions two years ago"]
+# Clauses that contain a negation cue but do not negate a following red flag
+UNRELATED_NEGATIONS = ["no relief at all", "never had this before", "I do not know why", "cough resolved",
+                       "not sure what happened", "no history of heart problems"]
+
+# (description, is_emergency) cases the screen must always get right
+REGRESSION_CASES = [
+    ("I do not know why I passed out", True),
+    ("No relief at all, crushing chest pain now", True),
+    ("Never had this before, chest pain and sweating", True),
+    ("cough resolved, now coughing up blood", True),
+    ("I can not stop having seizures", True),
+    ("Crushing chest pain and I can't breathe", True),
+    ("no fever and chest pain", True),
+    ("No chest pain, mild cough", False),
+    ("Denies any shortness of breath", False),
+    ("she doesn't have chest pain", False),
+    ("never had a seizure", False),
+    ("negative for seizures, headache since yesterday", False),
+    ("denies chest pain or shortness of breath", False),
+    ("not having chest pain", False),
+    ("patient is not unconscious", False),
+    ("father had a heart attack last year", False),
+    ("history of seizures as a child", False),
+    ("denies chest pain, now coughing up blood", True),
+    ("I had a seizure this morning", True),
+    ("history of asthma, crushing chest pain", True),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the triage red-flag screen")
+    parser.add_argument("--count", type=int, default=200_000, help="Synthetic descriptions to classify")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline-count", type=int, default=20_000,
+                        help="Descriptions for the slower per-pattern baseline")
+    return parser.parse_args()
+
+
+def synthetic_descriptions(count, rng):
+    """[(text, is_emergency)] with ~20% red flags (a quarter of them after an unrelated
+    negation), ~15% negated red flags (a third of them negated lists) and ~5% past history."""
+    samples = []
+    for _ in range(count):
+        parts = rng.sample(BENIGN, rng.randint(1, 4))
+        roll = rng.random()
+        emergency = roll < 0.2
+        if roll < 0.05:
+            flag = f"{rng.choice(UNRELATED_NEGATIONS)}, {rng.choice(RED_FLAGS)}"
+            parts.insert(rng.randrange(len(parts) + 1), flag)
+        elif emergency:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(RED_FLAGS))
+        elif roll < 0.35:
+            if roll < 0.25:
+                phrase = rng.choice(LIST_JOINERS).join(rng.sample(LIST_FLAGS, 2))
+            else:
+                phrase = re.sub(r"^(?:I feel|I|my|she|he is|had a) ", "", rng.choice(RED_FLAGS))
+            parts.insert(rng.randrange(len(parts) + 1), f"{rng.choice(NEGATIONS)} {phrase}")
+        elif roll < 0.4:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(HISTORY))
+        samples.append((", ".join(parts).capitalize(), emergency))
+    return samples
+
+
+def naive_red_flags(text, patterns):
+    # Every pattern's matches, leftmost-longest first, without overlaps
+    spans = sorted((match.start(), -match.end(), flag) for flag, pattern in patterns for match in pattern.finditer(text))
+    kept = []
+    for start, neg_end, flag in spans:
+        if not kept or start >= kept[-1][2]:
+            kept.append((flag, start, -neg_end))
+    flags = []
+    for match in triage_rules._resolve(text, kept):
+        if not match.negated and match.flag not in flags:
+            flags.append(match.flag)
+    return flags
+
+
+def run(label, classify, samples):
+    latencies_us = []
+    predictions = []
+    start = time.perf_counter()
+    for text, _ in samples:
+        t0 = time.perf_counter()
+        predictions.append(bool(classify(text)))
+        latencies_us.append((time.perf_counter() - t0) * 1e6)
+    elapsed = time.perf_counter() - start
+    latencies_us.sort()
+    print(f"{label:<18} {len(samples) / elapsed:12,.0f} descriptions/s   "
+          f"p50 {statistics.median(latencies_us):6.1f} us   p99 {latencies_us[int(len(latencies_us) * 0.99)]:6.1f} us")
+    return predictions
+
+
+def check_regressions():
+    failures = [(text, expected) for text, expected in REGRESSION_CASES
+                if triage_rules.is_emergency(text) != expected]
+    for text, expected in failures:
+        print(f"REGRESSION: expected {'emergency' if expected else 'no red flag'} for: {text!r}")
+    print(f"{len(REGRESSION_CASES) - len(failures)}/{len(REGRESSION_CASES)} regression cases pass")
+    return not failures
+
+
+def main():
+    args = parse_args()
+    if not check_regressions():
+        sys.exit(1)
+    rng = random.Random(args.seed)
+    samples = synthetic_descriptions(args.count, rng)
+    patterns = [(flag, re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE))
+                for flag, group in triage_rules.RED_FLAG_LEXICON.items() for pattern in group]
+
+    print(f"{len(samples):,} synthetic descriptions, {len(patterns)} lexicon patterns, "
+          f"{sum(label for _, label in samples):,} true emergencies")
+    predictions = run("combined regex", triage_rules.red_flags, samples)
+    baseline_samples = samples[:args.baseline_count]
+    baseline = run("per-pattern loop", lambda text: naive_red_flags(text, patterns), baseline_samples)
+
+    assert baseline == predictions[:len(baseline)], "combined regex disagrees with the per-pattern baseline"
+
+    true_pos = sum(p and label for p, (_, label) in zip(predictions, samples))
+    false_pos = sum(p and not label for p, (_, label) in zip(predictions, samples))
+    false_neg = sum(label and not p for p, (_, label) in zip(predictions, samples))
+    print(f"precision {true_pos / max(1, true_pos + false_pos):.4f}   recall {true_pos / max(1, true_pos + false_neg):.4f}   "
+          f"false positives {false_pos}   false negatives {false_neg}")
+
+
+if __name__ == "__main__":
+    main()
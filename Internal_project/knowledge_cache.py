@@ -0,0 +1,147 @@
+"""
+Persistent cache for ClinIQ Knowledge Base lookups.
+
+Queries are normalized (case, whitespace, punctuation, synonyms) so that
+"Diabetes", "diabetes " and "Diabetes Mellitus" share one entry, and so
+do "type-2 diabetes" and "type 2 diabetes". Entries older than the TTL
+are refreshed on the next lookup; if the refresh fails the stale entry
+is still served.
+
+Used by main.py and by prewarm_knowledge_base.py.
+"""
+
+import logging
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Where main.py writes its ClinIQ_*.log files and the prewarm job reads them,
+# whatever the working directory of either
+LOG_DIR = Path(os.getenv("CLINIQ_LOG_DIR") or Path(__file__).resolve().parent / "logs")
+
+SEARCH_LOG_PATTERN = re.compile(r"Searching medical information for: (.+?)\s*$")
+
+# Alternative names -> canonical condition (all already normalized)
+SYNONYMS = {
+    "diabetes mellitus": "diabetes",
+    "dm": "diabetes",
+    "sugar": "diabetes",
+    "type ii diabetes": "type 2 diabetes",
+    "t2dm": "type 2 diabetes",
+    "type 2 diabetes mellitus": "type 2 diabetes",
+    "type i diabetes": "type 1 diabetes",
+    "t1dm": "type 1 diabetes",
+    "type 1 diabetes mellitus": "type 1 diabetes",
+    "high blood pressure": "hypertension",
+    "htn": "hypertension",
+    "low blood pressure": "hypotension",
+    "heart attack": "myocardial infarction",
+    "mi": "myocardial infarction",
+    "cva": "stroke",
+    "brain attack": "stroke",
+    "high cholesterol": "hypercholesterolemia",
+    "acid reflux": "gastroesophageal reflux disease",
+    "gerd": "gastroesophageal reflux disease",
+    "heartburn": "gastroesophageal reflux disease",
+    "copd": "chronic obstructive pulmonary disease",
+    "ckd": "chronic kidney disease",
+    "kidney disease": "chronic kidney disease",
+    "uti": "urinary tract infection",
+    "flu": "influenza",
+    "covid": "covid-19",
+    "covid 19": "covid-19",
+    "coronavirus": "covid-19",
+    "underactive thyroid": "hypothyroidism",
+    "overactive thyroid": "hyperthyroidism",
+    "migraine headache": "migraine",
+    "low iron": "iron deficiency anemia",
+    "iron deficiency anaemia": "iron deficiency anemia",
+    "anaemia": "anemia",
+}
+
+
+def normalize_condition(query: str) -> str:
+    """Canonical cache key for a condition query."""
+    key = re.sub(r"[^\w\s]", " ", (query or "").lower())
+    key = " ".join(key.split())
+    return SYNONYMS.get(key, key)
+
+
+def build_medical_info_prompt(condition: str) -> str:
+    return f"""
+        Provide authoritative medical information about: {condition}
+
+        Include:
+        1. Definition and Overview
+        2. Common Symptoms
+        3. Typical Causes
+        4. Standard Treatment Options
+        5. When to Seek Medical Care
+
+        Base this on established medical knowledge and guidelines.
+        """
+
+
+def top_searched_conditions(log_lines, limit: int = 50):
+    """Most searched canonical conditions in ClinIQ log lines, as [(condition, count)]."""
+    counts = Counter()
+    for line in log_lines:
+        match = SEARCH_LOG_PATTERN.search(line)
+        if match:
+            key = normalize_condition(match.group(1))
+            if key:
+                counts[key] += 1
+    return counts.most_common(limit)
+
+
+class KnowledgeCache:
+    """Knowledge Base answers in a Mongo collection, keyed by canonical condition."""
+
+    def __init__(self, collection, ttl_days: int = 30):
+        self.collection = collection
+        self.ttl = timedelta(days=ttl_days)
+        self.collection.create_index("fetched_at")
+
+    def get(self, condition: str):
+        """Cached entry for a query, or None. The entry carries a 'stale' flag."""
+        doc = self.collection.find_one({"_id": normalize_condition(condition)})
+        if doc:
+            doc["stale"] = datetime.now() - doc["fetched_at"] > self.ttl
+        return doc
+
+    def put(self, condition: str, text: str):
+        key = normalize_condition(condition)
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"text": text, "fetched_at": datetime.now()}, "$setOnInsert": {"hits": 0}},
+            upsert=True
+        )
+
+    def is_fresh(self, condition: str) -> bool:
+        doc = self.get(condition)
+        return bool(doc) and not doc["stale"]
+
+    def get_or_fetch(self, condition: str, fetch, refresh: bool = False):
+        """Return (text, from_cache). fetch(canonical_condition) is called on a miss or stale entry."""
+        key = normalize_condition(condition)
+        doc = None if refresh else self.get(key)
+
+        if doc and not doc["stale"]:
+            self.collection.update_one({"_id": key}, {"$inc": {"hits": 1}})
+            logger.info(f"Knowledge cache hit: '{condition}' -> '{key}'")
+            return doc["text"], True
+
+        try:
+            text = fetch(key)
+        except Exception:
+            if doc:
+                logger.warning(f"Refreshing '{key}' failed, serving stale entry")
+                return doc["text"], True
+            raise
+        self.put(key, text)
+        logger.info(f"Knowledge cache {'refresh' if doc else 'miss'}: '{condition}' -> '{key}'")
+        return text, False
@@ -1,76 +1,366 @@
 import streamlit as st
-import google.generativeai as genai
 from datetime import datetime, timedelta
 import json
 import os
+import time
+import hashlib
 from dotenv import load_dotenv
 import re
-import PyPDF2
-from io import BytesIO
+import pdf_extract
+import report_index
+import knowledge_cache
+import appointment_slots
+import triage_rules
+from appointment_slots import SlotConflict
 import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from pymongo import MongoClient
-import gridfs
 from typing import LiteralString
 
+# Load environment variables
+load_dotenv()
+
 # MongoDB Configuration
-MONGODB_URI = <YOUR MONGODB UR>
-if not MONGODB_URI:
-    raise RuntimeError("Set the MONGODB_URI environment variable first")
+MONGODB_URI = os.getenv("MONGODB_URI")
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "medreport")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+
+# Gemini Configuration
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash-exp")
+
+# Report analysis cache: bump the prompt version whenever the analysis prompt changes
+ANALYSIS_PROMPT_VERSION = "v1"
+ANALYSIS_CACHE_TTL_DAYS = int(os.getenv("ANALYSIS_CACHE_TTL_DAYS", "30"))
+
+# Report chatbot context: only the best-matching report chunks plus a short analysis summary
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1200"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "300"))
+CHAT_TOP_K_CHUNKS = int(os.getenv("CHAT_TOP_K_CHUNKS", "6"))
+
+# Knowledge Base answers are cached per canonical condition and refreshed after the TTL
+KB_CACHE_TTL_DAYS = int(os.getenv("KB_CACHE_TTL_DAYS", "30"))
+
+# Appointments
+APPOINTMENT_PAGE_SIZE = int(os.getenv("APPOINTMENT_PAGE_SIZE", "10"))
+APPOINTMENT_DURATIONS = [15, 30, 45, 60, 90]
+# Bookings for one department and day are serialized through a lock document
+SLOT_LOCK_TTL_SECONDS = int(os.getenv("SLOT_LOCK_TTL_SECONDS", "10"))
+SLOT_LOCK_WAIT_SECONDS = float(os.getenv("SLOT_LOCK_WAIT_SECONDS", "5"))
+DEPARTMENTS = [
+    "General Medicine", "Cardiology", "Dermatology", "Endocrinology", "ENT", "Gastroenterology",
+    "Gynecology", "Neurology", "Ophthalmology", "Orthopedics", "Pediatrics", "Psychiatry", "Pulmonology"
+]
+
+
+@st.cache_resource
+def configure_logging():
+    """Attach the file/console handlers once per process, not on every rerun."""
+    log_dir = knowledge_cache.LOG_DIR
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / f'ClinIQ_{datetime.now().strftime("%Y%m%d")}.log'),
+            logging.StreamHandler()
+        ]
+    )
+    app_logger = logging.getLogger(__name__)
+    app_logger.info("Application started")
+    return app_logger
 
-client = MongoClient(MONGODB_URI)
-db = client["medreport"]
-collection = db["appointments"]
-fs = gridfs.GridFS(db, collection="pdfs")
 
+logger = configure_logging()
 
-def upload_pdf(uploaded_file, metadata=None):
-    """Upload a PDF from Streamlit UploadedFile; returns the file id."""
-    metadata = metadata or {}
-    return fs.put(
-        uploaded_file.read(),
-        filename=uploaded_file.name,
-        contentType="application/pdf",
-        **metadata
+
+# MongoDB: one pooled client per process, created on first use
+@st.cache_resource
+def get_mongo_client():
+    """Shared MongoClient; pages that never touch Mongo never connect."""
+    from pymongo import MongoClient
+
+    if not MONGODB_URI:
+        raise RuntimeError("Set the MONGODB_URI environment variable first")
+
+    mongo_client = MongoClient(
+        MONGODB_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        appname="ClinIQ"
+    )
+    logger.info(f"MongoDB client created (maxPoolSize={MONGO_MAX_POOL_SIZE})")
+    return mongo_client
+
+
+def get_db():
+    return get_mongo_client()[MONGODB_DB_NAME]
+
+
+@st.cache_resource
+def get_appointments_collection():
+    """Appointments: one document per booking, with date "YYYY-MM-DD", time "HH:MM" and
+    start_minute/end_minute for slot checks. Documents booked before departments
+    existed have no department and are never part of a slot check."""
+    appointments = get_db()["appointments"]
+    # Date-range listing sorted by time; unique so one department slot can't be booked twice
+    appointments.create_index(
+        [("date", 1), ("time", 1), ("department", 1)],
+        unique=True,
+        partialFilterExpression={"department": {"$exists": True}},
+        name="date_time_department"
     )
+    appointments.create_index([("department", 1), ("date", 1), ("start_minute", 1)], name="department_day_slots")
+    return appointments
 
 
-# Configure logging
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
+def _appointment_filter(start_date, end_date, department=None):
+    query = {"date": {"$gte": start_date, "$lte": end_date}}
+    if department:
+        query["department"] = department
+    return query
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / f'ClinIQ_{datetime.now().strftime("%Y%m%d")}.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-logger.info("Application started")
+def list_appointments(start_date, end_date, department=None, page=0, page_size=APPOINTMENT_PAGE_SIZE):
+    """One page of appointments between two "YYYY-MM-DD" dates (inclusive), in date/time order."""
+    cursor = get_appointments_collection().find(
+        _appointment_filter(start_date, end_date, department),
+        {"details": 0}
+    ).sort([("date", 1), ("time", 1)]).skip(page * page_size).limit(page_size)
+    return list(cursor)
+
+
+def count_appointments(start_date, end_date, department=None):
+    return get_appointments_collection().count_documents(_appointment_filter(start_date, end_date, department))
+
+
+SLOT_PROJECTION = {"_id": 0, "start_minute": 1, "end_minute": 1}
+
+
+def _slot_interval(doc):
+    return (doc["start_minute"], doc["end_minute"]) if doc else None
+
+
+def slot_neighbours(department, date, start):
+    """The department's bookings that day either side of `start` as (start, end) or None:
+    the latest starting before it and the earliest starting at or after it. Two indexed
+    lookups on department_day_slots, however many bookings the day has."""
+    appointments = get_appointments_collection()
+    day = {"department": department, "date": date}
+    before = appointments.find_one({**day, "start_minute": {"$lt": start}}, SLOT_PROJECTION,
+                                   sort=[("start_minute", -1)])
+    after = appointments.find_one({**day, "start_minute": {"$gte": start}}, SLOT_PROJECTION,
+                                  sort=[("start_minute", 1)])
+    return _slot_interval(before), _slot_interval(after)
+
+
+def slot_bookings_from(department, date, start, before):
+    """The day's bookings in start order from `before` onwards, read lazily from the index."""
+    if before:
+        yield before
+    cursor = get_appointments_collection().find(
+        {"department": department, "date": date, "start_minute": {"$gte": start}}, SLOT_PROJECTION
+    ).sort("start_minute", 1)
+    for doc in cursor:
+        yield _slot_interval(doc)
+
+
+@contextmanager
+def slot_lock(department, date):
+    """Hold the booking lock for one department and day.
 
-# Configure Gemini
-api_key = os.getenv('GEMINI_API_KEY')
-if not api_key:
-    logger.error("GEMINI_API_KEY not found in environment variables")
-    st.error("❌ GEMINI_API_KEY not found in .env file!")
-    st.stop()
+    The lock is a slot_locks document taken with find_one_and_update: the upsert
+    fails with a duplicate key while another session holds an unexpired lock.
+    A lock left by a crashed session expires after SLOT_LOCK_TTL_SECONDS.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    locks = get_db()["slot_locks"]
+    key = f"{department}|{date}"
+    owner = os.urandom(8).hex()
+    deadline = time.monotonic() + SLOT_LOCK_WAIT_SECONDS
+    while True:
+        now = datetime.now()
+        try:
+            locks.find_one_and_update(
+                {"_id": key, "expires_at": {"$lt": now}},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=SLOT_LOCK_TTL_SECONDS)}},
+                upsert=True
+            )
+            break
+        except DuplicateKeyError:
+            if time.monotonic() > deadline:
+                raise SlotConflict(f"{department} bookings for {date} are busy, please try again")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        locks.delete_one({"_id": key, "owner": owner})
+
+
+def get_cases_collection():
+    return get_db()["cases"]
+
+
+@st.cache_resource
+def get_gridfs():
+    import gridfs
+
+    db = get_db()
+    # One stored copy per distinct file; older documents without a hash are left alone
+    db["pdfs.files"].create_index(
+        "sha256",
+        unique=True,
+        partialFilterExpression={"sha256": {"$exists": True}},
+        name="sha256_unique"
+    )
+    return gridfs.GridFS(db, collection="pdfs")
+
+
+def mongo_health_check():
+    """Ping MongoDB; returns (ok, message)."""
+    try:
+        start = time.perf_counter()
+        get_mongo_client().admin.command("ping")
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"MongoDB health check ok ({latency_ms:.1f} ms)")
+        return True, f"Connected ({latency_ms:.0f} ms)"
+    except Exception as e:
+        logger.error(f"MongoDB health check failed: {str(e)}")
+        return False, str(e)
+
+
+UPLOAD_CHUNK_SIZE = 255 * 1024  # GridFS default chunk size
+
+
+def _iter_file_chunks(file_obj, chunk_size=UPLOAD_CHUNK_SIZE):
+    file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def upload_pdf(uploaded_file, metadata=None):
+    """Upload a PDF from Streamlit UploadedFile; returns the file id.
+
+    The file is streamed into GridFS in chunks. A file whose SHA-256 is
+    already stored is not written again; the existing id is returned.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    try:
+        metadata = metadata or {}
+        fs = get_gridfs()
+        files = get_db()["pdfs.files"]
+
+        sha = hashlib.sha256()
+        for chunk in _iter_file_chunks(uploaded_file):
+            sha.update(chunk)
+        digest = sha.hexdigest()
+
+        existing = files.find_one({"sha256": digest}, {"_id": 1})
+        if existing:
+            logger.info(f"PDF already stored ({digest[:12]}), reusing file {existing['_id']}")
+            return existing["_id"]
+
+        grid_in = fs.new_file(
+            filename=uploaded_file.name,
+            contentType="application/pdf",
+            sha256=digest,
+            chunkSize=UPLOAD_CHUNK_SIZE,
+            **metadata
+        )
+        try:
+            for chunk in _iter_file_chunks(uploaded_file):
+                grid_in.write(chunk)
+            grid_in.close()
+        except DuplicateKeyError:
+            # Another session stored the same file first: drop our chunks, use theirs
+            fs.delete(grid_in._id)
+            existing = files.find_one({"sha256": digest}, {"_id": 1})
+            logger.info(f"PDF stored concurrently ({digest[:12]}), reusing file {existing['_id']}")
+            return existing["_id"]
+
+        logger.info(f"PDF stored: {uploaded_file.name} ({grid_in.length} bytes, {digest[:12]})")
+        return grid_in._id
+    finally:
+        # Callers read the file again after this (e.g. on every rerun), so always rewind
+        uploaded_file.seek(0)
+
+
+# Gemini: configured once per process, created on first use
+@st.cache_resource
+def get_gemini_model():
+    import google.generativeai as genai
+
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        logger.error("GEMINI_API_KEY not found in environment variables")
+        raise RuntimeError("GEMINI_API_KEY not found in .env file!")
 
-try:
     genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
     logger.info("Gemini model initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini model: {str(e)}")
-    st.error(f"❌ Could not initialize Gemini model. Error: {str(e)}")
-    st.stop()
+    return gemini_model
+
+
+def generate_text(prompt, label, on_text=None):
+    """Run a Gemini prompt and return the full text.
+
+    With on_text, the response is streamed and on_text(text_so_far) is
+    called as chunks arrive; time-to-first-token and total time are logged.
+    """
+    if on_text is None:
+        return get_gemini_model().generate_content(prompt).text
+
+    start = time.perf_counter()
+    first_token_ms = None
+    parts = []
+    for chunk in get_gemini_model().generate_content(prompt, stream=True):
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without parts (empty final chunk, safety block) raise instead of returning ""
+            text = ""
+        if not text:
+            continue
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - start) * 1000
+        parts.append(text)
+        on_text("".join(parts))
+    total_ms = (time.perf_counter() - start) * 1000
+    if not parts:
+        raise ValueError(f"{label}: the model returned no text (response blocked or empty)")
+    logger.info(f"{label}: first token {first_token_ms or total_ms:.0f} ms, full response {total_ms:.0f} ms "
+                f"({len(parts)} chunks)")
+    return "".join(parts)
+
+
+def live_output(css_class, title=""):
+    """Placeholder that re-renders streamed text inside a styled card; returns (placeholder, on_text)."""
+    placeholder = st.empty()
+
+    def on_text(text):
+        placeholder.markdown(f"""
+        <div class="{css_class}">
+            {title}
+            {format_for_html(text)} ▌
+        </div>
+        """, unsafe_allow_html=True)
+    return placeholder, on_text
 
 # Page config
 st.set_page_config(
@@ -145,6 +435,17 @@ st.markdown("""
     .warning-box p, .warning-box h3, .warning-box h4, .warning-box strong {
         color: #78350f !important;
     }
+    .emergency-box {
+        background: #fef2f2;
+        border-left: 4px solid #dc2626;
+        padding: 15px;
+        border-radius: 8px;
+        margin: 10px 0;
+        color: #7f1d1d;
+    }
+    .emergency-box p, .emergency-box h3, .emergency-box h4, .emergency-box strong {
+        color: #7f1d1d !important;
+    }
     .success-box {
         background: #f0fdf4;
         border-left: 4px solid #10b981;
@@ -207,8 +508,6 @@ st.markdown("""
 # Initialize session state
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
-if 'appointments' not in st.session_state:
-    st.session_state.appointments = []
 if 'current_report' not in st.session_state:
     st.session_state.current_report = None
 if 'report_analysis' not in st.session_state:
@@ -225,29 +524,66 @@ def format_for_html(text):
     return text.replace('\n', '<br>')
 
 
+# Extracted PDF text, cached by the PDF's SHA-256
+def get_pdf_text_cache():
+    return get_db()["pdf_text_cache"]
+
+
+def get_cached_pdf_text(sha256):
+    try:
+        doc = get_pdf_text_cache().find_one({"_id": sha256}, {"text": 1})
+        return doc["text"] if doc else None
+    except Exception as e:
+        logger.warning(f"PDF text cache unavailable: {str(e)}")
+        return None
+
+
+def cache_pdf_text(sha256, text, pages):
+    try:
+        get_pdf_text_cache().replace_one(
+            {"_id": sha256},
+            {"_id": sha256, "text": text, "pages": pages, "extracted_at": datetime.now()},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"Could not cache PDF text: {str(e)}")
+
+
 # Helper function to extract text from PDF
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF file"""
+def extract_text_from_pdf(pdf_file, progress=None):
+    """Extract text from uploaded PDF file
+
+    progress(done_pages, total_pages, page_texts) is called as pages finish.
+    """
     try:
         logger.info("Starting PDF text extraction")
         pdf_file.seek(0)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        total_pages = len(pdf_reader.pages)
-        logger.info(f"PDF has {total_pages} pages")
-
-        for page_num in range(total_pages):
-            page = pdf_reader.pages[page_num]
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-
-        if not text.strip():
+        pdf_bytes = pdf_file.read()
+        sha256 = pdf_extract.pdf_sha256(pdf_bytes)
+
+        cached = get_cached_pdf_text(sha256)
+        if cached is not None:
+            logger.info(f"PDF text served from cache ({sha256[:12]}, {len(cached)} characters)")
+            return cached or None
+
+        start = time.perf_counter()
+        pages = {"total": 0}
+
+        def on_page(done, total, page_texts):
+            pages["total"] = total
+            if progress:
+                progress(done, total, page_texts)
+
+        text = pdf_extract.extract_text(pdf_bytes, on_page)
+        logger.info(f"Extracted {pages['total']} pages in {(time.perf_counter() - start) * 1000:.0f} ms")
+        cache_pdf_text(sha256, text, pages["total"])
+
+        if not text:
             logger.warning("No text extracted from PDF")
             return None
 
         logger.info(f"Successfully extracted {len(text)} characters from PDF")
-        return text.strip()
+        return text
     except Exception as e:
         logger.error(f"PDF reading error: {str(e)}")
         raise Exception(f"PDF reading error: {str(e)}")
@@ -346,11 +682,22 @@ def send_email_notification(recipient_email, subject, content, content_type="app
 
 
 # Medical Report Analyzer Functions
-def analyze_medical_report(report_text):
+def analyze_medical_report(report_text, on_text=None):
     """Extract and analyze medical report findings"""
     try:
         logger.info("Starting medical report analysis")
-        prompt = f"""
+        prompt = build_report_analysis_prompt(report_text)
+
+        analysis = generate_text(prompt, "Report analysis", on_text)
+        logger.info("Medical report analysis completed successfully")
+        return analysis
+    except Exception as e:
+        logger.error(f"Error in analyze_medical_report: {str(e)}")
+        raise
+
+
+def build_report_analysis_prompt(report_text):
+    return f"""
         Analyze this medical report and provide:
         1. Key Findings (list the most important observations)
         2. Layman's Explanation (explain in simple terms)
@@ -363,51 +710,128 @@ def analyze_medical_report(report_text):
         Format your response in clear sections with headers.
         """
 
-        response = model.generate_content(prompt)
-        logger.info("Medical report analysis completed successfully")
-        return response.text
-    except Exception as e:
-        logger.error(f"Error in analyze_medical_report: {str(e)}")
-        raise
 
+def normalize_report_text(report_text):
+    """Collapse whitespace so re-pasted or re-extracted copies of a report hash the same."""
+    return " ".join(report_text.split())
+
+
+@st.cache_resource
+def get_report_analyses():
+    """Analysis cache collection, keyed by (text hash, prompt version, model) and expired by TTL."""
+    analyses = get_db()["report_analyses"]
+    analyses.create_index(
+        [("text_hash", 1), ("prompt_version", 1), ("model", 1)],
+        unique=True,
+        name="analysis_key"
+    )
+    analyses.create_index("created_at", expireAfterSeconds=ANALYSIS_CACHE_TTL_DAYS * 24 * 3600, name="analysis_ttl")
+    return analyses
+
+
+@st.cache_resource
+def get_analysis_cache_stats():
+    """Process-wide hit/miss counters for the analysis cache."""
+    return {"hits": 0, "misses": 0}
+
+
+def get_report_analysis(report_text, force=False, on_text=None):
+    """Cached analysis of a report; returns (analysis_text, analyzed_at or None when freshly generated)."""
+    key = {
+        "text_hash": hashlib.sha256(normalize_report_text(report_text).encode("utf-8")).hexdigest(),
+        "prompt_version": ANALYSIS_PROMPT_VERSION,
+        "model": GEMINI_MODEL_NAME
+    }
+    stats = get_analysis_cache_stats()
+
+    cached = None
+    if not force:
+        try:
+            cached = get_report_analyses().find_one(key, {"analysis": 1, "created_at": 1})
+        except Exception as e:
+            logger.warning(f"Analysis cache unavailable: {str(e)}")
 
-def search_medical_info(condition):
-    """Search for medical information about a condition"""
+    if cached:
+        stats["hits"] += 1
+    else:
+        stats["misses"] += 1
+    total = stats["hits"] + stats["misses"]
+    logger.info(f"Analysis cache {'hit' if cached else 'miss'}{' (forced)' if force else ''} - "
+                f"hit rate {stats['hits'] / total:.0%} ({stats['hits']}/{total})")
+    if cached:
+        return cached["analysis"], cached["created_at"]
+
+    analysis = analyze_medical_report(report_text, on_text)
     try:
-        logger.info(f"Searching medical information for: {condition}")
-        prompt = f"""
-        Provide authoritative medical information about: {condition}
+        get_report_analyses().replace_one(
+            key,
+            {**key, "analysis": analysis, "created_at": datetime.now()},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"Could not cache analysis: {str(e)}")
+    return analysis, None
 
-        Include:
-        1. Definition and Overview
-        2. Common Symptoms
-        3. Typical Causes
-        4. Standard Treatment Options
-        5. When to Seek Medical Care
 
-        Base this on established medical knowledge and guidelines.
-        """
+@st.cache_resource
+def get_knowledge_cache():
+    """Knowledge Base cache shared by all sessions (prewarmed by prewarm_knowledge_base.py)."""
+    return knowledge_cache.KnowledgeCache(get_db()["knowledge_base"], KB_CACHE_TTL_DAYS)
+
 
-        response = model.generate_content(prompt)
-        logger.info(f"Medical information search completed for: {condition}")
-        return response.text
+def generate_medical_info(condition, on_text=None):
+    """Ask the model for medical information about a (canonical) condition"""
+    logger.info(f"Generating medical information for: {condition}")
+    research = generate_text(knowledge_cache.build_medical_info_prompt(condition), "Knowledge base search", on_text)
+    logger.info(f"Medical information generated for: {condition}")
+    return research
+
+
+def search_medical_info(condition, on_text=None, refresh=False):
+    """Medical information about a condition; returns (text, from_cache)"""
+    try:
+        # Logged for every search, cached or not: prewarm_knowledge_base.py ranks conditions by this line
+        logger.info(f"Searching medical information for: {condition}")
+        try:
+            cache = get_knowledge_cache()
+        except Exception as e:
+            logger.warning(f"Knowledge cache unavailable: {str(e)}")
+            return generate_medical_info(knowledge_cache.normalize_condition(condition), on_text), False
+        return cache.get_or_fetch(condition, lambda key: generate_medical_info(key, on_text), refresh=refresh)
     except Exception as e:
         logger.error(f"Error in search_medical_info: {str(e)}")
         raise
 
 
-def chat_about_report(user_question, report_text, analysis_text):
+def get_report_index(report_text):
+    """BM25 index of the current report, built once per report per session."""
+    digest = hashlib.sha256(report_text.encode("utf-8")).hexdigest()
+    cached = st.session_state.get('report_index')
+    if not cached or cached[0] != digest:
+        st.session_state.report_index = (digest, report_index.BM25Index.from_text(report_text))
+        logger.info(f"Indexed report into {len(st.session_state.report_index[1].chunks)} chunks")
+    return st.session_state.report_index[1]
+
+
+def chat_about_report(user_question, report_text, analysis_text, on_text=None):
     """Answer questions about the medical report"""
     try:
         logger.info(f"Processing chat question: {user_question[:50]}...")
+        retrieval_start = time.perf_counter()
+        index = get_report_index(report_text)
+        excerpts = index.select(user_question, CHAT_CONTEXT_TOKEN_BUDGET, CHAT_TOP_K_CHUNKS)
+        report_context = "\n...\n".join(excerpts)
+        analysis_summary = report_index.compact_summary(analysis_text, CHAT_SUMMARY_TOKEN_BUDGET)
+        retrieval_ms = (time.perf_counter() - retrieval_start) * 1000
+
         prompt = f"""
         You are a helpful medical assistant chatbot. A patient has uploaded their medical report and wants to ask questions about it.
 
-        MEDICAL REPORT:
-        {report_text}
+        MEDICAL REPORT (most relevant excerpts):
+        {report_context}
 
-        PREVIOUS ANALYSIS:
-        {analysis_text}
+        PREVIOUS ANALYSIS (summary):
+        {analysis_summary}
 
         PATIENT QUESTION: {user_question}
 
@@ -427,9 +851,16 @@ def chat_about_report(user_question, report_text, analysis_text):
         Now answer the patient's question:
         """
 
-        response = model.generate_content(prompt)
-        logger.info("Chat response generated successfully")
-        return response.text
+        full_tokens = report_index.estimate_tokens(report_text) + report_index.estimate_tokens(analysis_text)
+        sent_tokens = report_index.estimate_tokens(report_context) + report_index.estimate_tokens(analysis_summary)
+        model_start = time.perf_counter()
+        answer = generate_text(prompt, "Chat answer", on_text)
+        logger.info(
+            f"Chat response generated successfully - context ~{sent_tokens} of ~{full_tokens} tokens "
+            f"({1 - sent_tokens / full_tokens:.0%} saved), {len(excerpts)}/{len(index.chunks)} chunks, "
+            f"retrieval {retrieval_ms:.1f} ms, model {(time.perf_counter() - model_start) * 1000:.0f} ms"
+        )
+        return answer
     except Exception as e:
         logger.error(f"Error in chat_about_report: {str(e)}")
         raise
@@ -440,16 +871,20 @@ class AppointmentScheduler:
     """Agent 1: Handles appointment scheduling"""
 
     @staticmethod
-    def schedule_appointment(patient_name, concern, preferred_date, preferred_time, patient_email=None):
+    def plan_appointment(patient_name, concern, preferred_date, preferred_time, patient_email=None,
+                         department="General Medicine", duration_min=30):
+        """Model recommendation for an appointment request; no session state or email, so safe in a worker thread"""
         try:
-            logger.info(f"Scheduling appointment for {patient_name}")
+            logger.info(f"Planning appointment for {patient_name}")
             prompt = f"""
             As an appointment scheduler, process this appointment request:
 
             Patient: {patient_name}
             Chief Concern: {concern}
+            Requested Department: {department}
             Preferred Date: {preferred_date}
             Preferred Time: {preferred_time}
+            Booked Duration: {duration_min} minutes
 
             Provide:
             1. Recommended department/specialist
@@ -458,43 +893,103 @@ class AppointmentScheduler:
             4. Pre-appointment instructions
             """
 
-            response = model.generate_content(prompt)
+            response = get_gemini_model().generate_content(prompt)
 
-            appointment = {
+            return {
                 'patient': patient_name,
                 'concern': concern,
+                'department': department,
                 'date': preferred_date,
                 'time': preferred_time,
+                'duration_min': duration_min,
                 'email': patient_email,
                 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'details': response.text
             }
-            st.session_state.appointments.append(appointment)
+        except Exception as e:
+            logger.error(f"Error in plan_appointment: {str(e)}")
+            raise
+
+    @staticmethod
+    def check_slot(department, preferred_date, preferred_time, duration_min):
+        """Raise SlotConflict if the slot is taken; cheap, so it runs before any model call"""
+        start = appointment_slots.to_minutes(preferred_time)
+        before, after = slot_neighbours(department, preferred_date, start)
+        appointment_slots.check(start, duration_min, before, after,
+                                lambda: slot_bookings_from(department, preferred_date, start, before))
+        logger.info(f"Slot {preferred_date} {preferred_time} free in {department}")
+
+    @staticmethod
+    def book_appointment(appointment):
+        """Insert a planned appointment; raises SlotConflict if the slot was taken in the meantime.
+
+        check_slot runs before the model call, so another session may book an
+        overlapping slot before this insert. The slot is checked again and
+        inserted while holding the department's slot_lock for that day, so
+        bookings that all go through here never overlap.
+        """
+        from pymongo.errors import DuplicateKeyError
+
+        appointments = get_appointments_collection()
+        start = appointment_slots.to_minutes(appointment['time'])
+        end = start + appointment['duration_min']
+        record = {
+            **appointment,
+            'start_minute': start,
+            'end_minute': end,
+            'created_at': datetime.now()
+        }
+        with slot_lock(appointment['department'], appointment['date']):
+            AppointmentScheduler.check_slot(appointment['department'], appointment['date'],
+                                            appointment['time'], appointment['duration_min'])
+            try:
+                return appointments.insert_one(record).inserted_id
+            except DuplicateKeyError:
+                # A booking written without the lock (e.g. by an older app version)
+                raise SlotConflict(f"{appointment['department']} at {appointment['date']} {appointment['time']} "
+                                   f"was just booked by someone else")
+
+    @staticmethod
+    def send_confirmation(appointment):
+        """Email the appointment to the patient; returns True when sent"""
+        email_content = f"""
+        <p><strong>Patient Name:</strong> {appointment['patient']}</p>
+        <p><strong>Chief Concern:</strong> {appointment['concern']}</p>
+        <p><strong>Preferred Date:</strong> {appointment['date']}</p>
+        <p><strong>Preferred Time:</strong> {appointment['time']}</p>
+        <p><strong>Scheduled:</strong> {appointment['timestamp']}</p>
+        <hr>
+        <h3>AI Recommendations:</h3>
+        <div style="white-space: pre-wrap;">{appointment['details'].replace(chr(10), '<br>')}</div>
+        """
+
+        success, message = send_email_notification(
+            appointment['email'],
+            f"Appointment Scheduled - {appointment['patient']}",
+            email_content,
+            "appointment"
+        )
+        return success
+
+    @staticmethod
+    def schedule_appointment(patient_name, concern, preferred_date, preferred_time, patient_email=None,
+                             department="General Medicine", duration_min=30):
+        try:
+            logger.info(f"Scheduling appointment for {patient_name}")
+            AppointmentScheduler.check_slot(department, preferred_date, preferred_time, duration_min)
+            appointment = AppointmentScheduler.plan_appointment(
+                patient_name, concern, preferred_date, preferred_time, patient_email, department, duration_min
+            )
+            AppointmentScheduler.book_appointment(appointment)
             logger.info(f"Appointment scheduled successfully for {patient_name}")
 
             # Send email notification if email provided
-            email_sent = False
-            if patient_email:
-                email_content = f"""
-                <p><strong>Patient Name:</strong> {patient_name}</p>
-                <p><strong>Chief Concern:</strong> {concern}</p>
-                <p><strong>Preferred Date:</strong> {preferred_date}</p>
-                <p><strong>Preferred Time:</strong> {preferred_time}</p>
-                <p><strong>Scheduled:</strong> {appointment['timestamp']}</p>
-                <hr>
-                <h3>AI Recommendations:</h3>
-                <div style="white-space: pre-wrap;">{response.text.replace(chr(10), '<br>')}</div>
-                """
-
-                success, message = send_email_notification(
-                    patient_email,
-                    f"Appointment Scheduled - {patient_name}",
-                    email_content,
-                    "appointment"
-                )
-                email_sent = success
-
-            return appointment, response.text, email_sent
+            email_sent = AppointmentScheduler.send_confirmation(appointment) if patient_email else False
+
+            return appointment, appointment['details'], email_sent
+        except SlotConflict as e:
+            logger.info(f"Slot conflict for {patient_name}: {str(e)}")
+            raise
         except Exception as e:
             logger.error(f"Error in schedule_appointment: {str(e)}")
             raise
@@ -504,14 +999,29 @@ class PatientTriage:
     """Agent 2: Triages patients based on symptoms"""
 
     @staticmethod
-    def triage_patient(symptoms):
+    def screen_red_flags(symptoms):
+        """Rule-based red-flag matches (negations excluded); instant, no model call"""
+        start = time.perf_counter()
+        matches = [m for m in triage_rules.find_red_flags(symptoms) if not m.negated]
+        logger.info(f"Red-flag screen: {', '.join(m.flag for m in matches) or 'none'} "
+                    f"({(time.perf_counter() - start) * 1000:.2f} ms)")
+        return matches
+
+    @staticmethod
+    def triage_patient(symptoms, on_text=None, red_flags=None):
         try:
             logger.info(f"Performing triage assessment for symptoms: {symptoms[:50]}...")
+            screen_note = ""
+            if red_flags:
+                screen_note = f"""
+            A red-flag screen has already classified this as Emergency (Priority 1) because of:
+            {', '.join(red_flags)}. Keep that category and explain the assessment.
+            """
             prompt = f"""
             As a triage nurse, assess these symptoms:
 
             Symptoms: {symptoms}
-
+            {screen_note}
             Provide:
             1. Triage Category (Emergency/Urgent/Standard/Non-urgent)
             2. Priority Level (1-5, where 1 is highest)
@@ -520,9 +1030,9 @@ class PatientTriage:
             5. Brief explanation of the assessment
             """
 
-            response = model.generate_content(prompt)
+            assessment = generate_text(prompt, "Triage", on_text)
             logger.info("Triage assessment completed successfully")
-            return response.text
+            return assessment
         except Exception as e:
             logger.error(f"Error in triage_patient: {str(e)}")
             raise
@@ -532,7 +1042,7 @@ class DoctorAssistant:
     """Agent 3: Retrieves medical guidelines and assists diagnosis"""
 
     @staticmethod
-    def get_medical_guidance(condition, symptoms):
+    def get_medical_guidance(condition, symptoms, on_text=None):
         try:
             logger.info(f"Getting medical guidance for: {condition}")
             prompt = f"""
@@ -551,14 +1061,96 @@ class DoctorAssistant:
             Base this on established medical guidelines (e.g., WHO, CDC, medical associations).
             """
 
-            response = model.generate_content(prompt)
+            guidance = generate_text(prompt, "Clinical guidance", on_text)
             logger.info(f"Medical guidance retrieved successfully for: {condition}")
-            return response.text
+            return guidance
         except Exception as e:
             logger.error(f"Error in get_medical_guidance: {str(e)}")
             raise
 
 
+class CaseIntake:
+    """Runs the three agents concurrently for one patient and merges them into a case record"""
+
+    AGENTS = ("appointment", "triage", "guidance")
+
+    @staticmethod
+    def run_agents(patient_name, concern, symptoms, condition, preferred_date, preferred_time, patient_email=None,
+                   department="General Medicine", duration_min=30, red_flags=None, agents=AGENTS):
+        """Yield (agent, result, error, elapsed_ms) for each of `agents` as soon as it finishes.
+
+        The agent calls are blocking network requests, so threads overlap them and
+        the total is close to the slowest one. Nothing in the threads touches
+        st.session_state or Streamlit elements; the caller renders the results.
+        """
+        get_gemini_model()  # configure once here, not concurrently from the workers
+
+        def timed(call, *args):
+            start = time.perf_counter()
+            result = call(*args)
+            return result, (time.perf_counter() - start) * 1000
+
+        calls = {
+            "appointment": (AppointmentScheduler.plan_appointment, patient_name, concern,
+                            preferred_date, preferred_time, patient_email, department, duration_min),
+            "triage": (PatientTriage.triage_patient, symptoms, None, red_flags),
+            "guidance": (DoctorAssistant.get_medical_guidance, condition, symptoms),
+        }
+        with ThreadPoolExecutor(max_workers=len(agents), thread_name_prefix="intake") as pool:
+            futures = {pool.submit(timed, *calls[agent]): agent for agent in agents}
+            for future in as_completed(futures):
+                agent = futures[future]
+                try:
+                    result, elapsed_ms = future.result()
+                    yield agent, result, None, elapsed_ms
+                except Exception as e:
+                    logger.error(f"Full intake agent '{agent}' failed: {str(e)}")
+                    yield agent, None, str(e), None
+
+    @staticmethod
+    def save_case(patient_name, patient_email, concern, symptoms, condition, results, errors, timings_ms, total_ms,
+                  red_flags=None):
+        """Store the merged intake as one document in the cases collection; returns its id"""
+        appointment = results.get("appointment")
+        case = {
+            'patient': patient_name,
+            'email': patient_email,
+            'concern': concern,
+            'symptoms': symptoms,
+            'condition': condition,
+            'red_flags': red_flags or [],
+            'appointment': appointment,
+            'triage': results.get("triage"),
+            'guidance': results.get("guidance"),
+            'errors': errors,
+            'timings_ms': timings_ms,
+            'total_ms': total_ms,
+            'created_at': datetime.now()
+        }
+        case_id = get_cases_collection().insert_one(case).inserted_id
+        logger.info(f"Case {case_id} saved for {patient_name} "
+                    f"(total {total_ms:.0f} ms, slowest agent {max(timings_ms.values(), default=0):.0f} ms)")
+        return case_id
+
+
+def show_emergency_assessment(matches):
+    """Instant Emergency result from the red-flag screen, shown before the model responds"""
+    st.markdown(f"""
+    <div class="emergency-box">
+        <h4>🚨 Emergency - red flags detected</h4>
+        {format_for_html(triage_rules.emergency_assessment(matches))}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def show_slot_conflict(conflict):
+    """Explain a rejected slot and suggest the next free one"""
+    message = f"⛔ Slot unavailable: {conflict}."
+    if conflict.next_free is not None:
+        message += f" Next free slot that day: {appointment_slots.from_minutes(conflict.next_free)}."
+    st.error(message)
+
+
 # Navigation function
 def navigate_to(page_name):
     """Navigate to a specific page"""
@@ -604,6 +1196,14 @@ st.sidebar.info("""
 *Always consult healthcare professionals for medical decisions.*
 """)
 
+with st.sidebar.expander("🩺 System Status"):
+    if st.button("Check Database Connection", key="mongo_health"):
+        ok, status = mongo_health_check()
+        if ok:
+            st.success(f"✅ MongoDB: {status}")
+        else:
+            st.error(f"❌ MongoDB: {status}")
+
 # Home Page
 if st.session_state.current_page == "🏠 Home":
     logger.info("Displaying Home page")
@@ -718,7 +1318,17 @@ elif st.session_state.current_page == "📄 Report Analyzer":
             with st.spinner(f"📖 Reading {file_extension.upper()} file..."):
                 try:
                     if file_extension == 'pdf':
-                        report_text = extract_text_from_pdf(uploaded_file)
+                        progress_bar = st.progress(0.0)
+                        first_pages = st.empty()
+
+                        def show_progress(done, total, page_texts):
+                            progress_bar.progress(done / total, text=f"Page {done} of {total}")
+                            if page_texts and done < total:
+                                first_pages.code("\n".join(page_texts)[:2000], language=None, height=200)
+
+                        report_text = extract_text_from_pdf(uploaded_file, show_progress)
+                        progress_bar.empty()
+                        first_pages.empty()
 
                         if report_text and len(report_text.strip()) > 50:
                             st.success(f"✅ PDF read successfully! ({len(report_text)} characters extracted)")
@@ -762,18 +1372,26 @@ elif st.session_state.current_page == "📄 Report Analyzer":
             key="analysis_email_input"
         )
 
+    reanalyze = st.checkbox("🔄 Re-analyze (ignore any saved analysis of this report)", value=False)
+
     if st.button("🔍 Analyze Report", use_container_width=True, type="primary"):
         if report_text.strip():
             logger.info("Starting report analysis")
             with st.spinner("Analyzing report... This may take a moment."):
                 try:
-                    analysis = analyze_medical_report(report_text)
+                    st.markdown("---")
+                    st.markdown("### 📊 Analysis Results")
+
+                    live, on_text = live_output("report-card")
+                    analysis, analyzed_at = get_report_analysis(report_text, force=reanalyze, on_text=on_text)
+                    live.empty()
 
                     st.session_state.current_report = report_text
                     st.session_state.report_analysis = analysis
 
-                    st.markdown("---")
-                    st.markdown("### 📊 Analysis Results")
+                    if analyzed_at:
+                        st.caption(f"⚡ Saved analysis from {analyzed_at.strftime('%Y-%m-%d %H:%M')} - "
+                                   f"tick 'Re-analyze' for a fresh one")
 
                     formatted_analysis = format_for_html(analysis)
                     st.markdown(f"""
@@ -940,10 +1558,12 @@ elif st.session_state.current_page == "💬 Report Chatbot":
             logger.info(f"Processing user question: {user_question[:100]}")
             with st.spinner("🤔 Thinking..."):
                 try:
+                    _, on_text = live_output("success-box", "<strong>🤖 ClinIQ:</strong><br>")
                     answer = chat_about_report(
                         user_question,
                         st.session_state.current_report,
-                        st.session_state.report_analysis if st.session_state.report_analysis else "No previous analysis"
+                        st.session_state.report_analysis if st.session_state.report_analysis else "No previous analysis",
+                        on_text
                     )
 
                     st.session_state.chat_history.append({
@@ -977,13 +1597,16 @@ elif st.session_state.current_page == "📚 Knowledge Base":
         "Enter condition or medical term:",
         placeholder="e.g., hypertension, diabetes, MRI findings..."
     )
+    refresh_info = st.checkbox("Fetch fresh information (skip cache)", value=False)
 
     if st.button("🔍 Search Medical Information", use_container_width=True, type="primary"):
         if condition.strip():
             logger.info(f"Searching knowledge base for: {condition}")
             with st.spinner(f"Searching for information about {condition}..."):
                 try:
-                    research = search_medical_info(condition)
+                    live, on_text = live_output("report-card", f"<h3>📚 {condition.title()}</h3>")
+                    research, from_cache = search_medical_info(condition, on_text, refresh=refresh_info)
+                    live.empty()
                     formatted_research = format_for_html(research)
                     st.markdown(f"""
                     <div class="report-card">
@@ -991,6 +1614,8 @@ elif st.session_state.current_page == "📚 Knowledge Base":
                         {formatted_research}
                     </div>
                     """, unsafe_allow_html=True)
+                    if from_cache:
+                        st.caption("⚡ Served from the knowledge cache")
 
                     logger.info(f"Knowledge base search completed for: {condition}")
 
@@ -1030,10 +1655,11 @@ elif st.session_state.current_page == "🤖 Hospital Assistant":
     st.title("🤖 Multi-Agent Hospital Assistant")
     st.markdown("Interact with our specialized AI agents for comprehensive care")
 
-    agent_tab1, agent_tab2, agent_tab3 = st.tabs([
+    agent_tab1, agent_tab2, agent_tab3, intake_tab = st.tabs([
         "📅 Appointment Scheduler",
         "🚑 Patient Triage",
-        "👨‍⚕️ Doctor Assistant"
+        "👨‍⚕️ Doctor Assistant",
+        "🗂️ Full Intake"
     ])
 
     # Agent 1: Appointment Scheduler
@@ -1058,6 +1684,8 @@ elif st.session_state.current_page == "🤖 Hospital Assistant":
         with col2:
             concern = st.text_input("Chief Concern:", placeholder="Describe your main concern...")
             preferred_time = st.time_input("Preferred Time:", value=datetime.strptime("09:00", "%H:%M").time())
+            department = st.selectbox("Department:", DEPARTMENTS)
+            duration_min = st.selectbox("Duration (minutes):", APPOINTMENT_DURATIONS, index=1)
 
         if st.button("📅 Schedule Appointment", use_container_width=True, type="primary"):
             if patient_name and concern:
@@ -1068,9 +1696,9 @@ elif st.session_state.current_page == "🤖 Hospital Assistant":
                             patient_name, concern,
                             preferred_date.strftime("%Y-%m-%d"),
                             preferred_time.strftime("%H:%M"),
-                            patient_email if patient_email else None
+                            patient_email if patient_email else None,
+                            department, duration_min
                         )
-                        collection.insert_one(result)
                         st.success("✅ Appointment request processed!")
 
                         # Show email notification status
@@ -1088,28 +1716,55 @@ elif st.session_state.current_page == "🤖 Hospital Assistant":
                         </div>
                         """, unsafe_allow_html=True)
 
-                        st.info(f"📊 Total appointments scheduled: {len(st.session_state.appointments)}")
+                        st.info(f"📊 Appointments on {result['date']}: "
+                                f"{count_appointments(result['date'], result['date'])}")
 
+                    except SlotConflict as e:
+                        show_slot_conflict(e)
                     except Exception as e:
                         logger.error(f"Error scheduling appointment: {str(e)}")
                         st.error(f"Error scheduling appointment: {str(e)}")
             else:
                 st.warning("Please fill in all required fields.")
 
-        if st.session_state.appointments:
-            st.markdown("---")
-            st.markdown("### 📋 Recent Appointments")
+        st.markdown("---")
+        st.markdown("### 📋 Appointments")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            list_from = st.date_input("From:", value=datetime.now().date(), key="apt_list_from")
+        with col2:
+            list_to = st.date_input("To:", value=datetime.now().date() + timedelta(days=14), key="apt_list_to")
+        with col3:
+            list_department = st.selectbox("Department:", ["All departments"] + DEPARTMENTS, key="apt_list_department")
 
-            for idx, apt in enumerate(reversed(st.session_state.appointments[-3:]), 1):
-                with st.expander(f"📌 {apt['patient']} - {apt['date']} at {apt['time']}", expanded=False):
+        try:
+            range_args = (list_from.strftime("%Y-%m-%d"), list_to.strftime("%Y-%m-%d"),
+                          None if list_department == "All departments" else list_department)
+            matching = count_appointments(*range_args)
+            page_count = max(1, -(-matching // APPOINTMENT_PAGE_SIZE))
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1,
+                                   key="apt_list_page")
+            appointments = list_appointments(*range_args, page=page - 1)
+            st.caption(f"{matching} appointment(s) in range")
+
+            for apt in appointments:
+                label = f"📌 {apt['date']} {apt['time']} - {apt['patient']}"
+                if apt.get('department'):
+                    label += f" ({apt['department']})"
+                with st.expander(label, expanded=False):
                     st.markdown(f"""
                     **Patient:** {apt['patient']}  
                     **Concern:** {apt['concern']}  
+                    **Department:** {apt.get('department', 'Not specified')}  
                     **Date:** {apt['date']}  
-                    **Time:** {apt['time']}  
-                    **Email:** {apt.get('email', 'Not provided')}  
+                    **Time:** {apt['time']} ({apt.get('duration_min', '?')} min)  
+                    **Email:** {apt.get('email') or 'Not provided'}  
                     **Booked:** {apt['timestamp']}
                     """)
+        except Exception as e:
+            logger.error(f"Error listing appointments: {str(e)}")
+            st.error(f"Could not load appointments: {str(e)}")
 
     # Agent 2: Patient Triage
     with agent_tab2:
@@ -1125,9 +1780,16 @@ elif st.session_state.current_page == "🤖 Hospital Assistant":
         if st.button("🔍 Assess Priority", use_container_width=True, type="primary"):
             if symptoms.strip():
                 logger.info("Performing triage assessment")
-                with st.spinner("Performing triage assessment..."):
+                red_flag_matches = PatientTriage.screen_red_flags(symptoms)
+                red_flags = list(dict.fromkeys(m.flag for m in red_flag_matches))
+                if red_flag_matches:
+                    show_emergency_assessment(red_flag_matches)
+                spinner_text = "Adding detailed assessment..." if red_flags else "Performing triage assessment..."
+                with st.spinner(spinner_text):
                     try:
-                        triage_result = PatientTriage.triage_patient(symptoms)
+                        live, on_text = live_output("warning-box", "<h4>⚕️ Triage Assessment</h4>")
+                        triage_result = PatientTriage.triage_patient(symptoms, on_text, red_flags)
+                        live.empty()
                         formatted_triage = format_for_html(triage_result)
 
                         st.markdown(f"""
@@ -1172,10 +1834,14 @@ elif st.session_state.current_page == "🤖 Hospital Assistant":
                 logger.info(f"Retrieving medical guidance for: {medical_condition}")
                 with st.spinner("Retrieving medical guidelines..."):
                     try:
+                        live, on_text = live_output("report-card",
+                                                    f"<h4>📚 Clinical Guidance: {medical_condition}</h4>")
                         guidance = DoctorAssistant.get_medical_guidance(
                             medical_condition,
-                            related_symptoms if related_symptoms else "None specified"
+                            related_symptoms if related_symptoms else "None specified",
+                            on_text
                         )
+                        live.empty()
                         formatted_guidance = format_for_html(guidance)
 
                         st.markdown(f"""
@@ -1196,6 +1862,123 @@ elif st.session_state.current_page == "🤖 Hospital Assistant":
             else:
                 st.warning("Please enter a medical condition.")
 
+    # All three agents at once
+    with intake_tab:
+        st.markdown("### 🗂️ Full Patient Intake")
+        st.markdown("Scheduling, triage and clinical guidance run in parallel and are saved as one case")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            intake_name = st.text_input("Patient Name:", placeholder="John Doe", key="intake_name")
+            intake_date = st.date_input(
+                "Preferred Date:",
+                min_value=datetime.now().date(),
+                value=datetime.now().date() + timedelta(days=1),
+                key="intake_date"
+            )
+            intake_email = st.text_input("Email (optional):", placeholder="your.email@example.com",
+                                         key="intake_email")
+
+        with col2:
+            intake_concern = st.text_input("Chief Concern:", placeholder="Describe the main concern...",
+                                           key="intake_concern")
+            intake_time = st.time_input("Preferred Time:", value=datetime.strptime("09:00", "%H:%M").time(),
+                                        key="intake_time")
+            intake_condition = st.text_input("Suspected Condition (optional):",
+                                             placeholder="Defaults to the chief concern", key="intake_condition")
+            intake_department = st.selectbox("Department:", DEPARTMENTS, key="intake_department")
+            intake_duration = st.selectbox("Duration (minutes):", APPOINTMENT_DURATIONS, index=1,
+                                           key="intake_duration")
+
+        intake_symptoms = st.text_area(
+            "Symptoms:",
+            height=120,
+            placeholder="Describe the symptoms in detail...",
+            key="intake_symptoms"
+        )
+
+        if st.button("🚀 Run Full Intake", use_container_width=True, type="primary", key="intake_run"):
+            if intake_name and intake_concern and intake_symptoms.strip():
+                logger.info(f"Running full intake for: {intake_name}")
+                condition = intake_condition.strip() or intake_concern
+                intake_day = intake_date.strftime("%Y-%m-%d")
+                intake_slot = intake_time.strftime("%H:%M")
+                # Red flags come first: an emergency must show whatever happens to the booking
+                red_flag_matches = PatientTriage.screen_red_flags(intake_symptoms)
+                red_flags = list(dict.fromkeys(m.flag for m in red_flag_matches))
+                if red_flag_matches:
+                    show_emergency_assessment(red_flag_matches)
+                results, errors, timings_ms = {}, {}, {}
+                agents = CaseIntake.AGENTS
+                # A taken slot only skips the appointment agent: triage and guidance still run
+                try:
+                    AppointmentScheduler.check_slot(intake_department, intake_day, intake_slot, intake_duration)
+                except SlotConflict as e:
+                    show_slot_conflict(e)
+                    errors["booking"] = str(e)
+                    agents = tuple(agent for agent in agents if agent != "appointment")
+                titles = {
+                    "appointment": ("success-box", "📋 Appointment"),
+                    "triage": ("warning-box", "⚕️ Triage Assessment"),
+                    "guidance": ("report-card", f"📚 Clinical Guidance: {condition}"),
+                }
+                slots = {}
+                for agent in agents:
+                    slots[agent] = st.empty()
+                    slots[agent].info(f"⏳ {titles[agent][1]} - waiting for agent...")
+
+                start = time.perf_counter()
+                try:
+                    for agent, result, error, elapsed_ms in CaseIntake.run_agents(
+                            intake_name, intake_concern, intake_symptoms, condition, intake_day, intake_slot,
+                            intake_email if intake_email else None, intake_department, intake_duration,
+                            red_flags, agents):
+                        css_class, title = titles[agent]
+                        if error:
+                            errors[agent] = error
+                            slots[agent].error(f"{title} failed: {error}")
+                            continue
+                        results[agent] = result
+                        timings_ms[agent] = elapsed_ms
+                        text = result['details'] if agent == "appointment" else result
+                        slots[agent].markdown(f"""
+                        <div class="{css_class}">
+                            <h4>{title} <small>({elapsed_ms / 1000:.1f}s)</small></h4>
+                            {format_for_html(text)}
+                        </div>
+                        """, unsafe_allow_html=True)
+                    total_ms = (time.perf_counter() - start) * 1000
+
+                    appointment = results.get("appointment")
+                    if appointment:
+                        try:
+                            AppointmentScheduler.book_appointment(appointment)
+                        except SlotConflict as e:
+                            errors["booking"] = str(e)
+                            appointment = None
+                            show_slot_conflict(e)
+                    if appointment:
+                        if intake_email:
+                            if AppointmentScheduler.send_confirmation(appointment):
+                                st.success(f"📧 Confirmation sent to {intake_email}")
+                            else:
+                                st.warning("⚠️ Appointment scheduled but email notification failed.")
+
+                    case_id = CaseIntake.save_case(intake_name, intake_email or None, intake_concern,
+                                                   intake_symptoms, condition, results, errors,
+                                                   timings_ms, total_ms, red_flags)
+                    st.success(f"✅ Case saved ({case_id}) in {total_ms / 1000:.1f}s - "
+                               f"slowest agent {max(timings_ms.values(), default=0) / 1000:.1f}s, "
+                               f"sequential would take ~{sum(timings_ms.values()) / 1000:.1f}s")
+                    if errors:
+                        st.warning(f"Saved with {len(errors)} failed agent(s): {', '.join(errors)}")
+                except Exception as e:
+                    logger.error(f"Error running full intake: {str(e)}")
+                    st.error(f"Error running full intake: {str(e)}")
+            else:
+                st.warning("Please fill in the patient name, chief concern and symptoms.")
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,96 @@
+"""
+Page-parallel PDF text extraction for ClinIQ.
+
+Lives in its own module so process-pool workers can import it
+(Streamlit's script module cannot be pickled into a child process).
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_MIN_PAGES_PER_TASK = int(os.getenv("PDF_MIN_PAGES_PER_TASK", "4"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pdf_sha256(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def count_pages(pdf_bytes: bytes) -> int:
+    return len(PyPDF2.PdfReader(BytesIO(pdf_bytes)).pages)
+
+
+def extract_page_range(pdf_bytes: bytes, start: int, end: int):
+    """Text of pages [start, end); runs inside a pool worker."""
+    reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
+    return [reader.pages[page_num].extract_text() or "" for page_num in range(start, end)]
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """One spawn-based worker pool per process, created on first large PDF."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_POOL_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"PDF extraction pool started with {PDF_POOL_WORKERS} workers")
+        return _pool
+
+
+def iter_pdf_pages(pdf_bytes: bytes):
+    """Yield (page_num, total_pages, page_text) in page order.
+
+    Small PDFs are read in-process; larger ones are split into page ranges
+    across the worker pool. Pages are yielded as soon as their range is
+    done, so callers can show the first pages before the last one finishes.
+    """
+    total_pages = count_pages(pdf_bytes)
+    logger.info(f"PDF has {total_pages} pages")
+
+    if total_pages < PDF_PARALLEL_MIN_PAGES or PDF_POOL_WORKERS <= 1:
+        reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
+        for page_num in range(total_pages):
+            yield page_num, total_pages, reader.pages[page_num].extract_text() or ""
+        return
+
+    # Every task re-parses the document, so use ~2 ranges per worker: enough to
+    # balance load and stream early pages back, few enough to keep parsing cheap
+    pool = get_pool()
+    pages_per_task = max(PDF_MIN_PAGES_PER_TASK, -(-total_pages // (PDF_POOL_WORKERS * 2)))
+    ranges = [(start, min(start + pages_per_task, total_pages))
+              for start in range(0, total_pages, pages_per_task)]
+    futures = [pool.submit(extract_page_range, pdf_bytes, start, end) for start, end in ranges]
+    try:
+        for (start, _), future in zip(ranges, futures):
+            for offset, page_text in enumerate(future.result()):
+                yield start + offset, total_pages, page_text
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_text(pdf_bytes: bytes, progress=None) -> str:
+    """Full text of a PDF, pages joined by newlines.
+
+    progress(done_pages, total_pages, page_texts) is called after each page.
+    """
+    page_texts = []
+    for page_num, total_pages, page_text in iter_pdf_pages(pdf_bytes):
+        if page_text:
+            page_texts.append(page_text)
+        if progress:
+            progress(page_num + 1, total_pages, page_texts)
+    return "\n".join(page_texts).strip()
@@ -0,0 +1,89 @@
+"""
+Prewarm the ClinIQ Knowledge Base cache with the most searched conditions.
+
+Reads the app logs (ClinIQ_*.log in knowledge_cache.LOG_DIR), counts "Searching medical information
+for: ..." lines per canonical condition, and fetches the top N that are not
+already cached and fresh, so those searches render with no model latency.
+
+    python prewarm_knowledge_base.py --dry-run        # show what would be fetched
+    python prewarm_knowledge_base.py --top 25
+    python prewarm_knowledge_base.py --top 25 --refresh
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+import knowledge_cache
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Prewarm the ClinIQ Knowledge Base cache from search logs")
+    parser.add_argument("--log-dir", default=str(knowledge_cache.LOG_DIR))
+    parser.add_argument("--top", type=int, default=20, help="How many of the most searched conditions to cache")
+    parser.add_argument("--refresh", action="store_true", help="Re-fetch even entries that are still fresh")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the ranking, don't call the model")
+    return parser.parse_args()
+
+
+def read_log_lines(log_dir: str):
+    for log_file in sorted(Path(log_dir).glob("ClinIQ_*.log")):
+        with open(log_file, encoding="utf-8", errors="replace") as f:
+            yield from f
+
+
+def main():
+    args = parse_args()
+    load_dotenv()
+
+    ranking = knowledge_cache.top_searched_conditions(read_log_lines(args.log_dir), args.top)
+    if not ranking:
+        print(f"No Knowledge Base searches found in {args.log_dir}")
+        return
+
+    print(f"Top {len(ranking)} searched conditions:")
+    for condition, count in ranking:
+        print(f"  {count:6d}  {condition}")
+    if args.dry_run:
+        return
+
+    from pymongo import MongoClient
+    import google.generativeai as genai
+
+    mongo_uri = os.getenv("MONGODB_URI")
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not mongo_uri or not api_key:
+        print("Set MONGODB_URI and GEMINI_API_KEY (or add them to .env) first")
+        sys.exit(2)
+
+    db = MongoClient(mongo_uri, appname="ClinIQ-prewarm")[os.getenv("MONGODB_DB_NAME", "medreport")]
+    cache = knowledge_cache.KnowledgeCache(db["knowledge_base"], int(os.getenv("KB_CACHE_TTL_DAYS", "30")))
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash-exp"))
+
+    fetched = skipped = failed = 0
+    for condition, _ in ranking:
+        if not args.refresh and cache.is_fresh(condition):
+            skipped += 1
+            continue
+        start = time.perf_counter()
+        try:
+            text = model.generate_content(knowledge_cache.build_medical_info_prompt(condition)).text
+        except Exception as e:
+            print(f"  FAILED  {condition}: {e}")
+            failed += 1
+            continue
+        cache.put(condition, text)
+        fetched += 1
+        print(f"  cached  {condition} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    print(f"Done: {fetched} fetched, {skipped} already fresh, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
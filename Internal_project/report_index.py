@@ -0,0 +1,108 @@
+"""
+Local retrieval over a single medical report for the ClinIQ chatbot.
+
+The report is split into line-aligned chunks once and indexed with BM25, so
+each chat question only sends the most relevant chunks to the model.
+Pure Python: no extra dependencies.
+"""
+
+import math
+import re
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough model-token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def tokenize(text: str):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def chunk_report(text: str, max_chars: int = 800):
+    """Split a report into chunks of whole lines, each at most ~max_chars."""
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if current and size + len(line) > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        # A single overlong line is split hard so no chunk blows the budget
+        while len(line) > max_chars:
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks."""
+
+    def __init__(self, chunks, k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if chunks else 0.0
+        doc_freqs = Counter(term for tf in self.term_freqs for term in tf)
+        n = len(chunks)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    @classmethod
+    def from_text(cls, text: str, max_chars: int = 800):
+        return cls(chunk_report(text, max_chars))
+
+    def scores(self, query: str):
+        terms = [term for term in tokenize(query) if term in self.idf]
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term, 0)
+                if freq:
+                    norm = freq + self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+                    score += self.idf[term] * freq * (self.k1 + 1) / norm
+            scores.append(score)
+        return scores
+
+    def select(self, query: str, token_budget: int, top_k: int = 6):
+        """Best-matching chunks that fit the token budget, returned in report order.
+
+        When the whole report fits the budget it is returned in full.
+        """
+        if sum(estimate_tokens(chunk) for chunk in self.chunks) <= token_budget:
+            return list(self.chunks)
+
+        ranked = sorted(range(len(self.chunks)), key=self.scores(query).__getitem__, reverse=True)
+        picked, used = [], 0
+        for i in ranked[:top_k]:
+            cost = estimate_tokens(self.chunks[i])
+            if used + cost > token_budget:
+                continue
+            picked.append(i)
+            used += cost
+        return [self.chunks[i] for i in sorted(picked)]
+
+
+def compact_summary(analysis_text: str, token_budget: int) -> str:
+    """Leading lines of an analysis (its key findings come first), cut to a token budget."""
+    lines, used = [], 0
+    for line in analysis_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
@@ -0,0 +1,188 @@
+"""
+Deterministic red-flag screen for ClinIQ patient triage.
+
+Every phrase of the red-flag lexicon is compiled into one regular
+expression with a named group per flag, so a symptom description is
+scanned once however many phrases there are. A match is ignored only
+when a negation cue sits directly in front of it ("no chest pain",
+"denies any shortness of breath", "is not unconscious") or in front of
+the red flag it is listed after ("denies chest pain or shortness of
+breath"), or when it is past history rather than a current symptom
+("history of seizures", "father had a heart attack last year"). A cue
+elsewhere in the sentence ("I do not know why I passed out") never
+suppresses a red flag, since a missed emergency is the worst outcome
+here. Any remaining match means an instant Emergency category; the
+model explanation is added afterwards.
+
+Pure Python; benchmarked by bench_triage_rules.py.
+"""
+
+import re
+from collections import namedtuple
+
+# flag -> phrase patterns (regex fragments, matched case-insensitively on word boundaries)
+RED_FLAG_LEXICON = {
+    "Chest pain": [
+        r"(?:crushing |severe |sudden )?chest (?:pain|pressure|tightness)",
+        r"pain (?:spreading|radiating) (?:to|down) (?:my |the )?(?:left )?(?:arm|jaw)",
+        r"heart attack",
+    ],
+    "Breathing difficulty": [
+        r"(?:can ?not|can'?t|unable to|struggling to) breathe?",
+        r"(?:difficulty|trouble) breathing",
+        r"(?:severe |sudden )?shortness of breath",
+        r"gasping for (?:air|breath)",
+        r"(?:blue|bluish) (?:lips|face)",
+        r"choking",
+    ],
+    "Stroke signs": [
+        r"face (?:is )?drooping",
+        r"facial droop",
+        r"slurred speech",
+        r"sudden (?:weakness|numbness) (?:on|in) one side",
+        r"(?:one-sided|one sided) weakness",
+        r"sudden (?:vision loss|loss of vision)",
+        r"worst headache (?:of my life|ever)",
+        r"thunderclap headache",
+    ],
+    "Loss of consciousness": [
+        r"unconscious",
+        r"unresponsive",
+        r"passed out",
+        r"fainted",
+        r"not waking up",
+    ],
+    "Seizure": [
+        r"seizures?",
+        r"convulsions?",
+    ],
+    "Severe bleeding": [
+        r"(?:severe|heavy|uncontrolled|profuse) bleeding",
+        r"bleeding (?:that )?(?:won'?t|will not|does not|doesn'?t) stop",
+        r"(?:coughing|vomiting) (?:up )?blood",
+        r"blood in (?:my )?vomit",
+    ],
+    "Anaphylaxis": [
+        r"anaphyla(?:xis|ctic)",
+        r"(?:throat|tongue|lips?) (?:is |are )?swelling",
+        r"swollen (?:throat|tongue)",
+    ],
+    "Self-harm risk": [
+        r"suicidal",
+        r"(?:want|going) to (?:kill|hurt) myself",
+        r"overdosed?",
+    ],
+    "Sepsis / meningitis signs": [
+        r"stiff neck (?:and|with) (?:a )?(?:high )?fever",
+        r"rash that (?:does not|doesn'?t) fade",
+        r"(?:confused|confusion) (?:and|with) (?:a )?(?:high )?fever",
+    ],
+    "Severe trauma": [
+        r"head injury",
+        r"(?:hit|struck) by a (?:car|vehicle)",
+        r"(?:deep|stab|gunshot) wound",
+        r"severe burns?",
+    ],
+}
+
+# Cue immediately before the phrase: cue, optional "of/any/a", then the phrase
+NEGATION_CUE = re.compile(
+    r"\b(?:no|neither|denies|denied|deny|denying|without|never had|negative for|free of|absence of|not having|"
+    r"(?:is|am|are|was|were)(?:n'?t| not)|(?:do|does|did)(?:n'?t| not) have)\s+(?:(?:of|any|a|an)\s+)?$"
+)
+# Negation never carries across a clause boundary: "no relief at all, crushing chest pain now"
+CLAUSE_BOUNDARY = re.compile(r"[.,;:!?\n]|\b(?:and|now|but|however|although|except)\b")
+# ...except along a list of red flags: "denies chest pain, shortness of breath or fainting"
+LIST_CONTINUATION = re.compile(r"\s*,?\s*(?:(?:or|nor)\s+)?(?:(?:any|a|an)\s+)?", re.IGNORECASE)
+# Past history directly before the phrase is never a current red flag
+HISTORY_CUE = re.compile(
+    r"\b(?:(?:past |previous |prior |family |medical )?history of|h/o|died (?:of|from)|passed away from)"
+    r"\s+(?:(?:a|an|any)\s+)?$"
+)
+# "had a heart attack" is history only with a past time after it ("last year", "as a child")
+PAST_EPISODE_CUE = re.compile(r"\b(?:had|suffered)\s+(?:(?:a|an)\s+)?$")
+PAST_TIME = re.compile(
+    r"\s+(?:[a-z']+\s+){0,2}?(?:last year|(?:[a-z0-9]+\s+)?(?:years|months) ago|"
+    r"as a (?:child|kid|baby|teenager)|in (?:19|20)\d\d)\b",
+    re.IGNORECASE
+)
+
+# negated: negated or past history, i.e. not a current red flag
+RedFlag = namedtuple("RedFlag", ["flag", "text", "start", "end", "negated"])
+
+_group_flags = {}
+
+
+def _compile(lexicon):
+    alternatives = []
+    for flag, patterns in lexicon.items():
+        for pattern in patterns:
+            group = f"f{len(_group_flags)}"
+            _group_flags[group] = flag
+            alternatives.append(f"(?P<{group}>{pattern})")
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+
+RED_FLAG_PATTERN = _compile(RED_FLAG_LEXICON)
+
+
+def _clause_prefix(text: str, start: int) -> str:
+    prefix = text[max(0, start - 40):start].lower()
+    boundaries = list(CLAUSE_BOUNDARY.finditer(prefix))
+    if boundaries:
+        prefix = prefix[boundaries[-1].end():]
+    return prefix
+
+
+def _is_negated(text: str, start: int) -> bool:
+    return bool(NEGATION_CUE.search(_clause_prefix(text, start)))
+
+
+def _is_history(text: str, start: int, end: int) -> bool:
+    prefix = _clause_prefix(text, start)
+    if HISTORY_CUE.search(prefix):
+        return True
+    return bool(PAST_EPISODE_CUE.search(prefix) and PAST_TIME.match(text, end))
+
+
+def _resolve(text: str, spans):
+    """RedFlag tuples for (flag, start, end) matches in text order; a negated or
+    historical match passes that on to the red flag listed right after it."""
+    found = []
+    for flag, start, end in spans:
+        previous = found[-1] if found else None
+        negated = (_is_negated(text, start) or _is_history(text, start, end)
+                   or bool(previous and previous.negated and LIST_CONTINUATION.fullmatch(text, previous.end, start)))
+        found.append(RedFlag(flag, text[start:end], start, end, negated))
+    return found
+
+
+def find_red_flags(text: str):
+    """Every lexicon match in the text, negated or not, as RedFlag tuples."""
+    text = text or ""
+    return _resolve(text, [(_group_flags[match.lastgroup], match.start(), match.end())
+                           for match in RED_FLAG_PATTERN.finditer(text)])
+
+
+def red_flags(text: str):
+    """Distinct red-flag categories present (not negated) in a symptom description, in order found."""
+    flags = []
+    for match in find_red_flags(text):
+        if not match.negated and match.flag not in flags:
+            flags.append(match.flag)
+    return flags
+
+
+def is_emergency(text: str) -> bool:
+    return bool(red_flags(text))
+
+
+def emergency_assessment(matches):
+    """Instant triage text for red-flag matches, in the same layout as the model's assessment."""
+    flags = list(dict.fromkeys(m.flag for m in matches if not m.negated))
+    found = ", ".join(f'"{m.text}"' for m in matches if not m.negated)
+    return f"""1. Triage Category: Emergency
+2. Priority Level: 1 (highest)
+3. Recommended Action: ER - call emergency services now
+4. Red Flags: {', '.join(flags)}
+5. Brief explanation: The description mentions {found}, which can indicate a life-threatening condition. Do not wait for the detailed assessment before seeking emergency care."""